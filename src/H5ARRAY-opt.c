@@ -75,6 +75,104 @@ out:
 }
 
 
+/*-------------------------------------------------------------------------
+ * Function: H5ARRAYOread_readSlices
+ *
+ * Purpose: Read the [start, stop) ranges of several rows from an opened
+ *          Array.  The ranges are stored one after the other in data.
+ *
+ * Return: Success: 0, Failure: -1
+ *
+ * Programmer: PyTables Developers
+ *
+ * Date: October 18, 2026
+ *
+ * Comments:
+ *   - The dataspaces are set up once and reused for every row, which is
+ *     much faster than selecting the union of all the ranges.
+ *
+ * Modifications:
+ *
+ *
+ *-------------------------------------------------------------------------
+ */
+
+herr_t H5ARRAYOread_readSlices( hid_t dataset_id,
+                                hid_t type_id,
+                                size_t nslices,
+                                const hsize_t *irows,
+                                const hsize_t *starts,
+                                const hsize_t *stops,
+                                void *data )
+{
+ hid_t    space_id = -1;
+ hid_t    mem_space_id = -1;
+ hsize_t  count[2];
+ hsize_t  offset[2];
+ hsize_t  stride[2] = {1, 1};
+ hsize_t  maxcount = 0;
+ hsize_t  mem_offset = 0;
+ size_t   typesize;
+ size_t   i;
+ char     *buf = (char *)data;
+
+ if ( (typesize = H5Tget_size( type_id )) == 0 )
+  goto out;
+
+ for (i = 0; i < nslices; i++) {
+   if ( stops[i] > starts[i] && stops[i] - starts[i] > maxcount )
+     maxcount = stops[i] - starts[i];
+ }
+ if ( maxcount == 0 )
+   return 0;
+
+ /* Get the dataspace handle */
+ if ( (space_id = H5Dget_space( dataset_id )) < 0 )
+  goto out;
+
+ /* Create a memory dataspace handle for the largest range */
+ if ( (mem_space_id = H5Screate_simple( 1, &maxcount, NULL )) < 0 )
+   goto out;
+
+ count[0] = 1;
+ for (i = 0; i < nslices; i++) {
+   if ( stops[i] <= starts[i] )
+     continue;
+   count[1] = stops[i] - starts[i];
+   offset[0] = irows[i];
+   offset[1] = starts[i];
+   /* Define a hyperslab in the dataset and in memory for this range */
+   if ( H5Sselect_hyperslab(space_id, H5S_SELECT_SET, offset, stride,
+                            count, NULL) < 0 )
+     goto out;
+   if ( H5Sselect_hyperslab(mem_space_id, H5S_SELECT_SET, &mem_offset,
+                            NULL, &count[1], NULL) < 0 )
+     goto out;
+   /* Read */
+   if ( H5Dread( dataset_id, type_id, mem_space_id, space_id,
+                 H5P_DEFAULT, buf ) < 0 )
+     goto out;
+   buf += count[1] * typesize;
+ }
+
+ /* Terminate access to the dataspaces */
+ if ( H5Sclose( mem_space_id ) < 0 )
+   goto out;
+ if ( H5Sclose( space_id ) < 0 )
+  goto out;
+
+return 0;
+
+out:
+ if ( mem_space_id >= 0 )
+   H5Sclose( mem_space_id );
+ if ( space_id >= 0 )
+   H5Sclose( space_id );
+ return -1;
+
+}
+
+
 /*-------------------------------------------------------------------------
  * Function: H5ARRAYOinit_readSlice
  *
@@ -889,3 +889,84 @@ out:
   return -1;
 
 }
+
+
+/*-------------------------------------------------------------------------
+ * Function: H5ARRAYwrite_chunk
+ *
+ * Purpose: Writes an already filtered chunk straight to a dataset,
+ *          bypassing the filter pipeline.
+ *
+ * Return: Success: 0, Failure: -1, Not supported by HDF5: -2
+ *
+ *-------------------------------------------------------------------------
+ */
+
+herr_t H5ARRAYwrite_chunk( hid_t dataset_id,
+                           const hsize_t *offset,
+                           size_t size,
+                           const void *data )
+{
+#if H5_VERSION_GE(1,10,2)
+  if ( H5Dwrite_chunk(dataset_id, H5P_DEFAULT, 0, offset, size, data) < 0 )
+    return -1;
+  return 0;
+#else
+  return -2;
+#endif
+}
+
+
+/*-------------------------------------------------------------------------
+ * Function: H5ARRAYget_chunk_size
+ *
+ * Purpose: Gets the size of a chunk as stored in a dataset (0 if the
+ *          chunk has not been written yet).
+ *
+ * Return: Success: 0, Failure: -1, Not supported by HDF5: -2
+ *
+ *-------------------------------------------------------------------------
+ */
+
+herr_t H5ARRAYget_chunk_size( hid_t dataset_id,
+                              const hsize_t *offset,
+                              hsize_t *size )
+{
+#if H5_VERSION_GE(1,10,2)
+  if ( H5Dget_chunk_storage_size(dataset_id, offset, size) < 0 )
+    return -1;
+  return 0;
+#else
+  return -2;
+#endif
+}
+
+
+/*-------------------------------------------------------------------------
+ * Function: H5ARRAYread_chunk
+ *
+ * Purpose: Reads a chunk as stored in a dataset, bypassing the filter
+ *          pipeline.  The bits set in filter_mask are the filters
+ *          which were skipped when the chunk was written.
+ *
+ * Return: Success: 0, Failure: -1, Not supported by HDF5: -2
+ *
+ *-------------------------------------------------------------------------
+ */
+
+herr_t H5ARRAYread_chunk( hid_t dataset_id,
+                          const hsize_t *offset,
+                          unsigned *filter_mask,
+                          void *data )
+{
+#if H5_VERSION_GE(1,10,2)
+  uint32_t mask;
+
+  if ( H5Dread_chunk(dataset_id, H5P_DEFAULT, offset, &mask, data) < 0 )
+    return -1;
+  *filter_mask = (unsigned)mask;
+  return 0;
+#else
+  return -2;
+#endif
+}
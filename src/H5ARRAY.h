@@ -87,6 +87,20 @@ herr_t H5ARRAYget_fill_value( hid_t dataset_id,
                               int *status,
                               void *value);
 
+herr_t H5ARRAYwrite_chunk( hid_t dataset_id,
+                           const hsize_t *offset,
+                           size_t size,
+                           const void *data );
+
+herr_t H5ARRAYget_chunk_size( hid_t dataset_id,
+                              const hsize_t *offset,
+                              hsize_t *size );
+
+herr_t H5ARRAYread_chunk( hid_t dataset_id,
+                          const hsize_t *offset,
+                          unsigned *filter_mask,
+                          void *data );
+
 
 #ifdef __cplusplus
 }
@@ -394,6 +394,100 @@ PyObject *Giterate(hid_t parent_id, hid_t loc_id, const char *name) {
   return t;
 }
 
+/****************************************************************
+**
+**  nitercb(): Link iteration callback routine collecting names.
+**
+****************************************************************/
+typedef struct {
+  PyObject *names;
+  size_t   maxnames;
+} names_page_t;
+
+static herr_t nitercb(hid_t loc_id, const char *name,
+                      const H5L_info_t *info, void *data) {
+  names_page_t *page = (names_page_t *)data;
+  PyObject     *strname;
+
+  strname = PyString_FromString(name);
+  if (strname == NULL)
+    return -1;
+  if (PyList_Append(page->names, strname) < 0) {
+    Py_DECREF(strname);
+    return -1;
+  }
+  Py_DECREF(strname);
+
+  /* Stop once the page is full */
+  return ((size_t)PyList_GET_SIZE(page->names) >= page->maxnames);
+}
+
+/****************************************************************
+**
+**  Giterate_names(): Get a page of link names in a group.
+**
+**  The names of at most maxnames links are returned in a list,
+**  in increasing name order and starting at the *idx link, which
+**  is updated to the position of the next link.  Links are not
+**  inspected, so this is much cheaper than Giterate().
+**
+**  Groups with dense storage index links by a hash of their names,
+**  so HDF5 sorts all of them on every call: the remaining names are
+**  returned at once in that case.
+**
+****************************************************************/
+PyObject *Giterate_names(hid_t loc_id, hsize_t *idx, size_t maxnames) {
+  names_page_t page;
+  H5G_info_t   ginfo;
+  herr_t       ret;
+
+  page.names = PyList_New(0);
+  if (page.names == NULL)
+    return NULL;
+  page.maxnames = maxnames;
+
+  if (maxnames > 0) {
+    if (H5Gget_info(loc_id, &ginfo) < 0) {
+      Py_DECREF(page.names);
+      PyErr_SetString(PyExc_RuntimeError,
+                      "Problems getting the information of a group");
+      return NULL;
+    }
+    /* HDF5 refuses to start past the last link */
+    if (*idx >= ginfo.nlinks)
+      return page.names;
+    if (ginfo.storage_type == H5G_STORAGE_TYPE_DENSE)
+      page.maxnames = (size_t)ginfo.nlinks;
+
+    ret = H5Literate(loc_id, H5_INDEX_NAME, H5_ITER_INC, idx,
+                     nitercb, &page);
+    if (ret < 0) {
+      Py_DECREF(page.names);
+      if (!PyErr_Occurred())
+        PyErr_SetString(PyExc_RuntimeError,
+                        "Problems iterating over the links of a group");
+      return NULL;
+    }
+  }
+
+  return page.names;
+}
+
+/****************************************************************
+**
+**  Gget_nlinks(): Get the number of links in a group.
+**
+**  Returns -1 on failure.
+**
+****************************************************************/
+hssize_t Gget_nlinks(hid_t loc_id) {
+  H5G_info_t ginfo;
+
+  if (H5Gget_info(loc_id, &ginfo) < 0)
+    return -1;
+  return (hssize_t)ginfo.nlinks;
+}
+
 /****************************************************************
 **
 **  aitercb(): Custom attribute iteration callback routine.
@@ -60,6 +60,14 @@
         (H5_VERS_MAJOR<Maj))
 #endif
 
+/* COMAPTIBILITY: H5_VERSION_GE has been introduced in HDF5 1.8.7 */
+#ifndef H5_VERSION_GE
+#define H5_VERSION_GE(Maj,Min,Rel) \
+       (((H5_VERS_MAJOR==Maj) && (H5_VERS_MINOR==Min) && (H5_VERS_RELEASE>=Rel)) || \
+        ((H5_VERS_MAJOR==Maj) && (H5_VERS_MINOR>Min)) || \
+        (H5_VERS_MAJOR>Maj))
+#endif
+
 
 /* Use %ld to print the value because long should cover most cases. */
 /* Used to make certain a return value _is_not_ a value */
@@ -92,6 +100,10 @@ int get_linkinfo(hid_t loc_id, const char *name);
 
 PyObject *Giterate(hid_t parent_id, hid_t loc_id, const char *name);
 
+PyObject *Giterate_names(hid_t loc_id, hsize_t *idx, size_t maxnames);
+
+hssize_t Gget_nlinks(hid_t loc_id);
+
 PyObject *Aiterate(hid_t loc_id);
 
 H5T_class_t getHDF5ClassID(hid_t loc_id,
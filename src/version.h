@@ -0,0 +1 @@
+#define PYTABLES_VERSION "3.4.5.dev0"
@@ -139,6 +139,7 @@ from .earray import EArray
 from .vlarray import VLArray
 from .unimplemented import UnImplemented, Unknown
 from .expression import Expr
+from .join import join
 from .tests import print_versions, test
 
 
@@ -154,7 +155,7 @@ __all__ = [
     'FiltersWarning', 'DataTypeWarning',
     # Functions:
     'is_hdf5_file', 'is_pytables_file', 'which_lib_version',
-    'copy_file', 'open_file', 'print_versions', 'test',
+    'copy_file', 'open_file', 'print_versions', 'test', 'join',
     'split_type', 'restrict_flavors', 'set_blosc_max_threads',
     'silence_hdf5_messages',
     # Helper classes:
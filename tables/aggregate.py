@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  PyTables Developers
+#
+# $Id$
+#
+########################################################################
+
+"""Here is defined the Aggregator class.
+
+Classes:
+
+`Aggregator`
+    Streaming group-by aggregation of table rows.
+
+"""
+from __future__ import absolute_import
+
+import collections
+import functools
+import itertools
+
+import numpy
+import six
+from six.moves import map
+
+from .conditions import call_on_recarr
+from .utilsextension import get_nested_field
+
+
+_OPS = ('count', 'sum', 'min', 'max', 'mean')
+"""The supported aggregation operations."""
+
+_NUMERIC_KINDS = 'biufc'
+"""The kinds of the columns supporting all the aggregations."""
+
+_REDUCERS = {
+    'count': numpy.add,
+    'sum': numpy.add,
+    'min': numpy.minimum,
+    'max': numpy.maximum,
+}
+"""The ufunc combining partial results of every accumulator."""
+
+_NAN = object()
+"""The hash key standing for every NaN value of the grouping column."""
+
+
+def _sum_type(dtype):
+    """Get the type of the sum of values of the given `dtype`."""
+
+    return numpy.sum(numpy.zeros(1, dtype)).dtype
+
+
+def _group_starts(keys):
+    """Get the positions where every group of the sorted `keys` starts.
+
+    NaN keys are considered equal, so they are gathered in one group.
+
+    """
+
+    if len(keys) == 0:
+        return numpy.empty(0, dtype=numpy.intp)
+    changes = keys[1:] != keys[:-1]
+    if keys.dtype.kind in 'fc':
+        nans = numpy.isnan(keys)
+        changes &= ~(nans[1:] & nans[:-1])
+    starts = numpy.flatnonzero(changes)
+    starts += 1
+    return numpy.concatenate(([0], starts))
+
+
+class Aggregator(object):
+    """Streaming group-by aggregation of table rows.
+
+    Rows are fed in batches.  Batches in any order are grouped by looking
+    up the values of the `by` column in a hash table of the groups seen
+    so far, and their aggregated columns are accumulated into the running
+    count, sum, minimum or maximum of every group.  Batches following the
+    order of the `by` column are reduced to sorted *partials* instead,
+    which are merged with the same reductions.  Either way, memory usage
+    depends on the number of groups, not on the number of rows.
+
+    Parameters
+    ----------
+    table : Table
+        The table whose rows are aggregated.
+    by : str
+        The name of the column with the grouping values.
+    aggs : dict
+        A mapping from column names to an aggregation operation (see
+        :meth:`Table.aggregate`) or a sequence of them.
+
+    """
+
+    def __init__(self, table, by, aggs):
+        coldtypes = table.coldtypes
+        if by not in coldtypes:
+            raise KeyError("table ``%s`` has no column named ``%s``"
+                           % (table._v_pathname, by))
+        bydtype = coldtypes[by]
+        if bydtype.shape != ():
+            raise ValueError("grouping column ``%s`` must have scalar "
+                             "values" % by)
+        self.by = by
+        """The name of the column with the grouping values."""
+
+        fields = [(by, bydtype)]
+        accs = []
+        acctypes = {}
+        specs = []
+        for colname, ops in sorted(aggs.items()):
+            if colname not in coldtypes:
+                raise KeyError("table ``%s`` has no column named ``%s``"
+                               % (table._v_pathname, colname))
+            coldtype = coldtypes[colname]
+            single = isinstance(ops, six.string_types)
+            if single:
+                ops = [ops]
+            for op in ops:
+                if op not in _OPS:
+                    raise ValueError("unknown aggregation ``%s``; it must "
+                                     "be one of %s" % (op, list(_OPS)))
+                if op != 'count' and coldtype.base.kind not in _NUMERIC_KINDS:
+                    raise TypeError("column ``%s`` of type ``%s`` does not "
+                                    "support the ``%s`` aggregation"
+                                    % (colname, coldtype.base, op))
+                if single and colname != by:
+                    name = colname
+                else:
+                    name = '%s_%s' % (colname, op)
+                if op == 'count':
+                    fields.append((name, numpy.int64))
+                elif op == 'mean':
+                    fields.append((name, numpy.float64, coldtype.shape))
+                elif op == 'sum':
+                    fields.append((name, _sum_type(coldtype.base),
+                                   coldtype.shape))
+                else:
+                    fields.append((name, coldtype.base, coldtype.shape))
+                acc = (colname, 'sum' if op == 'mean' else op)
+                if op != 'count' and acc not in accs:
+                    accs.append(acc)
+                    if acc[1] == 'sum':
+                        acctypes[acc] = numpy.dtype(
+                            (_sum_type(coldtype.base), coldtype.shape))
+                    else:
+                        acctypes[acc] = coldtype
+                specs.append((name, acc, op))
+        self.dtype = numpy.dtype(fields)
+        """The type of the result, with one field per aggregation."""
+        self._accs = accs
+        """The ``(column, operation)`` running accumulators."""
+        self._acctypes = acctypes
+        """The type of the values of every accumulator."""
+        self._specs = specs
+        """The ``(field, accumulator, operation)`` of every aggregation."""
+        self._groups = collections.defaultdict(
+            functools.partial(next, itertools.count()))
+        """The number of every group given to :meth:`Aggregator.add`,
+        keyed by the value of the grouping column (new values get the
+        next number)."""
+        self._keys = None
+        """The value of the grouping column of every group in the hash
+        table (with room for more groups)."""
+        self._counts = None
+        """The number of rows of every group in the hash table."""
+        self._values = {}
+        """The running values of every accumulator for the groups in the
+        hash table."""
+        self._parts = []
+        """The partial of the last group (only used when rows come
+        sorted)."""
+        self._done = []
+        """Finished partials (only used when rows come sorted)."""
+
+    @property
+    def columns(self):
+        """The names of the columns needed for the aggregations."""
+
+        return set([self.by] + [colname for colname, op in self._accs])
+
+    def _reduce(self, keys, values, counts, presorted=False):
+        """Group `keys` and reduce `values` and `counts` accordingly.
+
+        `values` maps accumulators to arrays aligned with `keys`, and
+        `counts` is the number of rows behind every key (``None`` means
+        one row each).  A partial ``(keys, values, counts)`` with sorted,
+        distinct keys is returned.
+
+        """
+
+        if not presorted:
+            order = numpy.argsort(keys, kind='mergesort')
+            keys = keys[order]
+            values = dict((acc, value[order])
+                          for acc, value in values.items())
+            if counts is not None:
+                counts = counts[order]
+        starts = _group_starts(keys)
+        if counts is None:
+            counts = numpy.diff(numpy.append(starts, len(keys)))
+        else:
+            counts = numpy.add.reduceat(counts, starts)
+        values = dict((acc, _REDUCERS[acc[1]].reduceat(value, starts))
+                      for acc, value in values.items())
+        return keys[starts], values, counts
+
+    def _partial(self, rows):
+        """Reduce a batch of `rows` to a partial."""
+
+        values = {}
+        for acc in self._accs:
+            colname, op = acc
+            value = get_nested_field(rows, colname)
+            if op == 'sum':
+                value = value.astype(_sum_type(value.dtype), copy=False)
+            values[acc] = value
+        return self._reduce(get_nested_field(rows, self.by), values, None)
+
+    def _merge(self, parts):
+        """Merge several partials with keys in ascending order (from one
+        partial to the next) into a single one."""
+
+        keys = numpy.concatenate([part[0] for part in parts])
+        values = dict((acc, numpy.concatenate([part[1][acc]
+                                               for part in parts]))
+                      for acc in self._accs)
+        counts = numpy.concatenate([part[2] for part in parts])
+        return self._reduce(keys, values, counts, presorted=True)
+
+    def _grow(self, ngroups):
+        """Make room for `ngroups` groups in the hash table accumulators."""
+
+        if self._counts is None:
+            size = 0
+        else:
+            size = len(self._counts)
+            if ngroups <= size:
+                return
+        # Double the size so that arrays are not copied at every new group
+        newsize = max(ngroups, 2 * size, 16)
+        keys = numpy.empty(newsize, dtype=self.dtype[self.by])
+        counts = numpy.zeros(newsize, dtype=numpy.int64)
+        if size > 0:
+            keys[:size] = self._keys
+            counts[:size] = self._counts
+        self._keys, self._counts = keys, counts
+        for acc in self._accs:
+            values = numpy.zeros(newsize, dtype=self._acctypes[acc])
+            if size > 0:
+                values[:size] = self._values[acc]
+            self._values[acc] = values
+
+    def add(self, rows):
+        """Aggregate a batch of `rows` in any order.
+
+        The group of every row is looked up in the hash table, and the
+        aggregated values of the batch are accumulated in place into the
+        running values of their groups.
+
+        """
+
+        nrows = len(rows)
+        if nrows == 0:
+            return
+        keys = get_nested_field(rows, self.by)
+        hashkeys = keys.tolist()
+        if keys.dtype.kind in 'fc':
+            # NaN values are not equal, but they are gathered in one group
+            for i in numpy.flatnonzero(numpy.isnan(keys)):
+                hashkeys[i] = _NAN
+        groups = self._groups
+        ngroups = len(groups)
+        gids = numpy.fromiter(map(groups.__getitem__, hashkeys),
+                              dtype=numpy.intp, count=nrows)
+        self._grow(len(groups))
+        new = gids >= ngroups
+        newgids = gids[new]
+        self._keys[newgids] = keys[new]
+        self._counts += numpy.bincount(gids, minlength=len(self._counts))
+        for acc in self._accs:
+            colname, op = acc
+            value = get_nested_field(rows, colname)
+            total = self._values[acc]
+            if (op == 'sum' and value.dtype.kind == 'f' and value.ndim == 1
+                    and value.dtype.itemsize <= 8):
+                # Much faster than ``ufunc.at()``, and as precise for doubles
+                total += numpy.bincount(gids, value, len(total))
+                continue
+            if op != 'sum':
+                # Start new groups with any of their values
+                total[newgids] = value[new]
+            _REDUCERS[op].at(total, gids, value)
+
+    def add_sorted(self, rows, keys=None):
+        """Aggregate a batch of `rows` coming after the previous ones in
+        the order of the grouping column.
+
+        Rows in the batch may be in any order, but their keys must not be
+        less than the keys in previous batches.  Thus only the last group
+        may continue in the next batch, and the rest of groups are final.
+        If no aggregated column is needed, the (sorted) `keys` can be
+        given instead of `rows`.
+
+        """
+
+        if keys is not None:
+            part = self._reduce(keys, {}, None, presorted=True)
+        elif len(rows) > 0:
+            part = self._partial(rows)
+        else:
+            return
+        if len(part[0]) == 0:
+            return
+        if self._parts:
+            part = self._merge([self._parts[0], part])
+        keys, values, counts = part
+        # Everything but the last group is final
+        self._done.append((keys[:-1], dict((acc, value[:-1]) for acc, value
+                                           in values.items()), counts[:-1]))
+        self._parts = [(keys[-1:], dict((acc, value[-1:]) for acc, value
+                                        in values.items()), counts[-1:])]
+
+    def result(self):
+        """Get the aggregated groups in a new structured array.
+
+        Groups are sorted by the value of the grouping column.
+
+        """
+
+        if self._groups:
+            ngroups = len(self._groups)
+            order = numpy.argsort(self._keys[:ngroups], kind='mergesort')
+            keys = self._keys[order]
+            values = dict((acc, value[order])
+                          for acc, value in self._values.items())
+            counts = self._counts[order]
+        elif self._parts:
+            # Sorted partials do not share groups, just join them
+            parts = self._done + self._parts
+            keys = numpy.concatenate([part[0] for part in parts])
+            values = dict((acc, numpy.concatenate([part[1][acc]
+                                                   for part in parts]))
+                          for acc in self._accs)
+            counts = numpy.concatenate([part[2] for part in parts])
+        else:
+            return numpy.empty(0, dtype=self.dtype)
+        result = numpy.empty(len(keys), dtype=self.dtype)
+        result[self.by] = keys
+        for name, acc, op in self._specs:
+            if op == 'count':
+                result[name] = counts
+            elif op == 'mean':
+                value = values[acc]
+                shape = (len(counts),) + (1,) * (value.ndim - 1)
+                result[name] = value / counts.reshape(shape)
+            else:
+                result[name] = values[acc]
+        return result
+
+    def scan(self, engine, condition=None):
+        """Aggregate the rows read by a :class:`ReadEngine`.
+
+        If given, `condition` is a ``(function, args, kwargs)`` tuple like
+        ``Table._where_condition`` and only rows fulfilling it are taken.
+
+        """
+
+        start, step = engine.start, engine.step
+        for bstart, nrecords, buf, valid in engine.iterbuffers(condition):
+            first = (start - bstart) % step
+            rows = buf[first:nrecords:step]
+            if valid is not None:
+                rows = rows[valid[first::step]]
+            self.add(rows)
+
+    def scan_sorted(self, index, start, stop, step, condition=None):
+        """Aggregate the rows in the given range following the order of
+        `index`, which must be a complete sorted index of the grouping
+        column.
+
+        The index is read one I/O buffer at a time and only the rows
+        pointed to by the buffer are read, so memory usage only depends
+        on the number of groups.  The `condition` argument has the same
+        meaning as in :meth:`Aggregator.scan`.
+
+        """
+
+        table = index.table
+        needrows = condition is not None or bool(self._accs)
+        bydtype = self.dtype[self.by]
+        nelements, nrowsinbuf = index.nelements, table.nrowsinbuf
+        whole = (start == 0 and stop >= table.nrows and step == 1)
+        for istart in range(0, nelements, nrowsinbuf):
+            istop = min(istart + nrowsinbuf, nelements)
+            coords = index.read_indices(istart, istop).astype(numpy.int64)
+            inrange = None
+            if not whole:
+                inrange = (coords >= start) & (coords < stop)
+                if step > 1:
+                    inrange &= (coords - start) % step == 0
+            if not needrows:
+                keys = index.read_sorted(istart, istop).astype(bydtype)
+                if inrange is not None:
+                    keys = keys[inrange]
+                self.add_sorted(None, keys)
+                continue
+            if inrange is not None:
+                coords = coords[inrange]
+            # Rows are read faster in storage order
+            coords.sort()
+            rows = table._read_coordinates(coords)
+            if condition is not None:
+                condfunc, condargs, condkwargs = condition
+                rows = rows[call_on_recarr(condfunc, condargs, rows,
+                                           **condkwargs)]
+            self.add_sorted(rows)
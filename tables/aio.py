@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  PyTables Developers
+#
+# $Id$
+#
+########################################################################
+
+"""Asynchronous (asyncio) access to PyTables files.
+
+This module offers awaitable counterparts of the most common reading
+operations, so that they can be used from asyncio code without blocking
+the event loop::
+
+    import tables.aio
+
+    async def get_hot_rows():
+        async with await tables.aio.open_file('data.h5') as afile:
+            table = await afile.get_node('/detector/readout')
+            rows = await table.read_where('energy > 100')
+            async for batch in table.iterrows(batch_size=10000):
+                process(batch)
+
+Every operation is run in a single worker thread owned by the opened
+file, so operations on a given file are serialized in the same order
+they were requested.  Since the HDF5 library cannot be called
+concurrently, operations on different files are serialized too, by
+means of a module-wide lock.
+
+Groups and other non-leaf nodes are returned as is, and they should only
+be used for accessing metadata from the event loop.
+
+This module requires Python 3.
+
+Classes:
+
+`AsyncFile`
+    Asynchronous wrapper of an open PyTables file.
+`AsyncLeaf`
+    Asynchronous wrapper of a leaf.
+`AsyncTable`
+    Asynchronous wrapper of a table.
+
+Functions:
+
+`open_file`
+    Open a PyTables file asynchronously.
+
+"""
+from __future__ import absolute_import
+
+import sys
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import file as _file
+from .leaf import Leaf
+from .table import Table
+
+
+_hdf5_lock = threading.RLock()
+"""Lock serializing the calls to the HDF5 library from this module."""
+
+
+def _locked(func, *args, **kwargs):
+    with _hdf5_lock:
+        return func(*args, **kwargs)
+
+
+def _submit(executor, func, *args, **kwargs):
+    """Run `func` in `executor` and return an asyncio future."""
+
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(
+        executor, functools.partial(_locked, func, *args, **kwargs))
+
+
+def _user_condvars(table, condition, condvars, depth):
+    """Get the variables in `condition` from the caller namespace.
+
+    Conditions are evaluated in a worker thread, so the user variables
+    must be looked up here, in the thread of the caller.  As in
+    ``Table.where()``, columns take precedence over user variables.
+
+    """
+
+    if condvars is not None:
+        return condvars
+    user_frame = sys._getframe(depth)
+    user_locals, user_globals = user_frame.f_locals, user_frame.f_globals
+    colinstances = table.colinstances
+    condvars = {}
+    for var in compile(condition, '<string>', 'eval').co_names:
+        if var in colinstances:
+            condvars[var] = colinstances[var]
+        elif var in user_locals:
+            condvars[var] = user_locals[var]
+        elif var in user_globals:
+            condvars[var] = user_globals[var]
+    return condvars
+
+
+def open_file(filename, mode="r", title="", root_uep="/", filters=None,
+              **kwargs):
+    """Open a PyTables file asynchronously.
+
+    This accepts the same arguments as :func:`tables.open_file`, and it
+    returns an awaitable resolving to an :class:`AsyncFile` instance.
+
+    """
+
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def _open():
+        try:
+            h5file = _file.open_file(filename, mode, title, root_uep,
+                                     filters, **kwargs)
+        except BaseException:
+            # No file will own the worker thread
+            executor.shutdown(wait=False)
+            raise
+        return AsyncFile(h5file, executor)
+
+    return _submit(executor, _open)
+
+
+class AsyncFile(object):
+    """Asynchronous wrapper of an open PyTables file.
+
+    Instances of this class are returned by :func:`tables.aio.open_file`,
+    and they can be used as asynchronous context managers, closing the
+    file on exit.
+
+    Parameters
+    ----------
+    h5file : File
+        The wrapped file.
+    executor : concurrent.futures.Executor
+        The executor with a single worker where file operations are run.
+
+    """
+
+    def __init__(self, h5file, executor):
+        self.file = h5file
+        """The wrapped :class:`tables.File` instance."""
+        self._executor = executor
+
+    def _submit(self, func, *args, **kwargs):
+        return _submit(self._executor, func, *args, **kwargs)
+
+    def _wrap(self, node):
+        if isinstance(node, Table):
+            return AsyncTable(self, node)
+        elif isinstance(node, Leaf):
+            return AsyncLeaf(self, node)
+        return node
+
+    def get_node(self, where, name=None, classname=None):
+        """Get the node under where with the given name.
+
+        This works like :meth:`File.get_node`, but leaves are returned
+        wrapped into :class:`AsyncLeaf` or :class:`AsyncTable` instances.
+
+        """
+
+        def _get_node():
+            node = self.file.get_node(where, name, classname)
+            return self._wrap(node)
+        return self._submit(_get_node)
+
+    def flush(self):
+        """Flush all the alive leaves in the object tree."""
+
+        return self._submit(self.file.flush)
+
+    def close(self):
+        """Flush and close the file.
+
+        The worker thread of the file is released afterwards.
+
+        """
+
+        future = self._submit(self.file.close)
+        future.add_done_callback(
+            lambda future: self._executor.shutdown(wait=False))
+        return future
+
+    def __aenter__(self):
+        future = asyncio.get_event_loop().create_future()
+        future.set_result(self)
+        return future
+
+    def __aexit__(self, *exc_info):
+        return self.close()
+
+    def __repr__(self):
+        return "<%s for %r>" % (self.__class__.__name__, self.file)
+
+
+class AsyncLeaf(object):
+    """Asynchronous wrapper of a leaf.
+
+    Reading methods return awaitables.  Slicing works like in the leaf,
+    but the result must be awaited::
+
+        data = await aleaf[10:20]
+
+    The metadata of the leaf kept in memory (like `shape`, `dtype` or
+    `nrows`) is also available, but not the rest of its attributes and
+    methods, since they may call the HDF5 library from the event loop.
+
+    """
+
+    _metadata = frozenset([
+        'name', 'shape', 'dtype', 'nrows', 'ndim', 'maindim', 'extdim',
+        'chunkshape', 'rowsize', 'atom', 'byteorder', 'nrowsinbuf'])
+    """The attributes taken from the wrapped leaf."""
+
+    def __init__(self, afile, leaf):
+        self.afile = afile
+        """The :class:`AsyncFile` where the leaf lives."""
+        self.leaf = leaf
+        """The wrapped leaf."""
+
+    def __getattr__(self, name):
+        if name not in self._metadata:
+            raise AttributeError("%r object has no attribute %r"
+                                 % (self.__class__.__name__, name))
+        return getattr(self.leaf, name)
+
+    def __getitem__(self, key):
+        return self.afile._submit(self.leaf.__getitem__, key)
+
+    def __len__(self):
+        return len(self.leaf)
+
+    def read(self, *args, **kwargs):
+        """Read data from the leaf, see the `read()` method of the leaf."""
+
+        return self.afile._submit(self.leaf.read, *args, **kwargs)
+
+    def __repr__(self):
+        return "<%s for %r>" % (self.__class__.__name__, self.leaf)
+
+
+class AsyncTable(AsyncLeaf):
+    """Asynchronous wrapper of a table.
+
+    Besides the methods of :class:`AsyncLeaf`, this offers awaitable
+    queries, and asynchronous iterators yielding batches of rows.  The
+    description of the columns of the table is also available.
+
+    """
+
+    _metadata = AsyncLeaf._metadata | frozenset([
+        'description', 'colnames', 'colpathnames', 'coldescrs',
+        'coltypes', 'coldtypes', 'colindexed', 'indexed'])
+
+    def read_where(self, condition, condvars=None, field=None,
+                   start=None, stop=None, step=None):
+        """Read table data fulfilling the given condition.
+
+        See :meth:`Table.read_where`.
+
+        """
+
+        condvars = _user_condvars(self.leaf, condition, condvars, depth=2)
+        return self.afile._submit(self.leaf.read_where, condition, condvars,
+                                  field, start, stop, step)
+
+    def get_where_list(self, condition, condvars=None, sort=False,
+                       start=None, stop=None, step=None):
+        """Get the row coordinates fulfilling the given condition.
+
+        See :meth:`Table.get_where_list`.
+
+        """
+
+        condvars = _user_condvars(self.leaf, condition, condvars, depth=2)
+        return self.afile._submit(self.leaf.get_where_list, condition,
+                                  condvars, sort, start, stop, step)
+
+    def read_coordinates(self, coords, field=None):
+        """Get a set of rows given their indexes, see
+        :meth:`Table.read_coordinates`."""
+
+        return self.afile._submit(self.leaf.read_coordinates, coords, field)
+
+    def iterrows(self, start=None, stop=None, step=None, batch_size=None):
+        """Iterate asynchronously over the table rows in batches.
+
+        This returns an asynchronous iterator yielding structured arrays
+        with up to `batch_size` successive rows in the given range
+        (``Table.nrowsinbuf`` by default)::
+
+            async for batch in atable.iterrows(step=2):
+                ...
+
+        """
+
+        return _BatchIterator(self, None, None, start, stop, step,
+                              batch_size)
+
+    def where(self, condition, condvars=None, start=None, stop=None,
+              step=None, batch_size=None):
+        """Iterate asynchronously over the rows fulfilling the condition.
+
+        This returns an asynchronous iterator yielding structured arrays
+        with the rows fulfilling `condition`.  Every batch holds the
+        matches among (up to) `batch_size` successive rows of the range,
+        ``Table.nrowsinbuf`` by default, and batches with no matches are
+        skipped.  The other arguments have the same meaning as in
+        :meth:`Table.where`.
+
+        """
+
+        condvars = _user_condvars(self.leaf, condition, condvars, depth=2)
+        return _BatchIterator(self, condition, condvars, start, stop, step,
+                              batch_size)
+
+
+class _BatchIterator(object):
+    """Asynchronous iterator over batches of table rows."""
+
+    def __init__(self, atable, condition, condvars, start, stop, step,
+                 batch_size):
+        table = atable.leaf
+        self.atable = atable
+        self.condition = condition
+        self.condvars = condvars
+        self.start, self.stop, self.step = table._process_range_read(
+            start, stop, step)
+        if batch_size is None:
+            batch_size = table.nrowsinbuf
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        self.batch_size = batch_size
+
+    def _next_batch(self):
+        table = self.atable.leaf
+        start, stop, step = self.start, self.stop, self.step
+        nrows = self.batch_size * step
+        while start < stop:
+            bstop = min(start + nrows, stop)
+            if self.condition is None:
+                batch = table.read(start, bstop, step)
+            else:
+                batch = table.read_where(self.condition, self.condvars,
+                                         None, start, bstop, step)
+            # The next batch starts at the first selected row after bstop
+            start += len(range(start, bstop, step)) * step
+            self.start = start
+            if len(batch) > 0:
+                return batch
+        raise StopAsyncIteration
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return self.atable.afile._submit(self._next_batch)
+
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## fill-column: 72
+## End:
@@ -904,6 +904,62 @@ class Array(hdf5extension.Array, Leaf, six.Iterator):
         arr = self._read(start, stop, step, out)
         return internal_to_flavor(arr, self.flavor)
 
+    def as_memmap(self):
+        """Get a read-only memory map of the array data in the file.
+
+        A numpy.memmap object is returned which maps the data of the
+        array straight from the file, so that no data is read (nor
+        copied) until it is actually accessed, and only the touched
+        pages are read.  This is specially convenient for accessing
+        small, random parts of large arrays.
+
+        Only arrays which data is stored contiguously in the file (i.e.
+        not chunked, compressed nor compact), of a non-time type, and in
+        files opened with a driver that keeps them as a single regular
+        file (the default H5FD_SEC2 one, H5FD_STDIO, H5FD_DIRECT or
+        H5FD_WINDOWS) can be mapped; otherwise a ValueError is raised.
+
+        The map uses the byteorder of the data on disk and it does not
+        honor the flavor of the array.  Empty arrays get a regular empty
+        NumPy array.  It stays usable after the array
+        or the file are closed, but its contents are undefined if the
+        array is modified or removed afterwards.
+
+        .. versionadded:: 3.5
+
+        """
+
+        self._g_check_open()
+        h5file = self._v_file
+        driver = h5file.params['DRIVER']
+        if driver not in (None, "H5FD_SEC2", "H5FD_STDIO", "H5FD_DIRECT",
+                          "H5FD_WINDOWS"):
+            raise ValueError("arrays in files opened with the ``%s`` "
+                             "driver can not be memory mapped" % driver)
+        if self.atom.kind == 'time':
+            raise ValueError("arrays of time type can not be memory mapped")
+
+        dtype = self.atom.dtype.base
+        if self.byteorder in ('little', 'big'):
+            dtype = dtype.newbyteorder(
+                {'little': '<', 'big': '>'}[self.byteorder])
+        if 0 in self.shape:
+            # There is nothing to map
+            return numpy.empty(self.shape, dtype=dtype)
+
+        offset = None
+        if self.chunkshape is None:
+            offset = self._get_storage_offset()
+        if offset is None:
+            raise ValueError("the data of array ``%s`` is not stored "
+                             "contiguously in the file" % self._v_pathname)
+
+        if h5file.mode != 'r':
+            # Make sure that the data is in the file
+            h5file.flush()
+        return numpy.memmap(h5file.filename, dtype=dtype, mode='r',
+                            offset=offset, shape=self.shape)
+
     def _g_copy_with_stats(self, group, name, start, stop, step,
                            title, filters, chunkshape, _log, **kwargs):
         """Private part of Leaf.copy() for each kind of leaf."""
@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  PyTables Developers
+#
+# $Id$
+#
+########################################################################
+
+"""Here are defined the indexes working at the level of table chunks.
+
+Classes:
+
+`ChunkIndex`
+    Base class for indexes keeping information about every table chunk.
+`BitmapIndex`
+    Bitmap index of a low-cardinality column in a table.
+`ZoneMap`
+    Per-chunk minimum and maximum values of a column in a table.
+
+"""
+from __future__ import absolute_import
+
+import sys
+import math
+import operator
+
+import numpy
+import six
+
+from .node import NotLoggedMixin
+from .group import Group
+from .earray import EArray
+from .atom import Atom, Int64Atom, UInt32Atom
+from .index import Index
+from .idxutils import lookup_values
+
+
+_cmpfuncs = {
+    'lt': operator.lt,
+    'le': operator.le,
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'ge': operator.ge,
+    'gt': operator.gt,
+    'in': numpy.in1d,
+}
+"""The comparison functions for every operation in index expressions."""
+
+
+@six.python_2_unicode_compatible
+class ChunkIndex(NotLoggedMixin, Group):
+    """Base class for indexes keeping information about every table chunk.
+
+    Instead of sorting the column values, chunk indexes keep a summary of
+    the values in every chunk of the table.  Searches compute a map of
+    the chunks that may hold rows fulfilling a condition (a *chunkmap*),
+    and only those chunks are read and checked by the in-kernel query
+    machinery afterwards.
+
+    Subclasses must set the `kind` attribute and implement the
+    `_g_create_datasets()`, `_g_open_datasets()`, `add_rows()` and
+    `_search_chunks()` methods.
+
+    The parameters are the same as in :class:`Index`, although `tmp_dir`
+    and `blocksizes` are not used.
+
+    """
+
+    reduction = 1
+    """Chunk indexes are never reduced."""
+
+    is_csi = False
+    """Chunk indexes are never completely sorted."""
+
+    ndelta = 0
+    """Chunk indexes index every row right away, without delta runs."""
+
+    _info_attr = 'nelements'
+    """The attribute shown in the compact representation of the index."""
+
+    # These behave the same as in sorted indexes
+    filters = Index.filters
+    dirty = Index.dirty
+    column = Index.column
+    table = Index.table
+
+    def __init__(self, parentnode, name,
+                 atom=None, title="",
+                 kind=None,
+                 optlevel=None,
+                 filters=None,
+                 tmp_dir=None,
+                 expectedrows=0,
+                 byteorder=None,
+                 blocksizes=None,
+                 new=True):
+
+        self.optlevel = optlevel
+        """The optimization level for this index (not used)."""
+        self.expectedrows = expectedrows
+        """The expected number of rows in the table."""
+        if byteorder in ["little", "big"]:
+            self.byteorder = byteorder
+        else:
+            self.byteorder = sys.byteorder
+        """The byteorder of the index datasets."""
+        if atom is not None:
+            self.dtype = atom.dtype.base
+            """The datatype of the indexed values."""
+        self.nelements = None
+        """The number of currently indexed rows for this column."""
+        self.nrowsinchunk = None
+        """The number of rows in every table chunk."""
+        self._chunkmap = None
+        """The chunkmap computed by the last search."""
+
+        super(ChunkIndex, self).__init__(parentnode, name, title, new,
+                                         filters)
+
+    def _g_post_init_hook(self):
+        super(ChunkIndex, self)._g_post_init_hook()
+        attrs = self._v_attrs
+        if not self._v_new:
+            self.optlevel = int(attrs.optlevel)
+            self.nelements = int(attrs.nelements)
+            self.nrowsinchunk = int(attrs.nrowsinchunk)
+            self._g_open_datasets()
+            return
+
+        self.nelements = 0
+        self.nrowsinchunk = self.table.chunkshape[0]
+        attrs.optlevel = self.optlevel
+        attrs.nelements = self.nelements
+        attrs.nrowsinchunk = self.nrowsinchunk
+        self._g_create_datasets()
+
+    def _g_set_nelements(self, nelements):
+        self.nelements = nelements
+        self._v_attrs.nelements = nelements
+
+    def optimize(self, verbose=False):
+        """Chunk indexes need no optimization, so this does nothing."""
+
+        pass
+
+    def get_lookup_range(self, ops, limits):
+        """Get the ``(op, limit)`` comparisons to be searched for."""
+
+        assert len(ops) in [1, 2]
+        assert len(ops) == len(limits)
+        if ops == ('in',):
+            # The limit is a sequence of values
+            limits = (lookup_values(limits[0], self.column.dtype),)
+        return tuple(zip(ops, limits))
+
+    def search(self, item):
+        """Compute the chunks holding values that fulfill `item`.
+
+        `item` is a sequence of ``(op, limit)`` comparisons, as returned
+        by :meth:`ChunkIndex.get_lookup_range`.  This returns the number
+        of chunks that may hold some row fulfilling all the comparisons,
+        and the chunkmap itself can then be obtained with
+        :meth:`ChunkIndex.get_chunkmap`.
+
+        """
+
+        nchunks = int(math.ceil(float(self.nelements) / self.nrowsinchunk))
+        chunkmap = self._search_chunks(item, nchunks)
+        self._chunkmap = chunkmap
+        return int(numpy.count_nonzero(chunkmap))
+
+    def get_chunkmap(self):
+        """Get the map of chunks computed by the last search."""
+
+        return self._chunkmap
+
+    def _f_remove(self, recursive=False):
+        """Remove this index."""
+
+        # Index removal is always recursive,
+        # no matter what `recursive` says.
+        super(ChunkIndex, self)._f_remove(True)
+
+    def __str__(self):
+        """This provides a more compact representation than __repr__"""
+
+        filters = ""
+        if self.filters.complevel:
+            if self.filters.shuffle:
+                filters += ", shuffle"
+            if self.filters.bitshuffle:
+                filters += ", bitshuffle"
+            filters += ", %s(%s)" % (self.filters.complib,
+                                     self.filters.complevel)
+        return "%s(%s%s).%s=%s" % (
+            self.__class__.__name__, self.kind, filters, self._info_attr,
+            getattr(self, self._info_attr))
+
+    def __repr__(self):
+        """This provides more metainfo than standard __repr__"""
+
+        cpathname = self.table._v_pathname + ".cols." + self.column.pathname
+        info = ""
+        if self._info_attr != 'nelements':
+            info = "\n  %s := %s" % (self._info_attr,
+                                     getattr(self, self._info_attr))
+        return """%s (%s for column %s)
+  kind := %s
+  filters := %s%s
+  nelements := %s
+  nrowsinchunk := %s
+  dirty := %s
+  byteorder := %r""" % (self._v_pathname, self.__class__.__name__,
+                        cpathname, self.kind, self.filters, info,
+                        self.nelements, self.nrowsinchunk, self.dirty,
+                        self.byteorder)
+
+
+class BitmapIndex(ChunkIndex):
+    """Represents the bitmap index of a column in a table.
+
+    A bitmap index keeps the set of distinct values in the column and,
+    for every distinct value, which table chunks hold it (i.e. a
+    compressed bitmap of chunks per value).  Computing the chunks that
+    may fulfill a comparison is then a matter of evaluating the
+    comparison over the distinct values, with no searches at all.  This
+    makes them a good fit for low-cardinality columns (booleans,
+    enumerations, status codes or small integers) that are mainly
+    queried for equality (``==``, ``!=`` or several ``==`` comparisons
+    or'ed together), although any comparison is supported.
+
+    Bitmap indexes are created by calling :meth:`Column.create_index`
+    with ``kind='bitmap'``.  Only boolean, integer and string columns can
+    have them.
+
+    """
+
+    _c_classid = 'BITMAPINDEX'
+
+    kind = 'bitmap'
+    """The kind of this index."""
+
+    _info_attr = 'cardinality'
+
+    def __init__(self, parentnode, name, *args, **kwargs):
+        self._entries = None
+        """The distinct values, and the value codes and chunks of every
+        entry in the bitmaps (a cache of what is on disk)."""
+        self._codemap = None
+        """Map from distinct values to their codes."""
+
+        super(BitmapIndex, self).__init__(parentnode, name, *args, **kwargs)
+
+    def _g_create_datasets(self):
+        filters = self.filters
+        nchunks = self.expectedrows // self.nrowsinchunk or None
+        EArray(self, 'values', Atom.from_dtype(self.dtype), (0,),
+               "Distinct values", filters, byteorder=self.byteorder,
+               _log=False)
+        EArray(self, 'codes', UInt32Atom(), (0,),
+               "Value code of every bitmap entry", filters, nchunks,
+               byteorder=self.byteorder, _log=False)
+        EArray(self, 'chunks', Int64Atom(), (0,),
+               "Table chunk of every bitmap entry", filters, nchunks,
+               byteorder=self.byteorder, _log=False)
+
+    def _g_open_datasets(self):
+        self.dtype = self.values.atom.dtype
+
+    def _get_entries(self):
+        if self._entries is None:
+            self._entries = (self.values.read(), self.codes.read(),
+                             self.chunks.read())
+        return self._entries
+
+    def add_rows(self, stop):
+        """Add the table rows from `nelements` up to `stop` to the index.
+
+        Entries are only added (never removed), so rows in a chunk that
+        was partially indexed before are simply added to its bitmaps.
+
+        """
+
+        table = self.table
+        colname = self.column.pathname
+        nrowsinchunk = self.nrowsinchunk
+        if self._codemap is None:
+            values = self.values.read().tolist()
+            self._codemap = dict((value, code)
+                                 for code, value in enumerate(values))
+        codemap = self._codemap
+        blockrows = table.nrowsinbuf * 16
+        start = self.nelements
+        while start < stop:
+            bstop = min(start + blockrows, stop)
+            arr = table._read(start, bstop, 1, colname)
+            uniq, inverse = numpy.unique(arr, return_inverse=True)
+            uniq = uniq.tolist()
+            newvalues = [value for value in uniq if value not in codemap]
+            if newvalues:
+                for value in newvalues:
+                    codemap[value] = len(codemap)
+                self.values.append(numpy.array(newvalues, dtype=self.dtype))
+            ucodes = numpy.array([codemap[value] for value in uniq],
+                                 dtype='int64')
+            chunks = numpy.arange(start, bstop, dtype='int64') // nrowsinchunk
+            # Keep a single entry for every (chunk, value) pair
+            keys = numpy.unique((chunks << 32) | ucodes[inverse])
+            self.chunks.append(keys >> 32)
+            self.codes.append((keys & 0xffffffff).astype('uint32'))
+            start = bstop
+        self._g_set_nelements(max(self.nelements, stop))
+        self._entries = None
+
+    def _search_chunks(self, item, nchunks):
+        values, codes, chunks = self._get_entries()
+        valid = numpy.ones(len(values), dtype='bool')
+        for op, limit in item:
+            valid &= _cmpfuncs[op](values, limit)
+        chunkmap = numpy.zeros(shape=nchunks, dtype='bool')
+        chunkmap[chunks[valid[codes]]] = True
+        return chunkmap
+
+    @property
+    def cardinality(self):
+        """The number of distinct values in the indexed rows."""
+
+        return self.values.nrows
+
+
+def _chunk_ranges(arr):
+    """Get the minimum and maximum values in every row of `arr`.
+
+    NaN values are ignored, unless a whole row is made of them.
+
+    """
+
+    if arr.dtype.kind == 'S':
+        # There are no min/max ufuncs for strings
+        arr = numpy.sort(arr, axis=1)
+        return arr[:, 0], arr[:, -1]
+    return numpy.fmin.reduce(arr, axis=1), numpy.fmax.reduce(arr, axis=1)
+
+
+def _widen(mins, maxs, newmins, newmaxs):
+    """Widen the ranges in `mins` and `maxs` in place."""
+
+    if mins.dtype.kind == 'f':
+        # NaN bounds come from chunks with only NaN values
+        numpy.fmin(mins, newmins, out=mins)
+        numpy.fmax(maxs, newmaxs, out=maxs)
+    else:
+        numpy.copyto(mins, newmins, where=newmins < mins)
+        numpy.copyto(maxs, newmaxs, where=newmaxs > maxs)
+
+
+class ZoneMap(ChunkIndex):
+    """Represents the zone map of a column in a table.
+
+    A zone map keeps the minimum and maximum values of the column in
+    every table chunk.  Chunks whose range of values can not fulfill a
+    comparison are skipped by queries, so zone maps give most of the
+    benefit of an index for range queries on columns whose values are
+    clustered along the table (like the timestamps of rows appended in
+    time order), at almost no cost when appending rows.
+
+    Zone maps are created by calling :meth:`Column.create_index` with
+    ``kind='zonemap'``.  Boolean, integer, float and string columns can
+    have them.  NaN values never fulfill a comparison, so they are left
+    out of the chunk ranges.
+
+    Modifying rows widens the ranges of their chunks in place instead of
+    rebuilding the zone map, so ranges may become looser than needed
+    after many modifications.  Use :meth:`Column.reindex` to get them
+    tight again.
+
+    """
+
+    _c_classid = 'ZONEMAP'
+
+    kind = 'zonemap'
+    """The kind of this index."""
+
+    def __init__(self, parentnode, name, *args, **kwargs):
+        self._ranges = None
+        """The minimum and maximum values of every chunk (a cache of what
+        is on disk)."""
+
+        super(ZoneMap, self).__init__(parentnode, name, *args, **kwargs)
+
+    def _g_create_datasets(self):
+        atom = Atom.from_dtype(self.dtype)
+        nchunks = self.expectedrows // self.nrowsinchunk or None
+        EArray(self, 'mins', atom, (0,),
+               "Minimum value of every table chunk", self.filters, nchunks,
+               byteorder=self.byteorder, _log=False)
+        EArray(self, 'maxs', atom, (0,),
+               "Maximum value of every table chunk", self.filters, nchunks,
+               byteorder=self.byteorder, _log=False)
+
+    def _g_open_datasets(self):
+        self.dtype = self.mins.atom.dtype
+
+    def _get_ranges(self):
+        if self._ranges is None:
+            self._ranges = (self.mins.read(), self.maxs.read())
+        return self._ranges
+
+    def add_rows(self, stop):
+        """Add the table rows from `nelements` up to `stop` to the index.
+
+        The range of a chunk that was partially indexed before is
+        computed again from all of its rows.
+
+        """
+
+        table = self.table
+        colname = self.column.pathname
+        nrowsinchunk = self.nrowsinchunk
+        firstchunk = self.nelements // nrowsinchunk
+        if self.mins.nrows > firstchunk:
+            self.mins.truncate(firstchunk)
+            self.maxs.truncate(firstchunk)
+        blockrows = nrowsinchunk * max(
+            1, table.nrowsinbuf * 16 // nrowsinchunk)
+        start = firstchunk * nrowsinchunk
+        while start < stop:
+            bstop = min(start + blockrows, stop)
+            arr = table._read(start, bstop, 1, colname)
+            nfull = len(arr) // nrowsinchunk * nrowsinchunk
+            mins, maxs = _chunk_ranges(arr[:nfull].reshape(-1, nrowsinchunk))
+            if nfull < len(arr):
+                lmin, lmax = _chunk_ranges(arr[nfull:].reshape(1, -1))
+                mins = numpy.concatenate((mins, lmin))
+                maxs = numpy.concatenate((maxs, lmax))
+            self.mins.append(mins)
+            self.maxs.append(maxs)
+            start = bstop
+        self._g_set_nelements(max(self.nelements, stop))
+        self._ranges = None
+
+    def update_rows(self, coords, values):
+        """Widen the ranges of chunks with the modified rows in `coords`.
+
+        `values` are the new values of the column in those rows.
+
+        """
+
+        coords = numpy.asarray(coords, dtype='int64')
+        values = numpy.asarray(values, dtype=self.dtype)
+        chunks = coords // self.nrowsinchunk
+        # Rows in chunks without a range yet are added later on
+        keep = chunks < self.mins.nrows
+        if values.dtype.kind == 'f':
+            keep &= ~numpy.isnan(values)
+        chunks, values = chunks[keep], values[keep]
+        if len(chunks) == 0:
+            return
+        # Sort by chunk and value, so that ranges are at chunk boundaries
+        order = numpy.lexsort((values, chunks))
+        chunks, values = chunks[order], values[order]
+        bounds = numpy.flatnonzero(numpy.diff(chunks)) + 1
+        first = numpy.concatenate(([0], bounds))
+        last = numpy.concatenate((bounds, [len(chunks)])) - 1
+        chunks = chunks[first]
+        mins, maxs = self._get_ranges()
+        newmins, newmaxs = mins[chunks], maxs[chunks]
+        _widen(newmins, newmaxs, values[first], values[last])
+        for chunk, cmin, cmax in zip(chunks, newmins, newmaxs):
+            self.mins[chunk] = cmin
+            self.maxs[chunk] = cmax
+        self._ranges = None
+
+    def _search_chunks(self, item, nchunks):
+        mins, maxs = self._get_ranges()
+        chunkmap = numpy.ones(shape=nchunks, dtype='bool')
+        for op, limit in item:
+            if op in ('lt', 'le'):
+                chunkmap &= _cmpfuncs[op](mins, limit)
+            elif op in ('gt', 'ge'):
+                chunkmap &= _cmpfuncs[op](maxs, limit)
+            elif op == 'in':
+                # Some of the (sorted) values must fall in the range
+                chunkmap &= (numpy.searchsorted(limit, mins, 'left') <
+                             numpy.searchsorted(limit, maxs, 'right'))
+            elif op == 'eq':
+                chunkmap &= (mins <= limit) & (maxs >= limit)
+            else:
+                raise ValueError("zone maps can not search for %r" % op)
+        return chunkmap
+
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## fill-column: 72
+## End:
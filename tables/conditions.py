@@ -20,26 +20,36 @@ Classes:
 
 `CompileCondition`
     Container for a compiled condition.
+`InList`
+    A column tested for membership in a list of values.
 
 Functions:
 
 `compile_condition`
     Compile a condition and extract usable index conditions.
+`extract_in_lists`
+    Replace ``in_()`` calls in a condition with variables.
 `call_on_recarr`
     Evaluate a function over a structured array.
 
 """
 from __future__ import absolute_import
 
+import ast
 import re
+import tokenize
 from numexpr.necompiler import typecode_to_kind
 from numexpr.necompiler import expressionToAST, typeCompileAst
 from numexpr.necompiler import stringToExpression, NumExpr, getExprNames
 from numexpr.expressions import ExpressionNode
 
+import numpy
+
 from .utilsextension import get_nested_field
+from .idxutils import lookup_values
 from .utils import lazyattr
 
+import six
 from six.moves import zip
 
 _no_matching_opcode = re.compile(r"[^a-z]([a-z]+)_([a-z]+)[^a-z]")
@@ -68,8 +78,9 @@ def _check_indexable_cmp(getidxcmp):
 
     """
 
-    def newfunc(exprnode, indexedcols):
-        result = getidxcmp(exprnode, indexedcols)
+    def newfunc(exprnode, indexedcols, neqcols=frozenset(),
+                incols=frozenset()):
+        result = getidxcmp(exprnode, indexedcols, neqcols, incols)
         if result[0] is not None:
             try:
                 typeCompileAst(expressionToAST(exprnode))
@@ -83,14 +94,18 @@ def _check_indexable_cmp(getidxcmp):
 
 
 @_check_indexable_cmp
-def _get_indexable_cmp(exprnode, indexedcols):
+def _get_indexable_cmp(exprnode, indexedcols, neqcols=frozenset(),
+                       incols=frozenset()):
     """Get the indexable variable-constant comparison in `exprnode`.
 
     A tuple of (variable, operation, constant) is returned if
     `exprnode` is a variable-constant (or constant-variable)
     comparison, and the variable is in `indexedcols`.  A normal
     variable can also be used instead of a constant: a tuple with its
-    name will appear instead of its value.
+    name will appear instead of its value.  ``!=`` comparisons are only
+    indexable for variables in `neqcols`.  Variables in `incols` stand
+    for ``in_()`` calls, and they yield an ``in`` operation whose
+    constant is a tuple with the variable itself.
 
     Otherwise, the values in the tuple are ``None``.
     """
@@ -99,11 +114,14 @@ def _get_indexable_cmp(exprnode, indexedcols):
     turncmp = {'lt': 'gt',
                'le': 'ge',
                'eq': 'eq',
+               'ne': 'ne',
                'ge': 'le',
                'gt': 'lt', }
 
     def get_cmp(var, const, op):
         var_value, const_value = var.value, const.value
+        if op == 'ne' and var_value not in neqcols:
+            return None
         if (var.astType == 'variable' and var_value in indexedcols
            and const.astType in ['constant', 'variable']):
             if const.astType == 'variable':
@@ -114,8 +132,13 @@ def _get_indexable_cmp(exprnode, indexedcols):
     def is_indexed_boolean(node):
         return (node.astType == 'variable'
                 and node.astKind == 'bool'
-                and node.value in indexedcols)
+                and node.value in indexedcols
+                and node.value not in incols)
 
+    # In-lists of indexed columns are indexable by themselves.
+    if (exprnode.astType == 'variable' and exprnode.value in incols
+            and exprnode.value in indexedcols):
+        return (exprnode.value, 'in', ((exprnode.value,),))
     # Boolean variables are indexable by themselves.
     if is_indexed_boolean(exprnode):
         return (exprnode.value, 'eq', True)
@@ -168,7 +191,8 @@ def _equiv_expr_node(x, y):
     return True
 
 
-def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
+def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr,
+                          neqcols=frozenset(), incols=frozenset()):
     """Here lives the actual implementation of the get_idx_expr() wrapper.
 
     'idxexprs' is a list of expressions in the form ``(var, (ops),
@@ -190,6 +214,7 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
     negcmp = {
         'lt': 'ge',
         'le': 'gt',
+        'ne': 'eq',
         'ge': 'lt',
         'gt': 'le',
     }
@@ -201,20 +226,25 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
             invert ^= True
             # The information about the negated node is in first position
             exprnode = idxcmp[0]
-            idxcmp = _get_indexable_cmp(exprnode, indexedcols)
+            idxcmp = _get_indexable_cmp(exprnode, indexedcols, neqcols,
+                                        incols)
         return idxcmp, exprnode, invert
 
     # Indexable variable-constant comparison.
-    idxcmp = _get_indexable_cmp(exprnode, indexedcols)
+    idxcmp = _get_indexable_cmp(exprnode, indexedcols, neqcols, incols)
     idxcmp, exprnode, invert = fix_invert(idxcmp, exprnode, indexedcols)
     if idxcmp[0]:
         if invert:
             var, op, value = idxcmp
-            if op == 'eq' and value in [True, False]:
+            if op == 'eq' and isinstance(value, bool):
                 # ``var`` must be a boolean index.  Flip its value.
                 value ^= True
-            else:
+            elif op == 'eq' and var in neqcols:
+                op = 'ne'
+            elif op in negcmp:
                 op = negcmp[op]
+            else:
+                return not_indexable
             expr = (var, (op,), (value,))
             invert = False
         else:
@@ -232,11 +262,20 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
     if exprnode.astType != 'op' or exprnode.value not in ['and', 'or']:
         return not_indexable
 
+    # Use disjunctions of equalities like ``(x == a) | (x == b) | ...``
+    # as a single lookup of the ``(a, b, ...)`` values.
+    if exprnode.value == 'or':
+        expr = _get_or_equalities(exprnode, indexedcols, neqcols, incols)
+        if expr is not None:
+            return [expr]
+
     left, right = exprnode.children
     # Get the expression at left
-    lcolvar, lop, llim = _get_indexable_cmp(left, indexedcols)
+    lcolvar, lop, llim = _get_indexable_cmp(left, indexedcols, neqcols,
+                                            incols)
     # Get the expression at right
-    rcolvar, rop, rlim = _get_indexable_cmp(right, indexedcols)
+    rcolvar, rop, rlim = _get_indexable_cmp(right, indexedcols, neqcols,
+                                            incols)
 
     # Use conjunction of indexable VC comparisons like
     # ``(a <[=] x) & (x <[=] b)`` or ``(a >[=] x) & (x >[=] b)``
@@ -252,8 +291,10 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
             return [expr]
 
     # Recursively get the expressions at the left and the right
-    lexpr = _get_idx_expr_recurse(left, indexedcols, idxexprs, strexpr)
-    rexpr = _get_idx_expr_recurse(right, indexedcols, idxexprs, strexpr)
+    lexpr = _get_idx_expr_recurse(left, indexedcols, idxexprs, strexpr,
+                                  neqcols, incols)
+    rexpr = _get_idx_expr_recurse(right, indexedcols, idxexprs, strexpr,
+                                  neqcols, incols)
 
     def add_expr(expr, idxexprs, strexpr):
         """Add a single expression to the list."""
@@ -284,7 +325,40 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
     return not_indexable
 
 
-def _get_idx_expr(expr, indexedcols):
+def _get_or_equalities(exprnode, indexedcols, neqcols, incols):
+    """Get the ``in`` expression equivalent to the disjunction of
+    equalities in `exprnode`.
+
+    An expression like ``(var, ('in',), (limits,))`` is returned if
+    every term of the disjunction compares the same variable for
+    equality with a constant (or a normal variable), and ``None``
+    otherwise.
+
+    """
+
+    terms = []
+    stack = [exprnode]
+    while stack:
+        node = stack.pop()
+        if node.astType == 'op' and node.value == 'or':
+            stack.extend(node.children)
+        else:
+            terms.append(node)
+    var, limits = None, []
+    for term in terms:
+        tvar, op, limit = _get_indexable_cmp(term, indexedcols, neqcols,
+                                             incols)
+        if op != 'eq' or isinstance(limit, bool):
+            return None
+        if var is None:
+            var = tvar
+        elif tvar != var:
+            return None
+        limits.append(limit)
+    return (var, ('in',), (tuple(limits),))
+
+
+def _get_idx_expr(expr, indexedcols, neqcols=frozenset(), incols=frozenset()):
     """Extract an indexable expression out of `exprnode`.
 
     Looks for variable-constant comparisons in the expression node
@@ -300,6 +374,8 @@ def _get_idx_expr(expr, indexedcols):
 
     * ``a <[=] x``, ``a == x`` and ``a >[=] x``
     * ``(a <[=] x) & (y <[=] b)`` and ``(a == x) | (b == y)``
+    * ``(a == x) | (a == y) | (a == z)`` and ``in_list`` (where
+      ``in_list`` is a variable in `incols` standing for ``in_(a, xs)``)
     * ``~(~c_bool)``, ``~~c_bool`` and ``~(~c_bool) & (c_extra != 2)``
 
     (where ``a``, ``b`` and ``c_bool`` are indexed columns, but
@@ -311,9 +387,13 @@ def _get_idx_expr(expr, indexedcols):
     * ``a != 1`` and  ``c_bool != False``
     * ``~((a > 0) & (c_bool))``
 
+    The only exception are ``!=`` comparisons (and negated ``==``
+    comparisons) of variables in `neqcols`, which are indexable.
+
     """
 
-    return _get_idx_expr_recurse(expr, indexedcols, [], [''])
+    return _get_idx_expr_recurse(expr, indexedcols, [], [''], neqcols,
+                                 incols)
 
 
 class CompiledCondition(object):
@@ -357,15 +437,29 @@ class CompiledCondition(object):
         the `condvars` mapping and converted to Python scalars.
         """
 
+        def replace(idxlim):
+            if isinstance(idxlim, tuple):  # variable
+                idxlim = condvars[idxlim[0]]  # look up value
+                if isinstance(idxlim, InList):
+                    return idxlim.values
+                idxlim = idxlim.tolist()  # convert back to Python
+            return idxlim
+
         exprs = self.index_expressions
         exprs2 = []
         for expr in exprs:
             idxlims = expr[2]  # the limits are in third place
             limit_values = []
             for idxlim in idxlims:
-                if isinstance(idxlim, tuple):  # variable
-                    idxlim = condvars[idxlim[0]]  # look up value
-                    idxlim = idxlim.tolist()  # convert back to Python
+                if expr[1] == ('in',):
+                    # The limit is a tuple of values (or in-lists), which
+                    # is replaced by a sorted tuple of distinct values
+                    values = [numpy.atleast_1d(replace(value))
+                              for value in idxlim]
+                    idxlim = tuple(numpy.unique(
+                        numpy.concatenate(values)).tolist())
+                else:
+                    idxlim = replace(idxlim)
                 limit_values.append(idxlim)
             # Add this replaced entry to the new exprs2
             var, ops, _ = expr
@@ -391,13 +485,17 @@ def _get_variable_names(expression):
     return list(set(names))  # remove repeated names
 
 
-def compile_condition(condition, typemap, indexedcols):
+def compile_condition(condition, typemap, indexedcols, neqcols=frozenset()):
     """Compile a condition and extract usable index conditions.
 
     Looks for variable-constant comparisons in the `condition` string
     involving the indexed columns whose variable names appear in
     `indexedcols`.  The part of `condition` having usable indexes is
     returned as a compiled condition in a `CompiledCondition` container.
+    Columns in `neqcols` have indexes supporting ``!=`` comparisons.
+    The ``in_()`` calls in `condition` are replaced by the boolean
+    variables named by `extract_in_lists()`, which are indexable when
+    they are in `indexedcols`.
 
     Expressions such as '0 < c1 <= 1' do not work as expected.  The
     Numexpr types of *all* variables must be given in the `typemap`
@@ -408,11 +506,12 @@ def compile_condition(condition, typemap, indexedcols):
     """
 
     # Get the expression tree and extract index conditions.
+    condition, inlists = extract_in_lists(condition)
     expr = stringToExpression(condition, typemap, {})
     if expr.astKind != 'bool':
         raise TypeError("condition ``%s`` does not have a boolean type"
                         % condition)
-    idxexprs = _get_idx_expr(expr, indexedcols)
+    idxexprs = _get_idx_expr(expr, indexedcols, neqcols, frozenset(inlists))
     # Post-process the answer
     if isinstance(idxexprs, list):
         # Simple expression
@@ -444,13 +543,115 @@ def compile_condition(condition, typemap, indexedcols):
     return CompiledCondition(func, params, idxexprs, strexpr, **kwargs)
 
 
+def extract_in_lists(condition):
+    """Replace the ``in_(col, values)`` calls in `condition`.
+
+    Every call is replaced by a new boolean variable, and a tuple with
+    the new condition and a dictionary mapping the new variables to the
+    ``(col, values)`` arguments of their calls is returned.  `col` is
+    the name of a variable, and `values` is either a tuple with the
+    name of a variable or a literal sequence of values.
+
+    """
+
+    if 'in_' not in condition:
+        return condition, {}
+    # The offset where every line starts, to locate tokens
+    lines = condition.splitlines(True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    tokens = list(tokenize.generate_tokens(six.StringIO(condition).readline))
+    inlists = {}
+    pieces = []
+    last = 0
+    i = 0
+    while i < len(tokens) - 1:
+        tok, nexttok = tokens[i], tokens[i + 1]
+        if not (tok[0] == tokenize.NAME and tok[1] == 'in_' and
+                nexttok[1] == '('):
+            i += 1
+            continue
+        # Look for the closing parenthesis of the call
+        depth = 0
+        for j in range(i + 1, len(tokens)):
+            if tokens[j][1] in '([{':
+                depth += 1
+            elif tokens[j][1] in ')]}':
+                depth -= 1
+                if depth == 0:
+                    break
+        else:
+            raise SyntaxError("unbalanced parentheses in condition ``%s``"
+                              % condition)
+        start = offsets[tok[2][0] - 1] + tok[2][1]
+        argstart = offsets[nexttok[3][0] - 1] + nexttok[3][1]
+        stop = offsets[tokens[j][2][0] - 1] + tokens[j][2][1]
+        args = ast.parse(condition[argstart:stop].strip(), mode='eval').body
+        if (not isinstance(args, ast.Tuple) or len(args.elts) != 2 or
+                not isinstance(args.elts[0], ast.Name)):
+            raise SyntaxError("``in_()`` takes a column variable and a "
+                              "sequence of values in condition ``%s``"
+                              % condition)
+        colvar, values = args.elts
+        if isinstance(values, ast.Name):
+            values = (values.id,)
+        else:
+            values = list(ast.literal_eval(values))
+        name = '__in%d' % len(inlists)
+        inlists[name] = (colvar.id, values)
+        pieces.extend([condition[last:start], name])
+        last = stop + 1
+        i = j + 1
+    pieces.append(condition[last:])
+    return ''.join(pieces), inlists
+
+
+class InList(object):
+    """A column tested for membership in a list of values.
+
+    These are the values of the variables replacing ``in_(col, values)``
+    calls in conditions (see :func:`extract_in_lists`).  They look like
+    boolean columns to the rest of the query machinery.
+
+    """
+
+    dtype = numpy.dtype(bool)
+    """The type of the membership tests."""
+
+    @property
+    def pathname(self):
+        """The path name of the tested column."""
+
+        return self.column.pathname
+
+    @property
+    def index(self):
+        """The index of the tested column."""
+
+        return self.column.index
+
+    def __init__(self, column, values):
+        self.column = column
+        """The tested `Column` instance."""
+        self.values = lookup_values(values, column.dtype)
+        """The sorted, distinct values that the column may hold."""
+
+    def evaluate(self, recarr):
+        """Test the values of the column in `recarr` for membership."""
+
+        return numpy.in1d(get_nested_field(recarr, self.column.pathname),
+                          self.values)
+
+
 def call_on_recarr(func, params, recarr, param2arg=None, **kwargs):
     """Call `func` with `params` over `recarr`.
 
     The `param2arg` function, when specified, is used to get an argument
     given a parameter name; otherwise, the parameter itself is used as
     an argument.  When the argument is a `Column` object, the proper
-    column from `recarr` is used as its value.
+    column from `recarr` is used as its value, and when it is an
+    `InList` one, its membership test over `recarr`.
 
     """
 
@@ -460,7 +661,9 @@ def call_on_recarr(func, params, recarr, param2arg=None, **kwargs):
             arg = param2arg(param)
         else:
             arg = param
-        if hasattr(arg, 'pathname'):  # looks like a column
+        if isinstance(arg, InList):
+            arg = arg.evaluate(recarr)
+        elif hasattr(arg, 'pathname'):  # looks like a column
             arg = get_nested_field(recarr, arg.pathname)
         args.append(arg)
     return func(*args, **kwargs)
@@ -350,6 +350,7 @@ cdef extern from "hdf5.h" nogil:
                          void *buf)
   hid_t H5Dget_create_plist(hid_t dataset_id)
   hsize_t H5Dget_storage_size(hid_t dataset_id)
+  haddr_t H5Dget_offset(hid_t dset_id)
   herr_t H5Dvlen_get_buf_size(hid_t dataset_id, hid_t type_id, hid_t space_id,
                               hsize_t *size)
 
@@ -553,6 +554,8 @@ cdef extern from "utils.h" nogil:
 
 cdef extern from "utils.h":
   object Giterate(hid_t parent_id, hid_t loc_id, char *name)
+  object Giterate_names(hid_t loc_id, hsize_t *idx, size_t maxnames)
+  hssize_t Gget_nlinks(hid_t loc_id)
   object Aiterate(hid_t loc_id)
   object H5UIget_info(hid_t loc_id, char *name, char *byteorder)
 
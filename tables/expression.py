@@ -15,19 +15,48 @@
 from __future__ import print_function
 from __future__ import absolute_import
 import sys
+import threading
 import warnings
+from collections import deque
 
 import numpy as np
+import numexpr as ne
 import tables as tb
 from numexpr.necompiler import getContext, getExprNames, getType, NumExpr
 from numexpr.expressions import functions as numexpr_functions
 from .exceptions import PerformanceWarning
 from .parameters import IO_BUFFER_SIZE, BUFFER_TIMES
+from .utils import Task
 import six
 from six.moves import range
 from six.moves import zip
 
 
+# The reduction of every block and the way partial results are combined
+_reductions = {
+    'sum': (np.sum, np.add),
+    'mean': (np.sum, np.add),
+    'count': (np.count_nonzero, np.add),
+    'min': (np.amin, np.minimum),
+    'max': (np.amax, np.maximum),
+}
+
+
+def _finish_reduction(op, result, shape, axis):
+    """Turn the combined partials of a reduction into its final result."""
+
+    if op == 'mean':
+        if axis is None:
+            nelements = int(np.prod(shape))
+        else:
+            nelements = shape[axis]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.true_divide(result, nelements)
+    if isinstance(result, np.ndarray) and result.ndim == 0:
+        result = result[()]
+    return result
+
+
 class Expr(object):
     """A class for evaluating expressions with arbitrary array-like objects.
 
@@ -131,6 +160,17 @@ class Expr(object):
 
         The step range selection for the user-provided output.
 
+    .. attribute:: pipeline_depth
+
+        The number of blocks read ahead (and written behind) the
+        computation, or 0 for no pipelining (see
+        :meth:`Expr.set_pipeline`).
+
+    .. attribute:: pipeline_nthreads
+
+        The number of threads used by Numexpr for computing every
+        block, or None for the current Numexpr setting.
+
     .. attribute:: shape
 
         Common shape for the arrays in expression.
@@ -164,6 +204,12 @@ class Expr(object):
         """The stop range selection for the user-provided output."""
         self.o_step = None
         """The step range selection for the user-provided output."""
+        self.pipeline_depth = 0
+        """The number of blocks read ahead (and written behind) the
+        computation, or 0 for no pipelining."""
+        self.pipeline_nthreads = None
+        """The number of threads used by Numexpr for computing every block,
+        or None for the current Numexpr setting."""
         self.shape = None
         """Common shape for the arrays in expression."""
         self.start, self.stop, self.step = (None,) * 3
@@ -382,6 +428,36 @@ class Expr(object):
         self.o_stop = stop
         self.o_step = step
 
+    def set_pipeline(self, depth=2, nthreads=None):
+        """Overlap the I/O of inputs and output with the computation.
+
+        When depth is larger than 0, :meth:`Expr.eval` reads up to depth
+        blocks of the inputs ahead in background threads, and writes the
+        computed blocks to the output container in another thread (with
+        up to depth blocks pending), while the expression is being
+        computed over the current block.  Calls to the HDF5 library are
+        still serialized, so this pays off for on-disk operands when the
+        computation (or decompression) takes a significant time compared
+        with the raw I/O.  Operands that are broadcasted (i.e. not
+        iterated along the main dimension) are read in memory before
+        the computation starts.  A depth of 0 disables pipelining (the
+        default).
+
+        The nthreads parameter sets the number of threads that Numexpr
+        will use for computing every block during :meth:`Expr.eval`.  If
+        None, the current setting of Numexpr is used.
+
+        .. versionadded:: 3.5
+
+        """
+
+        if depth < 0:
+            raise ValueError("depth must be a non-negative integer")
+        if nthreads is not None and nthreads < 1:
+            raise ValueError("nthreads must be a positive integer or None")
+        self.pipeline_depth = depth
+        self.pipeline_nthreads = nthreads
+
     # Although the next code is similar to the method in `Leaf`, it
     # allows the use of pure NumPy objects.
     def _calc_nrowsinbuf(self, object_):
@@ -590,10 +666,115 @@ value of dimensions that are orthogonal (and preferably close) to the
             else:
                 return self._single_row_out
 
-        # Create a key that selects every element in inputs and output
-        # (including the main dimension)
-        i_slices = [slice(None)] * (maindim + 1)
-        o_slices = [slice(None)] * (o_maindim + 1)
+        def write_block(start2, rout):
+            # Set the values into the out buffer
+            if self.append_mode:
+                out.append(rout)
+            else:
+                # Compute the slice to be filled in output
+                start3 = o_start + (start2 - start) // step
+                stop3 = start3 + nrowsinbuf * o_step
+                if stop3 > o_stop:
+                    stop3 = o_stop
+                o_slices = [slice(None)] * (o_maindim + 1)
+                o_slices[o_maindim] = slice(start3, stop3, o_step)
+                # Set the slice
+                out[tuple(o_slices)] = rout
+
+        self._compute_blocks(slice_pos, start, stop, step, nrowsinbuf,
+                             write_block)
+        return out
+
+    def reduce(self, op, axis=None):
+        """Reduce the outcome of the expression with the op operation.
+
+        The op argument can be 'sum', 'min', 'max', 'count' (the number of
+        non-zero, i.e. true, elements) or 'mean'.  The reduction is
+        computed block after block along the main dimension (as
+        :meth:`Expr.eval` does), so the full outcome of the expression is
+        never kept in memory or on disk.  The input range selected with
+        :meth:`Expr.set_inputs_range` is honored, and the output container
+        (if any) is not used.  The pipelined mode set with
+        :meth:`Expr.set_pipeline` applies here too.
+
+        If axis is None (the default), all the elements are reduced to a
+        single scalar.  Otherwise, the outcome is reduced along that axis
+        only, and an array with the remaining dimensions is returned,
+        like the NumPy reductions do.
+
+        Examples
+        --------
+
+        ::
+
+            expr = tb.Expr('(a - b)**2')
+            sqdiff = expr.reduce('sum')
+            nmatches = tb.Expr('a > b').reduce('count')
+
+        .. versionadded:: 3.5
+
+        """
+
+        if op not in _reductions:
+            raise ValueError("op must be one of %s" % sorted(_reductions))
+        maindim = self.maindim
+        shape = list(self.shape)
+        if axis is not None:
+            if not -len(shape) <= axis < len(shape):
+                raise ValueError("axis %d is out of bounds for an outcome "
+                                 "with %d dimensions" % (axis, len(shape)))
+            axis %= len(shape)
+
+        blockfunc, combine = _reductions[op]
+        if maindim is None:
+            # The outcome is a single row
+            return _finish_reduction(op, blockfunc(self._single_row_out,
+                                                   axis=axis),
+                                     self._single_row_out.shape, axis)
+
+        # Get different info we need for the main computation loop
+        (i_nrows, slice_pos, start, stop, step, nrowsinbuf) = \
+            self._get_info(shape, maindim, itermode=True)
+
+        if i_nrows == 0:
+            # No elements to reduce
+            return _finish_reduction(op, blockfunc(
+                np.empty(shape, dtype=self._single_row_out.dtype),
+                axis=axis), shape, axis)
+
+        partials = []
+
+        def reduce_block(start2, rout):
+            partial = blockfunc(rout, axis=axis)
+            if axis is None or axis == maindim:
+                # Fold the partial results as they come
+                if partials:
+                    partial = combine(partials.pop(), partial)
+            partials.append(partial)
+
+        self._compute_blocks(slice_pos, start, stop, step, nrowsinbuf,
+                             reduce_block, io_consume=False)
+        if axis is None or axis == maindim:
+            result = partials[0]
+        else:
+            # Blocks are reduced along another axis, so stack them
+            result = np.concatenate(
+                partials, axis=maindim if maindim < axis else maindim - 1)
+        return _finish_reduction(op, result, shape, axis)
+
+    def _compute_blocks(self, slice_pos, start, stop, step, nrowsinbuf,
+                        consume, io_consume=True):
+        """Compute the expression block after block.
+
+        Every computed block is passed to ``consume(start2, rout)``, where
+        `start2` is the first input row in the block.  If `io_consume` is
+        true, `consume` does I/O and, in pipelined mode, it is called in
+        order from background threads.  Otherwise, it is always called
+        from this thread.
+
+        """
+
+        values, maindim = self.values, self.maindim
 
         # This is a hack to prevent doing unnecessary flavor conversions
         # while reading buffers
@@ -601,12 +782,23 @@ value of dimensions that are orthogonal (and preferably close) to the
             if hasattr(val, 'maindim'):
                 val._v_convert = False
 
-        # Start the computation itself
-        for start2 in range(start, stop, step * nrowsinbuf):
+        pipelined = self.pipeline_depth > 0
+        if pipelined:
+            # Numexpr should not read leaves while other threads are
+            # doing I/O, so read the broadcasted values now; the sliced
+            # ones stay on disk and are read block after block
+            values = [val if i in slice_pos else
+                      val.read() if isinstance(val, tb.Leaf) else
+                      val[:] if isinstance(val, tb.Column) else val
+                      for i, val in enumerate(values)]
+
+        def read_block(start2):
             stop2 = start2 + step * nrowsinbuf
             if stop2 > stop:
                 stop2 = stop
-            # Set the proper slice for inputs
+            # Create a key that selects every element in inputs
+            # (including the main dimension)
+            i_slices = [slice(None)] * (maindim + 1)
             i_slices[maindim] = slice(start2, stop2, step)
             # Get the input values
             vals = []
@@ -617,27 +809,82 @@ value of dimensions that are orthogonal (and preferably close) to the
                     # A read of values is not apparently needed, as PyTables
                     # leaves seems to work just fine inside Numexpr
                     vals.append(val)
-            # Do the actual computation for this slice
-            rout = self._compiled_expr(*vals)
-            # Set the values into the out buffer
-            if self.append_mode:
-                out.append(rout)
+            return vals
+
+        nthreads = self.pipeline_nthreads
+        if nthreads is not None:
+            nthreads = ne.set_num_threads(nthreads)
+        try:
+            # Start the computation itself
+            starts = range(start, stop, step * nrowsinbuf)
+            if pipelined:
+                self._eval_pipelined(read_block, consume, starts, io_consume)
             else:
-                # Compute the slice to be filled in output
-                start3 = o_start + (start2 - start) // step
-                stop3 = start3 + nrowsinbuf * o_step
-                if stop3 > o_stop:
-                    stop3 = o_stop
-                o_slices[o_maindim] = slice(start3, stop3, o_step)
-                # Set the slice
-                out[tuple(o_slices)] = rout
-
-        # Activate the conversion again (default)
-        for val in values:
-            if hasattr(val, 'maindim'):
-                val._v_convert = True
-
-        return out
+                for start2 in starts:
+                    consume(start2, self._compiled_expr(*read_block(start2)))
+        finally:
+            if nthreads is not None:
+                ne.set_num_threads(nthreads)
+            # Activate the conversion again (default)
+            for val in self.values:
+                if hasattr(val, 'maindim'):
+                    val._v_convert = True
+
+    def _eval_pipelined(self, read_block, consume, starts, io_consume):
+        """Compute blocks while the next ones are read (and the previous
+        ones are consumed, if this does I/O) in other threads."""
+
+        depth = self.pipeline_depth
+        iolock = threading.Lock()
+        starts = iter(starts)
+        reads, writes = deque(), deque()
+
+        def read(start2):
+            with iolock:
+                return read_block(start2)
+
+        def write(previous, start2, rout):
+            # Blocks are written in order, one after another
+            if previous is not None:
+                previous.join()
+                if previous.exc_info is not None:
+                    return
+            with iolock:
+                consume(start2, rout)
+
+        def submit_read():
+            for start2 in starts:
+                task = Task(read, start2)
+                task.start()
+                reads.append((start2, task))
+                break
+
+        try:
+            for i in range(depth):
+                submit_read()
+            while reads:
+                start2, task = reads.popleft()
+                vals = task.result()
+                submit_read()
+                # Do the actual computation for this block
+                rout = self._compiled_expr(*vals)
+                if not io_consume:
+                    consume(start2, rout)
+                    continue
+                while len(writes) >= depth:
+                    writes.popleft().result()
+                previous = writes[-1] if writes else None
+                task = Task(write, previous, start2, rout)
+                task.start()
+                writes.append(task)
+            while writes:
+                writes.popleft().result()
+        finally:
+            # Never leave I/O running behind the caller's back
+            for start2, task in reads:
+                task.join()
+            for task in writes:
+                task.join()
 
     def __iter__(self):
         """Iterate over the rows of the outcome of the expression.
@@ -28,6 +28,7 @@ import time
 import weakref
 import warnings
 import collections
+import itertools
 
 import numexpr
 import numpy
@@ -45,7 +46,7 @@ from .description import (IsDescription, UInt8Col, StringCol,
                                 descr_from_dtype, dtype_from_descr)
 from .filters import Filters
 from .node import Node, NotLoggedMixin
-from .group import Group, RootGroup
+from .group import Group, RootGroup, NodeInfo
 from .group import TransactionGroupG, TransactionG, MarkG
 from .leaf import Leaf
 from .array import Array
@@ -778,6 +779,15 @@ class File(hdf5extension.File, object):
         if params['MAX_BLOSC_THREADS'] is None:
             params['MAX_BLOSC_THREADS'] = detect_number_of_cores()
 
+        if params['MAX_READ_THREADS'] is None:
+            params['MAX_READ_THREADS'] = detect_number_of_cores()
+
+        if params['MAX_INDEX_THREADS'] is None:
+            params['MAX_INDEX_THREADS'] = detect_number_of_cores()
+
+        if params['MAX_FILENODE_THREADS'] is None:
+            params['MAX_FILENODE_THREADS'] = detect_number_of_cores()
+
         self.params = params
 
         # Now, it is time to initialize the File extension
@@ -2130,6 +2140,50 @@ class File(hdf5extension.File, object):
                     yield leaf
 
 
+    def scan_tree(self, where="/", classname=None):
+        """Recursively iterate over metadata records of nodes hanging from
+        where.
+
+        This is a lightweight version of :meth:`File.walk_nodes`: nodes
+        are visited in the same order, but they are not loaded.  Instead,
+        a record with the path, class name and, for leaves, the shape,
+        dtype, filters and size on disk of each node is yielded.  See
+        :meth:`Group._f_scan_tree` for details.
+
+        Parameters
+        ----------
+        where : str or Group, optional
+            If supplied, the iteration starts from (and includes)
+            this group. It can be a path string or a
+            Group instance (see :ref:`GroupClassDescr`).
+        classname
+            If the name of a class derived from
+            Node (see :ref:`GroupClassDescr`) is supplied, only records
+            of nodes of that class (or subclasses of it) will be returned.
+
+        Examples
+        --------
+
+        ::
+
+            # Catalogue all the arrays hanging from '/detector'.
+            for info in h5file.scan_tree('/detector', classname='Array'):
+                print(info.path, info.shape, info.dtype)
+
+        .. versionadded:: 3.5
+
+        """
+
+        group = self.get_node(where)  # Does the parent exist?
+        self._check_group(group)  # Is it a group?
+        records = group._f_scan_tree(classname)
+        if get_class_by_name(classname) is Node:  # all nodes
+            info = NodeInfo(group._v_pathname, group.__class__.__name__,
+                            None, None, None, None)
+            records = itertools.chain([info], records)
+        return records
+
+
     def walk_groups(self, where="/"):
         """Recursively iterate over groups (not leaves) hanging from where.
 
@@ -2267,6 +2321,8 @@ class File(hdf5extension.File, object):
         self._nmarks = 0
         self._curtransaction = 0
         self._curmark = -1  # No marks yet
+        self._pending_actions = []  # Actions not in the action log yet
+        self._shadow_parent = None  # ((transaction, mark), group) of shadows
 
         # Get the Group for keeping user actions
         try:
@@ -2346,6 +2402,8 @@ class File(hdf5extension.File, object):
         del self._curaction
         del self._curtransaction
         del self._nmarks
+        del self._pending_actions
+        del self._shadow_parent
         del self._actionlog
         # Recursively delete the transaction group
         tnode = self.get_node(_trans_group_path)
@@ -2389,8 +2447,9 @@ class File(hdf5extension.File, object):
             self._markers[name] = self._curmark + 1
 
         # Create an explicit mark
-        # Insert the mark in the action log
+        # Insert the mark in the action log, along with pending actions
         self._log("MARK", str(self._curmark + 1), name)
+        self._flush_actions()
         self._curmark += 1
         self._nmarks = self._curmark + 1
         self._seqmarkers.append(self._curaction)
@@ -2405,6 +2464,8 @@ class File(hdf5extension.File, object):
         Arguments must also be strings.
 
         This method should be called once the action has been completed.
+        The action is kept in memory and written to the action log in bulk
+        by :meth:`File._flush_actions`.
 
         This method can only be called when the Undo/Redo mechanism has
         been enabled.  Otherwise, an `UndoRedoError` is raised.
@@ -2415,7 +2476,9 @@ class File(hdf5extension.File, object):
 
         maxundo = self.params['MAX_UNDO_PATH_LENGTH']
         # Check whether we are at the end of the action log or not
-        if self._curaction != self._actionlog.nrows - 1:
+        # (there are no pending actions after an undo)
+        if self._curaction != self._actionlog.nrows - 1 + len(
+                self._pending_actions):
             # We are not, so delete the trailing actions
             self._actionlog.remove_rows(self._curaction + 1,
                                         self._actionlog.nrows)
@@ -2450,10 +2513,19 @@ class File(hdf5extension.File, object):
             raise UndoRedoError("Parameter arg1 or arg2 is too long: "
                                 "(%r, %r)" % (arg1, arg2))
         # print("Logging-->", (action, arg1, arg2))
-        self._actionlog.append([(_op_to_code[action],
-                                 arg1.encode('utf-8'),
-                                 arg2.encode('utf-8'))])
+        self._pending_actions.append((_op_to_code[action],
+                                      arg1.encode('utf-8'),
+                                      arg2.encode('utf-8')))
         self._curaction += 1
+        if len(self._pending_actions) >= self._actionlog.nrowsinbuf:
+            self._flush_actions()
+
+    def _flush_actions(self):
+        """Write the pending actions to the action log in a single append."""
+
+        if self._pending_actions:
+            self._actionlog.append(self._pending_actions)
+            self._pending_actions = []
 
     def _get_mark_id(self, mark):
         """Get an integer markid from a mark sequence number or name."""
@@ -2560,6 +2632,7 @@ class File(hdf5extension.File, object):
         self._check_open()
         self._check_undo_enabled()
 
+        self._flush_actions()
 #         print("(pre)UNDO: (curaction, curmark) = (%s,%s)" % \
 #               (self._curaction, self._curmark))
         if mark is None:
@@ -2605,6 +2678,7 @@ class File(hdf5extension.File, object):
         self._check_open()
         self._check_undo_enabled()
 
+        self._flush_actions()
 #         print("(pre)REDO: (curaction, curmark) = (%s, %s)" % \
 #               (self._curaction, self._curmark))
         if self._curaction >= self._actionlog.nrows - 1:
@@ -2652,6 +2726,7 @@ class File(hdf5extension.File, object):
         self._check_open()
         self._check_undo_enabled()
 
+        self._flush_actions()
         if mark == -1:  # Special case
             mark = self._nmarks  # Go beyond the mark bounds up to the end
         # Get the mark ID number
@@ -2686,12 +2761,17 @@ class File(hdf5extension.File, object):
 
         Computes the current shadow name according to the current
         transaction, mark and action.  It returns a tuple with the
-        shadow parent node and the name of the shadow in it.
+        shadow parent node and the name of the shadow in it.  The
+        parent node is looked up once for all the shadows of a mark.
 
         """
 
-        parent = self.get_node(
-            _shadow_parent % (self._curtransaction, self._curmark))
+        key = (self._curtransaction, self._curmark)
+        if (self._shadow_parent is None or self._shadow_parent[0] != key or
+                not self._shadow_parent[1]._v_isopen):
+            parent = self.get_node(_shadow_parent % key)
+            self._shadow_parent = (key, parent)
+        parent = self._shadow_parent[1]
         name = _shadow_name % (self._curaction,)
 
         return (parent, name)
@@ -2704,6 +2784,9 @@ class File(hdf5extension.File, object):
 
         self._check_open()
 
+        if self._undoEnabled:
+            self._flush_actions()
+
         # Flush the cache to disk
         self._node_manager.flush_nodes()
         self._flush_file(0)  # 0 means local scope, 1 global (virtual) scope
@@ -2724,7 +2807,9 @@ class File(hdf5extension.File, object):
         filename = self.filename
 
         if self._undoEnabled and self._iswritable():
-            # Save the current mark and current action
+            # Save the pending actions, the current mark and current action
+            self._flush_actions()
+            self._shadow_parent = None
             self._actionlog.attrs._g__setattr("CURMARK", self._curmark)
             self._actionlog.attrs._g__setattr("CURACTION", self._curaction)
 
@@ -195,6 +195,13 @@ class Filters(object):
         parent = leaf._v_parent
         filters_dict = utilsextension.get_filters(parent._v_objectid,
                                                   leaf._v_name)
+        return class_._from_filters_dict(filters_dict)
+
+    @classmethod
+    def _from_filters_dict(class_, filters_dict):
+        """Create a new `Filters` object from a dictionary of HDF5 filter
+        names and values, as returned by `utilsextension.get_filters()`."""
+
         if filters_dict is None:
             filters_dict = {}  # not chunked
 
@@ -17,6 +17,8 @@ import os
 import re
 import weakref
 import warnings
+from bisect import bisect_right
+from collections import namedtuple
 
 from .misc.proxydict import ProxyDict
 from . import hdf5extension
@@ -42,6 +44,18 @@ class _ChildrenDict(ProxyDict):
         return container._f_get_child(key)
 
 
+NodeInfo = namedtuple('NodeInfo', ['path', 'classname', 'shape', 'dtype',
+                                   'filters', 'size'])
+"""Metadata about a node, as yielded by :meth:`Group._f_scan_tree`.
+
+The fields are the path name of the node, the name of its class, and, for
+leaves only, their shape, NumPy dtype (``None`` for unsupported types),
+filters (a :class:`Filters` instance) and size in bytes on disk.  For
+other nodes, these fields are ``None``.
+
+"""
+
+
 @six.python_2_unicode_compatible
 class Group(hdf5extension.Group, Node):
     """Basic PyTables grouping structure.
@@ -168,6 +182,23 @@ class Group(hdf5extension.Group, Node):
         '__members__', '_v_children', '_v_groups', '_v_leaves',
         '_v_links', '_v_unknown', '_v_hidden')
 
+    # The number of names in the first page read from HDF5 when iterating
+    # over children not loaded yet (see ``Group._g_iter_names``).
+    _c_names_page = 1024
+
+    # The kinds of node (as reported by ``_g_get_objinfo``) of the
+    # children iterated over by ``Group._f_iter_nodes`` for some classes.
+    _c_kinds_by_classname = {
+        None: ('Group', 'Leaf', 'SoftLink', 'ExternalLink', 'Unknown'),
+        'Group': ('Group',),
+        'Leaf': ('Leaf',),
+        'Link': ('SoftLink', 'ExternalLink'),
+    }
+
+    # The number of children added or removed since the group was loaded.
+    # It is only stored in the instance once it changes.
+    _v_nchanges = 0
+
     # `_v_nchildren` is a direct read-only shorthand
     # for the number of *visible* children in a group.
     def _g_getnchildren(self):
@@ -379,12 +410,49 @@ class Group(hdf5extension.Group, Node):
                 # (Assigned values are entirely irrelevant.)
                 if isvisiblename(childname):
                     # Visible node.
-                    members.insert(0, childname)
+                    members.append(childname)
                     children[childname] = None
                     childdict[childname] = None
                 else:
                     # Hidden node.
                     hidden[childname] = None
+        # Newer children go first, as in ``Group._g_refnode``
+        members.reverse()
+
+    def _g_iter_names(self):
+        """Iterate over the names of all the children of this group.
+
+        Names are yielded in increasing order without loading nor listing
+        all the children at once: they are read from HDF5 in pages which
+        double their size every time, so that the first names are got
+        right away even in very wide groups, while iterating over all of
+        them takes a few reads.  If children are added or removed in the
+        meanwhile, the names after the last one yielded are read again.
+
+        """
+
+        idx, npage = 0, self._c_names_page
+        nchanges = self._v_nchanges
+        last = None
+        while True:
+            if self._v_nchanges != nchanges:
+                # Positions have changed, start again after the last name
+                nchanges = self._v_nchanges
+                names, idx = self._g_list_names(0, self._g_get_nlinks())
+                if last is not None:
+                    names = names[bisect_right(names, last):]
+                npage = 0
+            else:
+                names, idx = self._g_list_names(idx, npage)
+            for name in names:
+                last = name
+                yield name
+                if self._v_nchanges != nchanges:
+                    break
+            else:
+                if len(names) < npage or npage == 0:
+                    return
+                npage *= 2
 
 
     def _g_check_has_child(self, name):
@@ -483,6 +551,118 @@ class Group(hdf5extension.Group, Node):
                     yield leaf
 
 
+    def _f_scan_tree(self, classname=None):
+        """Recursively iterate over metadata records of descendant nodes.
+
+        This method visits nodes in the same order as
+        :meth:`Group._f_walknodes` and with the same meaning of
+        *classname*, but it does not load them: a lightweight
+        :class:`NodeInfo` record (with the path, class name and, for
+        leaves, shape, dtype, filters and size on disk) is yielded for
+        each node instead.  Every group is listed once and every leaf is
+        opened once, so cataloguing files with lots of nodes is much
+        faster than walking them.
+
+        The class of every leaf is guessed from its metadata like when it
+        is loaded, but leaves failing to load for other reasons are
+        reported with that class instead of ``UnImplemented``.
+
+        Examples
+        --------
+
+        ::
+
+            # Print the size on disk of all the leaves hanging from '/'
+            for info in h5file.root._f_scan_tree('Leaf'):
+                print(info.path, info.size)
+
+        .. versionadded:: 3.5
+
+        """
+
+        self._g_check_open()
+
+        # For compatibility with old default arguments.
+        if classname == '':
+            classname = None
+        class_ = get_class_by_name(classname)
+        sysattrs = self._v_file.params['PYTABLES_SYS_ATTRS']
+
+        # Groups are listed in the same order as ``Group._f_walk_groups``
+        # yields them, as ``Group._f_walknodes`` does.
+        info = NodeInfo(self._v_pathname, self.__class__.__name__,
+                        None, None, None, None)
+        stack = [[('', info)]]
+        while stack:
+            for relpath, info in stack.pop():
+                children, subgroups = self._g_scan_group(relpath, sysattrs)
+                if class_ is Group:
+                    yield info
+                else:
+                    for childclass, childinfo in children:
+                        if issubclass(childclass, class_):
+                            yield childinfo
+                stack.append(subgroups)
+
+    def _g_scan_group(self, relpath, sysattrs):
+        """Get metadata about the visible children of a descendant group.
+
+        `relpath` is the path of the group relative to this one.  A
+        ``(children, subgroups)`` tuple is returned, where `children` is
+        a list of ``(class, NodeInfo)`` pairs sorted by name, and
+        `subgroups` is a list of ``(relpath, NodeInfo)`` pairs for the
+        child groups.
+
+        """
+
+        groups, leaves, links, unknown = self._g_list_path(relpath or '.')
+        kinds = [(name, 'Group') for name in groups]
+        kinds.extend((name, 'Leaf') for name in leaves)
+        kinds.extend((name, 'Link') for name in links)
+        kinds.extend((name, 'Unknown') for name in unknown)
+        kinds.sort()
+
+        children, subgroups = [], []
+        for name, kind in kinds:
+            if not isvisiblename(name):
+                continue
+            childpath = join_path(relpath, name) if relpath else name
+            path = join_path(self._v_pathname, childpath)
+            if kind == 'Leaf':
+                classid, shape, dtype, filters, size = (
+                    self._g_get_lchild_info(childpath, sysattrs))
+                if classid is not None and not isinstance(classid, str):
+                    classid = classid.decode('utf-8')
+                if classid not in class_id_dict:
+                    # Unknown or no ``CLASS`` attribute, try a guess.
+                    classid = utilsextension.which_class(self._v_objectid,
+                                                         childpath)
+                childclass = class_id_dict.get(classid, UnImplemented)
+                info = NodeInfo(path, childclass.__name__, shape, dtype,
+                                Filters._from_filters_dict(filters), size)
+            else:
+                if kind == 'Group':
+                    childclass = Group
+                    if sysattrs:
+                        classid = self._g_get_gchild_attr(childpath, 'CLASS')
+                        if (classid is not None and
+                                not isinstance(classid, str)):
+                            classid = classid.decode('utf-8')
+                        childclass = class_id_dict.get(classid, Group)
+                elif kind == 'Link':
+                    if self._g_get_objinfo(childpath) == 'ExternalLink':
+                        childclass = ExternalLink
+                    else:
+                        childclass = SoftLink
+                else:
+                    childclass = Unknown
+                info = NodeInfo(path, childclass.__name__,
+                                None, None, None, None)
+                if kind == 'Group':
+                    subgroups.append((childpath, info))
+            children.append((childclass, info))
+        return children, subgroups
+
     def _g_join(self, name):
         """Helper method to correctly concatenate a name child object with the
         pathname of this group."""
@@ -537,9 +717,22 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
                 % (self._v_pathname, childname), NaturalNameWarning)
 
         # Check group width limits.
-        if (len(self._v_children) + len(self._v_hidden) >=
-                self._v_max_group_width):
+        # Children are only counted on disk when they are not loaded yet,
+        # so that wide groups are not listed just for adding children.
+        mydict = self.__dict__
+        mydict['_v_nchanges'] = self._v_nchanges + 1
+        if '_v_children' in mydict:
+            nchildren = len(self._v_children) + len(self._v_hidden)
+        else:
+            nchildren = self._g_get_nlinks()
+        if nchildren >= self._v_max_group_width:
             self._g_width_warning()
+        if '_v_children' not in mydict:
+            # Children names will be read when needed, but the visible
+            # ones added meanwhile are kept for ``Group.__setattr__``.
+            if isvisiblename(childname):
+                mydict.setdefault('_v_added_names', set()).add(childname)
+            return
 
         # Update members information.
         # Insert references to the new child.
@@ -574,7 +767,11 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
                 % (self._v_pathname, childname))
 
         # Update members information, if needed
-        if '_v_children' in self.__dict__:
+        mydict = self.__dict__
+        mydict['_v_nchanges'] = self._v_nchanges + 1
+        if '_v_added_names' in mydict:
+            mydict['_v_added_names'].discard(childname)
+        if '_v_children' in mydict:
             if childname in self._v_children:
                 # Visible node.
                 members = self.__members__
@@ -738,6 +935,25 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
 
         self._g_check_open()
 
+        if ('_v_children' not in self.__dict__ and
+                classname != 'IndexArray'):
+            # Do not list and classify every child of (maybe wide) groups
+            # just for iterating over them
+            kinds = self._c_kinds_by_classname.get(
+                classname, self._c_kinds_by_classname[None])
+            class_ = None
+            if classname not in self._c_kinds_by_classname:
+                class_ = get_class_by_name(classname)
+            for name in self._g_iter_names():
+                if not isvisiblename(name):
+                    continue
+                if self._g_get_objinfo(name) not in kinds:
+                    continue
+                childnode = self._f_get_child(name)
+                if class_ is None or isinstance(childnode, class_):
+                    yield childnode
+            return
+
         if not classname:
             # Returns all the children alphanumerically sorted
             names = sorted(six.iterkeys(self._v_children))
@@ -878,7 +1094,13 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
         #   endless loop on exit!
 
         mydict = self.__dict__
-        if '__members__' in mydict and name in self.__members__:
+        if '__members__' in mydict:
+            clash = name in self.__members__
+        else:
+            # Only the children added by ``Group._g_refnode`` are known
+            # when the group has not been loaded.
+            clash = name in mydict.get('_v_added_names', ())
+        if clash:
             warnings.warn(
                 "group ``%s`` already has a child node named ``%s``; "
                 "you will not be able to use natural naming "
@@ -63,14 +63,15 @@ from tables.utilsextension import (encode_filename, set_blosc_max_threads,
 
 # Types, constants, functions, classes & other objects from everywhere
 from libc.stdlib cimport malloc, free
-from libc.string cimport strdup, strlen
+from libc.string cimport strdup, strlen, memcpy
+from libc.stdint cimport int64_t
 from numpy cimport import_array, ndarray, npy_intp
 from cpython.bytes cimport (PyBytes_AsString, PyBytes_FromStringAndSize,
     PyBytes_Check)
 from cpython.unicode cimport PyUnicode_DecodeUTF8
 
 
-from definitions cimport (uintptr_t, hid_t, herr_t, hsize_t, hvl_t,
+from definitions cimport (uintptr_t, hid_t, herr_t, hsize_t, hssize_t, hvl_t,
   H5S_seloper_t, H5D_FILL_VALUE_UNDEFINED,
   H5O_TYPE_UNKNOWN, H5O_TYPE_GROUP, H5O_TYPE_DATASET, H5O_TYPE_NAMED_DATATYPE,
   H5L_TYPE_ERROR, H5L_TYPE_HARD, H5L_TYPE_SOFT, H5L_TYPE_EXTERNAL,
@@ -84,20 +85,24 @@ from definitions cimport (uintptr_t, hid_t, herr_t, hsize_t, hvl_t,
   H5Gcreate, H5Gopen, H5Gclose, H5Ldelete, H5Lmove,
   H5Dopen, H5Dclose, H5Dread, H5Dwrite, H5Dget_type, H5Dget_create_plist,
   H5Dget_space, H5Dvlen_reclaim, H5Dget_storage_size, H5Dvlen_get_buf_size,
+  H5Dget_offset, haddr_t,
   H5Tget_native_type, H5Tclose, H5Tis_variable_str, H5Tget_sign,
+  H5Tget_class, H5Tget_super, H5T_COMPOUND, H5T_VLEN,
   H5Adelete, H5T_BITFIELD, H5T_INTEGER, H5T_FLOAT, H5T_STRING, H5Tget_order,
   H5Pcreate, H5Pset_cache, H5Pclose, H5Pget_userblock, H5Pset_userblock,
   H5Pset_fapl_sec2, H5Pset_fapl_log, H5Pset_fapl_stdio, H5Pset_fapl_core,
   H5Pset_fapl_split, H5Pget_obj_track_times,
   H5Sselect_all, H5Sselect_elements, H5Sselect_hyperslab,
   H5Screate_simple, H5Sclose,
+  H5Sget_simple_extent_ndims, H5Sget_simple_extent_dims,
   H5Oget_info, H5O_info_t,
   H5ATTRset_attribute, H5ATTRset_attribute_string,
   H5ATTRget_attribute, H5ATTRget_attribute_string,
   H5ATTRget_attribute_vlen_string_array,
   H5ATTRfind_attribute, H5ATTRget_type_ndims, H5ATTRget_dims,
   H5ARRAYget_ndims, H5ARRAYget_info,
-  set_cache_size, get_objinfo, get_linkinfo, Giterate, Aiterate, H5UIget_info,
+  set_cache_size, get_objinfo, get_linkinfo, Giterate, Giterate_names,
+  Gget_nlinks, Aiterate, H5UIget_info,
   get_len_of_range, conv_float64_timeval32, truncate_dset,
   H5_HAVE_DIRECT_DRIVER, pt_H5Pset_fapl_direct,
   H5_HAVE_WINDOWS_DRIVER, pt_H5Pset_fapl_windows,
@@ -111,6 +116,10 @@ from utilsextension cimport malloc_dims, get_native_type, cstr_to_pystr, load_re
 
 #-------------------------------------------------------------------
 
+cdef extern from "utils.h":
+  object get_filter_names(hid_t loc_id, char *dset_name)
+
+
 cdef extern from "Python.h":
 
     object PyByteArray_FromStringAndSize(char *s, Py_ssize_t len)
@@ -149,6 +158,30 @@ cdef extern from "H5ARRAY.h" nogil:
   herr_t H5ARRAYget_fill_value( hid_t dataset_id, hid_t type_id,
                                 int *status, void *value)
 
+  herr_t H5ARRAYwrite_chunk(hid_t dataset_id, hsize_t *offset, size_t size,
+                            void *data)
+
+  herr_t H5ARRAYget_chunk_size(hid_t dataset_id, hsize_t *offset,
+                               hsize_t *size)
+
+  herr_t H5ARRAYread_chunk(hid_t dataset_id, hsize_t *offset,
+                           unsigned *filter_mask, void *data)
+
+
+# Functions from zlib, for filtering chunks written or read directly
+cdef extern from "zlib.h" nogil:
+  ctypedef unsigned char Bytef
+  ctypedef unsigned long uLong
+  ctypedef unsigned long uLongf
+
+  int Z_OK
+  int Z_MEM_ERROR
+  uLong compressBound(uLong source_len)
+  int compress2(Bytef *dest, uLongf *dest_len, Bytef *source,
+                uLong source_len, int level)
+  int uncompress(Bytef *dest, uLongf *dest_len, Bytef *source,
+                 uLong source_len)
+
 
 # Functions for dealing with VLArray objects
 cdef extern from "H5VLARRAY.h" nogil:
@@ -163,6 +196,10 @@ cdef extern from "H5VLARRAY.h" nogil:
                                   int nobjects, hsize_t nrecords,
                                   void *data )
 
+  herr_t H5VLARRAYappend_rows( hid_t dataset_id, hid_t type_id,
+                               hsize_t nrows, hsize_t nrecords,
+                               hvl_t *wdata )
+
   herr_t H5VLARRAYmodify_records( hid_t dataset_id, hid_t type_id,
                                   hsize_t nrow, int nobjects,
                                   void *data )
@@ -210,6 +247,41 @@ cdef object getshape(int rank, hsize_t *dims):
   return tuple(shape)
 
 
+# The NumPy types of time atoms
+time_stypes = {'t4': 'i4', 't8': 'f8'}
+
+
+cdef object get_dtype_or_none(hid_t type_id):
+  """Return the NumPy dtype matching an HDF5 type.
+
+  Variable-length types are mapped to the dtype of their base type.  If the
+  type is not supported by PyTables, ``None`` is returned.
+
+  """
+
+  cdef hid_t super_type_id
+  cdef object dtype, stype, shape
+
+  try:
+    if H5Tget_class(type_id) == H5T_VLEN:
+      super_type_id = H5Tget_super(type_id)
+      dtype = get_dtype_or_none(super_type_id)
+      H5Tclose(super_type_id)
+    elif H5Tget_class(type_id) == H5T_COMPOUND:
+      dtype = numpy.dtype(hdf5_to_np_ext_type(type_id)[0])
+    else:
+      stype, shape = hdf5_to_np_ext_type(type_id, pure_numpy_types=False,
+                                         atom=True)
+      if stype == 'e' or stype == '_ref_':
+        dtype = atom_from_hdf5_type(type_id).dtype
+      else:
+        # Building an atom is much slower for plain types
+        dtype = numpy.dtype((time_stypes.get(stype, stype), shape))
+  except TypeError:
+    dtype = None
+  return dtype
+
+
 # Helper function for quickly fetch an attribute string
 cdef object get_attribute_string_or_none(hid_t node_id, char* attr_name):
   """Returns a string/unicode attribute if it exists in node_id.
@@ -1022,6 +1094,31 @@ cdef class Group(Node):
 
     return Giterate(parent._v_objectid, self._v_objectid, encoded_name)
 
+  def _g_list_names(self, hsize_t idx, size_t maxnames):
+    """Return a page with the names of the links hanging from self.
+
+    A ``(names, idx)`` tuple is returned, where `names` is a list with
+    at most `maxnames` names in increasing order, starting at the `idx`
+    link, and `idx` is the position of the next link.  Groups with dense
+    link storage return all the remaining names at once.  The kind of
+    the links is not checked.
+
+    """
+
+    names = Giterate_names(self.group_id, &idx, maxnames)
+    return names, idx
+
+  def _g_get_nlinks(self):
+    """Return the number of links hanging from self."""
+
+    cdef hssize_t nlinks
+
+    nlinks = Gget_nlinks(self.group_id)
+    if nlinks < 0:
+      raise HDF5ExtError("Unable to get the number of links in '%s'" %
+                         self._v_pathname)
+    return nlinks
+
 
   def _g_get_gchild_attr(self, group_name, attr_name):
     """Return an attribute of a child `Group`.
@@ -1077,6 +1174,70 @@ cdef class Group(Node):
     return retvalue
 
 
+  def _g_get_lchild_info(self, leaf_name, sysattrs=True):
+    """Return metadata about a child `Leaf` without loading it.
+
+    A ``(classid, shape, dtype, filters, size)`` tuple is returned, where
+    `classid` is the ``CLASS`` attribute of the leaf (``None`` if it does
+    not exist or `sysattrs` is false), `dtype` is ``None`` for unsupported
+    types, `filters` is a dictionary like the one returned by
+    `utilsextension.get_filters()` and `size` is the storage size in bytes.
+    The dataset is opened only once, and `leaf_name` may be a relative
+    path.
+
+    """
+
+    cdef hid_t leaf_id, space_id, type_id
+    cdef int rank
+    cdef hsize_t *dims
+    cdef object classid, shape, dtype, filters, size
+    cdef bytes encoded_leaf_name
+
+    encoded_leaf_name = leaf_name.encode('utf-8')
+
+    leaf_id = H5Dopen(self.group_id, encoded_leaf_name, H5P_DEFAULT)
+    if leaf_id < 0:
+      raise HDF5ExtError("Non-existing node ``%s`` under ``%s``" %
+                         (leaf_name, self._v_pathname))
+    try:
+      classid = None
+      if sysattrs:
+        classid = get_attribute_string_or_none(leaf_id, "CLASS")
+
+      space_id = H5Dget_space(leaf_id)
+      rank = H5Sget_simple_extent_ndims(space_id)
+      if rank < 0:
+        H5Sclose(space_id)
+        raise HDF5ExtError("Unable to get the rank of ``%s`` under ``%s``" %
+                           (leaf_name, self._v_pathname))
+      dims = <hsize_t *>malloc(max(rank, 1) * sizeof(hsize_t))
+      H5Sget_simple_extent_dims(space_id, dims, NULL)
+      shape = getshape(rank, dims)
+      free(dims)
+      H5Sclose(space_id)
+
+      type_id = H5Dget_type(leaf_id)
+      dtype = get_dtype_or_none(type_id)
+      H5Tclose(type_id)
+
+      filters = get_filter_names(leaf_id, ".")
+      size = H5Dget_storage_size(leaf_id)
+    finally:
+      H5Dclose(leaf_id)
+
+    return classid, shape, dtype, filters, size
+
+  def _g_list_path(self, path):
+    """Return a tuple with the groups and the leaves hanging from the
+    `path` group, relative to self."""
+
+    cdef bytes encoded_path
+
+    encoded_path = path.encode('utf-8')
+
+    return Giterate(self.group_id, self.group_id, encoded_path)
+
+
   def _g_flush_group(self):
     # Close the group
     H5Fflush(self.group_id, H5F_SCOPE_GLOBAL)
@@ -1114,6 +1275,21 @@ cdef class Leaf(Node):
   def _get_storage_size(self):
       return H5Dget_storage_size(self.dataset_id)
 
+  def _get_storage_offset(self):
+    """Get the offset of the dataset data in the file.
+
+    None is returned if the data is not stored contiguously in the file
+    (e.g. it is chunked or compact) or if it has not been allocated yet.
+
+    """
+
+    cdef haddr_t offset
+
+    offset = H5Dget_offset(self.dataset_id)
+    if offset == <haddr_t>-1:  # HADDR_UNDEF
+      return None
+    return offset
+
   def _get_obj_track_times(self):
     """Get track_times boolean for dataset
 
@@ -1218,6 +1394,9 @@ cdef class Leaf(Node):
       self.shape = tuple(shape)
     elif classname in ('Table', 'VLArray'):
       self.nrows = size
+      if classname == 'Table':
+        # Set the caches to dirty
+        self._dirtycache = True
     else:
       raise ValueError("Unexpected classname: %s" % classname)
 
@@ -1603,6 +1782,106 @@ cdef class Array(Leaf):
 
     return
 
+  def _g_write_chunk(self, ndarray offset, ndarray data):
+    """Write the already filtered `data` as the chunk at `offset`.
+
+    The `offset` array holds the ``uint64`` coordinates of the first
+    element in the chunk, and the filter pipeline is bypassed.  A
+    `NotImplementedError` is raised if the HDF5 library is too old.
+
+    """
+
+    cdef herr_t ret
+    cdef size_t size = data.nbytes
+
+    with nogil:
+        ret = H5ARRAYwrite_chunk(self.dataset_id, <hsize_t *>offset.data,
+                                 size, data.data)
+    if ret == -2:
+      raise NotImplementedError("direct chunk I/O needs HDF5 1.10.2 or later")
+    if ret < 0:
+      raise HDF5ExtError("Problems writing the chunk.")
+
+  def _g_read_chunk(self, ndarray offset):
+    """Read the chunk at `offset` as stored, with no filters applied.
+
+    A ``(data, filter_mask)`` tuple is returned, where `data` is an
+    ``uint8`` array and the bits set in `filter_mask` are the filters
+    that were skipped for the chunk, or ``None`` if the chunk is not
+    stored yet (some HDF5 versions raise an `HDF5ExtError` instead).
+    The `offset` argument and errors are as in
+    :meth:`Array._g_write_chunk`.
+
+    """
+
+    cdef herr_t ret
+    cdef hsize_t size
+    cdef unsigned filter_mask
+    cdef ndarray data
+
+    ret = H5ARRAYget_chunk_size(self.dataset_id, <hsize_t *>offset.data,
+                                &size)
+    if ret == -2:
+      raise NotImplementedError("direct chunk I/O needs HDF5 1.10.2 or later")
+    if ret < 0:
+      raise HDF5ExtError("Problems getting the chunk size.")
+    if size == 0:
+      return None
+    data = numpy.empty(size, dtype=numpy.uint8)
+    with nogil:
+        ret = H5ARRAYread_chunk(self.dataset_id, <hsize_t *>offset.data,
+                                &filter_mask, data.data)
+    if ret < 0:
+      raise HDF5ExtError("Problems reading the chunk.")
+    return data, filter_mask
+
+  def _g_deflate_chunk(self, ndarray data, int complevel):
+    """Compress the contiguous `data` of a chunk with zlib.
+
+    The result is an ``uint8`` array like the ones filtered by the HDF5
+    deflate filter.  The GIL is released while compressing, so that
+    several chunks can be compressed in parallel threads.
+
+    """
+
+    cdef int ret
+    cdef uLongf size
+    cdef uLong nbytes = data.nbytes
+    cdef ndarray out
+
+    size = compressBound(nbytes)
+    out = numpy.empty(size, dtype=numpy.uint8)
+    with nogil:
+        ret = compress2(<Bytef *>out.data, &size, <Bytef *>data.data,
+                        nbytes, complevel)
+    if ret == Z_MEM_ERROR:
+      raise MemoryError("out of memory compressing the chunk")
+    if ret != Z_OK:
+      raise HDF5ExtError("Problems compressing the chunk.")
+    return out[:size]
+
+  def _g_inflate_chunk(self, ndarray data, ndarray out):
+    """Decompress the zlib `data` of a chunk into the contiguous `out`.
+
+    The number of bytes decompressed is returned, or -1 if `data` is
+    not valid zlib data fitting in `out`.  The GIL is released as in
+    :meth:`Array._g_deflate_chunk`.
+
+    """
+
+    cdef int ret
+    cdef uLongf size = out.nbytes
+    cdef uLong nbytes = data.nbytes
+
+    with nogil:
+        ret = uncompress(<Bytef *>out.data, &size, <Bytef *>data.data,
+                         nbytes)
+    if ret == Z_MEM_ERROR:
+      raise MemoryError("out of memory decompressing the chunk")
+    if ret != Z_OK:
+      return -1
+    return size
+
 
   def _g_read_coords(self, ndarray coords, ndarray nparr):
     """Read coordinates in an already created NumPy array."""
@@ -2052,6 +2331,39 @@ cdef class VLArray(Leaf):
 
     self.nrecords = self.nrecords + 1
 
+  def _append_flat(self, ndarray values, ndarray offsets):
+    cdef int ret
+    cdef hsize_t i, nrows
+    cdef hvl_t *wdata
+    cdef char *vbuf
+    cdef int64_t *obuf
+    cdef size_t atomsize
+
+    # Convert some NumPy types to HDF5 before storing.
+    if self.atom.type == 'time64' and len(values) > 0:
+      self._convert_time64(values, 0)
+
+    # Build the row handlers, pointing to the rows in the values buffer
+    nrows = len(offsets) - 1
+    wdata = <hvl_t *>malloc(<size_t>nrows*sizeof(hvl_t))
+    vbuf = values.data
+    obuf = <int64_t *>offsets.data
+    atomsize = self._atomicsize
+    for i from 0 <= i < nrows:
+      wdata[i].len = obuf[i+1] - obuf[i]
+      wdata[i].p = vbuf + obuf[i]*atomsize
+
+    # Append all the rows at once
+    with nogil:
+        ret = H5VLARRAYappend_rows(self.dataset_id, self.type_id,
+                                   nrows, self.nrecords, wdata)
+    free(wdata)
+
+    if ret < 0:
+      raise HDF5ExtError("Problems appending the records.")
+
+    self.nrecords = self.nrecords + nrows
+
   def _modify(self, hsize_t nrow, ndarray nparr, int nobjects):
     cdef int ret
     cdef void *rbuf
@@ -2096,6 +2408,85 @@ cdef class VLArray(Leaf):
 
     return size
 
+  def _read_array_flat(self, hsize_t start, hsize_t stop, hsize_t step):
+    cdef hsize_t i, nrows
+    cdef size_t nbytes, atomsize
+    cdef herr_t ret
+    cdef hvl_t *rdata
+    cdef hid_t space_id
+    cdef hid_t mem_space_id
+    cdef char *vbuf
+    cdef int64_t *obuf
+    cdef ndarray values, offsets
+
+    # Compute the number of rows to read
+    nrows = get_len_of_range(start, stop, step)
+    if start + nrows > self.nrows:
+      raise HDF5ExtError(
+        "Asking for a range of rows exceeding the available ones!.",
+        h5bt=False)
+
+    # Now, read the chunk of rows
+    with nogil:
+        # Allocate the necessary memory for keeping the row handlers
+        rdata = <hvl_t *>malloc(<size_t>nrows*sizeof(hvl_t))
+        # Get the dataspace handle
+        space_id = H5Dget_space(self.dataset_id)
+        # Create a memory dataspace handle
+        mem_space_id = H5Screate_simple(1, &nrows, NULL)
+        # Select the data to be read
+        H5Sselect_hyperslab(space_id, H5S_SELECT_SET, &start, &step, &nrows,
+                            NULL)
+        # Do the actual read
+        ret = H5Dread(self.dataset_id, self.type_id, mem_space_id, space_id,
+                      H5P_DEFAULT, rdata)
+
+    if ret < 0:
+      raise HDF5ExtError(
+        "VLArray._read_array_flat: Problems reading the array data.")
+
+    # Compute the offsets of rows in the values array
+    offsets = numpy.empty(nrows + 1, dtype='int64')
+    obuf = <int64_t *>offsets.data
+    obuf[0] = 0
+    for i from 0 <= i < nrows:
+      obuf[i+1] = obuf[i] + rdata[i].len
+
+    # Copy all the rows into a single values array
+    shape = (offsets[nrows],) + tuple(self._atomicshape)
+    values = numpy.empty(shape, dtype=self._atomicdtype.base)
+    vbuf = values.data
+    atomsize = self._atomicsize
+    with nogil:
+      for i from 0 <= i < nrows:
+        nbytes = rdata[i].len*atomsize
+        if nbytes > 0:
+          memcpy(vbuf, rdata[i].p, nbytes)
+          vbuf += nbytes
+
+    if self.atom.kind == 'time':
+      # Swap the byteorder by hand (this is not currently supported by HDF5)
+      if H5Tget_order(self.type_id) != platform_byteorder:
+        values.byteswap(True)
+    # Convert some HDF5 types to NumPy after reading.
+    if self.atom.type == 'time64' and len(values) > 0:
+      self._convert_time64(values, 1)
+
+    # Release resources
+    # Reclaim all the (nested) VL data
+    ret = H5Dvlen_reclaim(self.type_id, mem_space_id, H5P_DEFAULT, rdata)
+    if ret < 0:
+      raise HDF5ExtError(
+        "VLArray._read_array_flat: error freeing the data buffer.")
+    # Terminate access to the memory dataspace
+    H5Sclose(mem_space_id)
+    # Terminate access to the dataspace
+    H5Sclose(space_id)
+    # Free the amount of row pointers to VL row data
+    free(rdata)
+
+    return values, offsets
+
   def _read_array(self, hsize_t start, hsize_t stop, hsize_t step):
     cdef int i
     cdef size_t vllen
@@ -2158,7 +2549,7 @@ cdef class VLArray(Leaf):
         if H5Tget_order(self.type_id) != platform_byteorder:
           nparr.byteswap(True)
       # Convert some HDF5 types to NumPy after reading.
-      if self.atom.type == 'time64':
+      if self.atom.type == 'time64' and vllen > 0:
         self._convert_time64(nparr, 1)
       # Append this array to the output list
       datalist.append(nparr)
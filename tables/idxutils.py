@@ -504,6 +504,24 @@ def nextafter(x, direction, dtype, itemsize):
     raise TypeError("data type ``%s`` is not supported" % dtype)
 
 
+def lookup_values(values, dtype):
+    """Get the sorted, distinct `values` that a column of `dtype` may
+    hold, converted to `dtype`.
+
+    Values which change when converted (like ``1.5`` for an integer
+    column or strings longer than the column ones) and NaNs are left
+    out, as they can not be equal to any value in the column.
+
+    """
+
+    values = numpy.asarray(values).ravel()
+    try:
+        converted = values.astype(dtype)
+    except (TypeError, ValueError):
+        raise TypeError("values of type ``%s`` can not be looked up in "
+                        "a column of type ``%s``" % (values.dtype, dtype))
+    return numpy.unique(converted[converted == values])
+
 ## Local Variables:
 ## mode: python
 ## py-indent-offset: 4
@@ -22,13 +22,15 @@ import os.path
 import sys
 import tempfile
 import warnings
+from collections import deque
 
 from time import time, clock
 
 import numpy
 
 from .idxutils import (calc_chunksize, calcoptlevels,
-                             get_reduction_level, nextafter, inftype)
+                             get_reduction_level, nextafter, inftype,
+                             lookup_values)
 
 from . import indexesextension
 from .node import NotLoggedMixin
@@ -40,7 +42,7 @@ from .indexes import CacheArray, LastRowArray, IndexArray
 from .group import Group
 from .path import join_path
 from .exceptions import PerformanceWarning
-from .utils import is_idx, idx2long, lazyattr
+from .utils import is_idx, idx2long, lazyattr, Task
 from .utilsextension import (nan_aware_gt, nan_aware_ge,
                                    nan_aware_lt, nan_aware_le,
                                    bisect_left, bisect_right)
@@ -56,6 +58,9 @@ from six.moves import range
 obversion = "2.1"     # Version of indexes in PyTables Pro 2.1 and up series,
                       # including the join 2.3 Std + Pro version
 
+# The maximum number of reverse indices read at once by get_chunkmap()
+chunkmap_buffer_size = 2**20
+
 
 debug = False
 # debug = True  # Uncomment this for printing sizes purposes
@@ -289,6 +294,9 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         if self.indsize < 8:
             # An index that is not full cannot be completely sorted
             return False
+        if self.ndelta > 0:
+            # Rows in delta runs are only sorted within their run
+            return False
         # Try with the 'is_csi' attribute
         if 'is_csi' in self._v_attrs:
             return self._v_attrs.is_csi
@@ -390,6 +398,18 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         self.noverlaps = -1
         """The number of overlaps in an index.  0 means a completely
         sorted index. -1 means that this number is not computed yet."""
+        self.ndelta = 0
+        """The number of rows in delta runs (see :meth:`Index.compact`)."""
+        self._deltas = None
+        """Cache of the ``(sorted, indices, runstarts)`` of delta runs."""
+        self._deltacoords = None
+        """The coordinates in delta runs found by the last search."""
+        self._searchitem = None
+        """The item of the last search."""
+        self._rangeschunkmap = None
+        """The merged chunkmap of the last search of several ranges."""
+        self._chunkmapbuf = None
+        """The buffer for reverse indices used by :meth:`get_chunkmap`."""
         self.tprof = 0
         """Time counter for benchmarking purposes."""
 
@@ -452,6 +472,8 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
             # All bounds values (+begin + end) are at the end of sortedLR
             self.bebounds = self.sortedLR[
                 nelementsSLR:nelementsSLR + nboundsLR]
+            if 'sortedDR' in self._v_children:
+                self.ndelta = self.sortedDR.nrows
             return
 
         # The index is new. Initialize the values
@@ -562,6 +584,23 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         if profile:
             show_stats("Entering initial_append", tref)
         arr = xarr.pop()
+        idx = self.initial_indices(arr, nrow)
+        larr, arr, idx = self.sort_slice(arr, idx, reduction)
+        # A completely sorted index is not longer possible after an
+        # append of an index with already one slice.
+        if nrow > 0:
+            self._v_attrs.is_csi = False
+        if profile:
+            show_stats("Exiting initial_append", tref)
+        return larr, arr, idx
+
+    def initial_indices(self, arr, nrow):
+        """Compute the indices array for the values in `arr`.
+
+        The values in `arr` are meant to be appended as the `nrow` slice.
+
+        """
+
         indsize = self.indsize
         slicesize = self.slicesize
         nelementsILR = self.nelementsILR
@@ -609,6 +648,18 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
             assert len(arr) > nelementsILR
             self.read_slice_lr(self.sortedLR, arr[:nelementsILR])
             self.read_slice_lr(self.indicesLR, idx[:nelementsILR])
+        return idx
+
+    def sort_slice(self, arr, idx, reduction):
+        """Sort `arr` and `idx` in-place and apply the `reduction`.
+
+        This does not access the file, so it can be called from other
+        threads.
+
+        """
+
+        if profile:
+            tref = time()
         # In-place sorting
         if profile:
             show_stats("Before keysort", tref)
@@ -625,12 +676,6 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
             arr = reduc
             if profile:
                 show_stats("After arr <-- reduc", tref)
-        # A completely sorted index is not longer possible after an
-        # append of an index with already one slice.
-        if nrow > 0:
-            self._v_attrs.is_csi = False
-        if profile:
-            show_stats("Exiting initial_append", tref)
         return larr, arr, idx
 
     def final_idx32(self, idx, offset):
@@ -653,6 +698,14 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
             show_stats("Exiting final_idx32", tref)
         return idx
 
+    def _append_target(self, update):
+        """Get the group receiving appended slices and its reduction."""
+
+        if not update and self.temp_required:
+            # The reduction will take place *after* the optimization process
+            return self.tmp, 1
+        return self, self.reduction
+
     def append(self, xarr, update=False):
         """Append the array to the index objects."""
 
@@ -660,13 +713,61 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
             tref = time()
         if profile:
             show_stats("Entering append", tref)
-        if not update and self.temp_required:
-            where = self.tmp
-            # The reduction will take place *after* the optimization process
-            reduction = 1
-        else:
-            where = self
-            reduction = self.reduction
+        where, reduction = self._append_target(update)
+        nrows = where.sorted.nrows  # before sorted.append()
+        larr, arr, idx = self.initial_append(xarr, nrows, reduction)
+        self._append_sorted(where, reduction, nrows, larr, arr, idx)
+        if profile:
+            show_stats("Exiting append", tref)
+
+    def append_slices(self, arrays, update=False, nthreads=1):
+        """Append the slices in `arrays` to the index objects.
+
+        This is equivalent to calling :meth:`Index.append` for every
+        array in the `arrays` iterable, but up to `nthreads` slices are
+        sorted in background threads while the next ones are read and the
+        sorted ones are saved.  The HDF5 library is only called from the
+        calling thread, and at most ``nthreads + 1`` slices are kept in
+        memory.
+
+        """
+
+        if nthreads <= 1 or (self.indsize == 8 and self.nelementsILR > 0):
+            # The values in LR must be merged into the first slice
+            for arr in arrays:
+                self.append([arr], update=update)
+            return
+
+        where, reduction = self._append_target(update)
+        nrow = where.sorted.nrows
+        tasks = deque()
+        try:
+            for arr in arrays:
+                idx = self.initial_indices(arr, nrow + len(tasks))
+                if nrow + len(tasks) > 0:
+                    # See initial_append()
+                    self._v_attrs.is_csi = False
+                task = Task(self.sort_slice, arr, idx, reduction)
+                task.start()
+                tasks.append(task)
+                if len(tasks) < nthreads:
+                    continue
+                larr, arr, idx = tasks.popleft().result()
+                self._append_sorted(where, reduction, nrow, larr, arr, idx)
+                nrow += 1
+            while tasks:
+                larr, arr, idx = tasks.popleft().result()
+                self._append_sorted(where, reduction, nrow, larr, arr, idx)
+                nrow += 1
+        finally:
+            for task in tasks:
+                task.join()
+
+    def _append_sorted(self, where, reduction, nrows, larr, arr, idx):
+        """Save a sorted slice as the `nrows` slice in `where`."""
+
+        if profile:
+            tref = time()
         sorted = where.sorted
         indices = where.indices
         ranges = where.ranges
@@ -677,8 +778,6 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         zbounds = where.zbounds
         sortedLR = where.sortedLR
         indicesLR = where.indicesLR
-        nrows = sorted.nrows  # before sorted.append()
-        larr, arr, idx = self.initial_append(xarr, nrows, reduction)
         # Save the sorted array
         sorted.append(arr.reshape(1, arr.size))
         cs = self.chunksize // reduction
@@ -709,6 +808,7 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         self.nelements = self.nrows * self.slicesize
         self.nelementsSLR = 0  # reset the counter of the last row index to 0
         self.nelementsILR = 0  # reset the counter of the last row index to 0
+        self._drop_deltas()  # rows in delta runs are in the slices now
         # The number of elements will be saved as an attribute.
         # This is necessary in case the LR arrays can remember its values
         # after a possible node preemtion/reload.
@@ -716,7 +816,7 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         indicesLR.attrs.nelements = self.nelementsILR
         self.dirtycache = True   # the cache is dirty now
         if profile:
-            show_stats("Exiting append", tref)
+            show_stats("Exiting _append_sorted", tref)
 
     def append_last_row(self, xarr, update=False):
         """Append the array to the last row index objects."""
@@ -762,10 +862,115 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         self.nelements = nrows * self.slicesize + nelementsILR
         self.nelementsILR = nelementsILR
         self.nelementsSLR = nelementsSLR
+        self._drop_deltas()  # rows in delta runs are in the last row now
         self.dirtycache = True   # the cache is dirty now
         if profile:
             show_stats("Exiting appendLR", tref)
 
+    def append_delta(self, arr, start):
+        """Add the values in `arr` for the rows following `start` as a
+        new delta run.
+
+        A delta run holds the values of some rows following the ones in
+        the last row of the index, sorted on their own, so that adding a
+        few rows does not require sorting the whole last row again.
+        Delta runs are looked up by searches along with the rest of the
+        index, and they are merged into the last row by
+        :meth:`Index.compact`.
+
+        """
+
+        assert start == self.nelements + self.ndelta, \
+            "delta rows must follow the already indexed rows"
+        order = numpy.argsort(arr, kind='mergesort')
+        sorted = arr[order].astype(self.dtype, copy=False)
+        indices = order.astype('int64')
+        indices += start
+        if 'sortedDR' not in self._v_children:
+            EArray(self, 'sortedDR', Atom.from_dtype(self.dtype), (0,),
+                   "Sorted delta rows", self.filters,
+                   chunkshape=(self.chunksize,))
+            EArray(self, 'indicesDR', UIntAtom(itemsize=8), (0,),
+                   "Reverse indices of delta rows", self.filters,
+                   chunkshape=(self.chunksize,))
+            self.sortedDR.attrs.runstarts = numpy.zeros(0, dtype='int64')
+        runstarts = numpy.append(self.sortedDR.attrs.runstarts, self.ndelta)
+        self.sortedDR.append(sorted)
+        self.indicesDR.append(indices)
+        self.sortedDR.attrs.runstarts = runstarts
+        self.ndelta += len(sorted)
+        self._deltas = None
+
+    @property
+    def ndeltaruns(self):
+        """The number of delta runs in the index."""
+
+        if self.ndelta == 0:
+            return 0
+        return len(self.sortedDR.attrs.runstarts)
+
+    def _drop_deltas(self):
+        """Forget the delta runs, whose rows have been indexed elsewhere."""
+
+        if self.ndelta > 0:
+            self.sortedDR.truncate(0)
+            self.indicesDR.truncate(0)
+            self.sortedDR.attrs.runstarts = numpy.zeros(0, dtype='int64')
+        self.ndelta = 0
+        self._deltas = None
+        self._deltacoords = None
+
+    def _get_deltas(self):
+        """Get the sorted values, indices and run starts of delta runs."""
+
+        if self._deltas is None:
+            self._deltas = (self.sortedDR.read(), self.indicesDR.read(),
+                            self.sortedDR.attrs.runstarts)
+        return self._deltas
+
+    def _search_deltas(self, item):
+        """Search `item` in the delta runs and return the number of
+        matches.  Their coordinates are kept for :meth:`get_chunkmap`."""
+
+        if self.ndelta == 0 or not item:
+            self._deltacoords = None
+            return 0
+        sorted, indices, runstarts = self._get_deltas()
+        runstops = numpy.append(runstarts[1:], len(sorted))
+        coords = []
+        for start, stop in zip(runstarts, runstops):
+            run = sorted[start:stop]
+            lo = numpy.searchsorted(run, item[0], 'left')
+            hi = numpy.searchsorted(run, item[1], 'right')
+            if hi > lo:
+                coords.append(indices[start + lo:start + hi])
+        if coords:
+            self._deltacoords = numpy.concatenate(coords)
+        else:
+            self._deltacoords = numpy.empty(0, dtype='uint64')
+        return len(self._deltacoords)
+
+    def compact(self):
+        """Merge the delta runs into the last row of the index.
+
+        This is done automatically once there are more delta runs than
+        the :data:`parameters.MAX_INDEX_DELTA_RUNS` parameter, before
+        reading the values of the index in sorted order, and when its
+        table is closed.
+
+        .. versionadded:: 3.5
+
+        """
+
+        if self.ndelta == 0:
+            return
+        table = self.table
+        startLR = self.sorted.nrows * self.slicesize
+        stopLR = self.nelements + self.ndelta
+        self.append_last_row(
+            [table._read(startLR, stopLR, 1, self.column.pathname)],
+            update=True)
+
 
     def optimize(self, verbose=False):
         """Optimize an index so as to allow faster searches.
@@ -1817,6 +2022,10 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
                                          'last row chunks')
         """A cache for the last row chunks. Only used for searches in
         the last row, and mainly useful for small indexes."""
+        self.chunkmapcache = ObjectCache(params['CHUNKMAP_MAX_SLOTS'],
+                                         params['CHUNKMAP_MAX_SIZE'],
+                                         'chunkmaps')
+        """A cache for the chunkmaps of the last searched items."""
         self.starts = numpy.empty(shape=self.nrows, dtype=numpy.int32)
         self.lengths = numpy.empty(shape=self.nrows, dtype=numpy.int32)
         self.sorted._init_sorted_slice(self)
@@ -1825,13 +2034,23 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
     def search(self, item):
         """Do a binary search in this index for an item."""
 
+        if self.dirtycache:
+            self.restorecache()
+        if item and isinstance(item[0], tuple):
+            return self._search_ranges(item)
+        return self._search(item)
+
+    def _search(self, item, cache=True):
+        """Search for a ``(lo, hi)`` range, keeping its bounds in the
+        limits cache if `cache` is true."""
+
         if profile:
             tref = time()
         if profile:
             show_stats("Entering search", tref)
 
-        if self.dirtycache:
-            self.restorecache()
+        self._searchitem = item
+        self._rangeschunkmap = None
 
         # An empty item or if left limit is larger than the right one
         # means that the number of records is always going to be empty,
@@ -1840,6 +2059,7 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         if not item or item[0] > item[1]:
             self.starts[:] = 0
             self.lengths[:] = 0
+            self._deltacoords = None
             return 0
 
         tlen = 0
@@ -1855,7 +2075,7 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
                 self.starts[nrow2] = start
                 self.lengths[nrow2] = length
                 tlen = tlen + length
-            return tlen
+            return tlen + self._search_deltas(item)
         # The item is not in cache. Do the real lookup.
         sorted = self.sorted
         if self.nslices > 0:
@@ -1901,7 +2121,7 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
             self.lengths[-1] = stop - start
             tlen += stop - start
 
-        if self.limboundscache.couldenablecache():
+        if cache and self.limboundscache.couldenablecache():
             # Get a startlengths tuple and save it in cache.
             # This is quite slow, but it is a good way to compress
             # the bounds info. Moreover, the .couldenablecache()
@@ -1920,7 +2140,7 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
 
         if profile:
             show_stats("Exiting search", tref)
-        return tlen
+        return tlen + self._search_deltas(item)
 
     # This is an scalar version of search. It works with strings as well.
     def search_scalar(self, item, sorted):
@@ -2006,66 +2226,151 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         return (start, stop)
 
 
+    def _search_ranges(self, ranges):
+        """Search for several ``(lo, hi)`` ranges at once.
+
+        The chunkmaps of all the ranges are merged into the one returned
+        by :meth:`get_chunkmap`, and the number of matches in every range
+        is returned.  Only the merged chunkmap is cached, so that long
+        lists of values do not push other entries out of the caches.
+
+        """
+
+        key = ('ranges', ranges, self.ndelta)
+        nslot = self.chunkmapcache.getslot(key)
+        if nslot >= 0:
+            tlen, chunkmap = self.chunkmapcache.getitem(nslot)
+        else:
+            tlen, chunkmap = 0, None
+            for i, range_ in enumerate(ranges):
+                ncoords = self._search(range_, cache=False)
+                tlen += ncoords
+                if ncoords > 0 or self.reduction > 1:
+                    if chunkmap is None:
+                        chunkmap = self._compute_chunkmap()
+                    else:
+                        chunkmap |= self._compute_chunkmap()
+                # Every chunk is already selected, so stop looking
+                if i % 64 == 63 and chunkmap is not None and chunkmap.all():
+                    break
+            if chunkmap is None:
+                nelements = self.nelements + self.ndelta
+                chunkmap = numpy.zeros(
+                    int(math.ceil(float(nelements) / self.nrowsinchunk)),
+                    dtype='bool')
+            chunkmap.flags.writeable = False
+            self.chunkmapcache.setitem(key, (tlen, chunkmap),
+                                       chunkmap.nbytes)
+        self._searchitem = ranges
+        self._rangeschunkmap = chunkmap
+        return tlen
+
     def get_chunkmap(self):
         """Compute a map with the interesting chunks in index."""
 
+        if self._rangeschunkmap is not None:
+            # Already computed by the last search
+            return self._rangeschunkmap
         if profile:
             tref = time()
         if profile:
             show_stats("Entering get_chunkmap", tref)
-        ss = self.slicesize
-        nsb = self.nslicesblock
+        # Delta runs are only appended to, so their length identifies them
+        key = (self._searchitem, self.ndelta)
+        nslot = self.chunkmapcache.getslot(key)
+        if nslot >= 0:
+            return self.chunkmapcache.getitem(nslot)
+        chunkmap = self._compute_chunkmap()
+        chunkmap.flags.writeable = False
+        self.chunkmapcache.setitem(key, chunkmap, chunkmap.nbytes)
+        if profile:
+            show_stats("Exiting get_chunkmap", tref)
+        return chunkmap
+
+    def _compute_chunkmap(self):
+        """Compute the chunkmap of the last search (with no caching)."""
+
         nslices = self.nslices
         lbucket = self.lbucket
-        indsize = self.indsize
-        bucketsinblock = float(self.blocksize) / lbucket
-        nchunks = int(math.ceil(float(self.nelements) / lbucket))
+        nelements = self.nelements + self.ndelta
+        nchunks = int(math.ceil(float(nelements) / lbucket))
         chunkmap = numpy.zeros(shape=nchunks, dtype="bool")
         reduction = self.reduction
-        starts = (self.starts - 1) * reduction + 1
-        stops = (self.starts + self.lengths) * reduction
+        starts = (self.starts.astype('int64') - 1) * reduction + 1
+        stops = (self.starts + self.lengths.astype('int64')) * reduction
         starts[starts < 0] = 0    # All negative values set to zero
-        indices = self.indices
-        for nslice in range(self.nrows):
-            start = starts[nslice]
-            stop = stops[nslice]
-            if stop > start:
-                idx = numpy.empty(shape=stop - start, dtype='u%d' % indsize)
-                if nslice < nslices:
-                    indices._read_index_slice(nslice, start, stop, idx)
-                else:
-                    self.indicesLR._read_index_slice(start, stop, idx)
-                if indsize == 8:
-                    idx //= lbucket
-                elif indsize == 2:
-                    # The chunkmap size cannot be never larger than 'int_'
-                    idx = idx.astype("int_")
-                    offset = int((nslice // nsb) * bucketsinblock)
-                    idx += offset
-                elif indsize == 1:
-                    # The chunkmap size cannot be never larger than 'int_'
-                    idx = idx.astype("int_")
-                    offset = (nslice * ss) // lbucket
-                    idx += offset
-                chunkmap[idx] = True
+        nrows = numpy.flatnonzero(stops > starts)
+        # The slices are read in batches that fit in the buffer
+        nrowsSL = nrows[nrows < nslices]
+        lengths = stops[nrowsSL] - starts[nrowsSL]
+        bufsize = max(self.slicesize, chunkmap_buffer_size)
+        ends = numpy.cumsum(lengths)
+        first = 0
+        while first < len(nrowsSL):
+            last = numpy.searchsorted(ends, ends[first] - lengths[first] +
+                                      bufsize, 'right')
+            batch = nrowsSL[first:last]
+            idx = self._get_chunkmap_buffer(ends[last - 1] - ends[first] +
+                                            lengths[first])
+            self.indices._read_index_slices(
+                batch.astype('uint64'), starts[batch].astype('uint64'),
+                stops[batch].astype('uint64'), idx)
+            self._mark_buckets(chunkmap, idx, batch, lengths[first:last])
+            first = last
+        if len(nrows) > len(nrowsSL):
+            # The last row
+            start, stop = starts[nslices], stops[nslices]
+            idx = self._get_chunkmap_buffer(stop - start)
+            self.indicesLR._read_index_slice(start, stop, idx)
+            self._mark_buckets(chunkmap, idx, nrows[-1:], [stop - start])
+        if self._deltacoords is not None:
+            chunkmap[self._deltacoords // lbucket] = True
         # The case lbucket < nrowsinchunk should only happen in tests
         nrowsinchunk = self.nrowsinchunk
         if lbucket != nrowsinchunk:
             # Map the 'coarse grain' chunkmap into the 'true' chunkmap
-            nelements = self.nelements
             tnchunks = int(math.ceil(float(nelements) / nrowsinchunk))
-            tchunkmap = numpy.zeros(shape=tnchunks, dtype="bool")
             ratio = float(lbucket) / nrowsinchunk
             idx = chunkmap.nonzero()[0]
             starts = (idx * ratio).astype('int_')
             stops = numpy.ceil((idx + 1) * ratio).astype('int_')
-            for i in range(len(idx)):
-                tchunkmap[starts[i]:stops[i]] = True
-            chunkmap = tchunkmap
-        if profile:
-            show_stats("Exiting get_chunkmap", tref)
+            stops[stops > tnchunks] = tnchunks
+            # Every bucket covers the chunks in [start, stop)
+            covers = (numpy.bincount(starts, minlength=tnchunks + 1) -
+                      numpy.bincount(stops, minlength=tnchunks + 1))
+            chunkmap = numpy.cumsum(covers[:tnchunks]) > 0
         return chunkmap
 
+    def _get_chunkmap_buffer(self, size):
+        """Get a buffer for `size` reverse indices for
+        :meth:`get_chunkmap`."""
+
+        buf = self._chunkmapbuf
+        if buf is None or len(buf) < size:
+            buf = numpy.empty(shape=size, dtype='u%d' % self.indsize)
+            self._chunkmapbuf = buf
+        return buf[:size]
+
+    def _mark_buckets(self, chunkmap, idx, nrows, lengths):
+        """Mark in `chunkmap` the buckets of the reverse indices `idx`
+        read from the `nrows` slices, with the given `lengths`."""
+
+        indsize = self.indsize
+        if indsize == 8:
+            idx = idx // self.lbucket
+        elif indsize in (1, 2):
+            # The chunkmap size cannot be never larger than 'int_'
+            nrows = numpy.asarray(nrows, dtype='int_')
+            if indsize == 2:
+                bucketsinblock = float(self.blocksize) / self.lbucket
+                offsets = ((nrows // self.nslicesblock) *
+                           bucketsinblock).astype('int_')
+            else:
+                offsets = (nrows * self.slicesize) // self.lbucket
+            idx = idx.astype('int_')
+            idx += numpy.repeat(offsets, lengths)
+        chunkmap[idx] = True
+
     def get_lookup_range(self, ops, limits):
         assert len(ops) in [1, 2]
         assert len(limits) in [1, 2]
@@ -2075,6 +2380,17 @@ class Index(NotLoggedMixin, Group, indexesextension.Index):
         coldtype = column.dtype.base
         itemsize = coldtype.itemsize
 
+        if ops == ('in',):
+            # Look for every value in the limit, which is a sequence
+            values = lookup_values(limits[0], coldtype)
+            lows = highs = values
+            if coldtype.kind in 'biu' and len(values) > 1:
+                # Runs of consecutive integers can be searched at once
+                breaks = numpy.flatnonzero(numpy.diff(values) != 1) + 1
+                lows = values[numpy.append(0, breaks)]
+                highs = values[numpy.append(breaks - 1, len(values) - 1)]
+            return tuple(zip(lows.tolist(), highs.tolist()))
+
         if len(limits) == 1:
             assert ops[0] in ['lt', 'le', 'eq', 'ge', 'gt']
             limit = limits[0]
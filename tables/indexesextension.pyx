@@ -64,6 +64,9 @@ cdef extern from "H5ARRAY-opt.h" nogil:
   herr_t H5ARRAYOread_readSlice(
     hid_t dataset_id, hid_t type_id,
     hsize_t irow, hsize_t start, hsize_t stop, void *data)
+  herr_t H5ARRAYOread_readSlices(
+    hid_t dataset_id, hid_t type_id, size_t nslices,
+    hsize_t *irows, hsize_t *starts, hsize_t *stops, void *data)
   herr_t H5ARRAYOread_readSortedSlice(
     hid_t dataset_id, hid_t mem_space_id, hid_t type_id,
     hsize_t irow, hsize_t start, hsize_t stop, void *data)
@@ -150,46 +153,61 @@ def keysort(ndarray array1, ndarray array2):
     array1 can be of any type, except complex or string.  array2 may be made of
     elements on any size.
 
+    The GIL is released while sorting, so that several arrays can be
+    sorted in parallel threads.
+
     """
     cdef size_t size = cnp.PyArray_SIZE(array1)
     cdef size_t elsize1 = cnp.PyArray_ITEMSIZE(array1)
     cdef size_t elsize2 = cnp.PyArray_ITEMSIZE(array2)
     cdef int type_num = cnp.PyArray_TYPE(array1)
+    cdef char *data1 = array1.data
+    cdef char *data2 = array2.data
+    cdef int ret
+
+    with nogil:
+        ret = _keysort_any(type_num, data1, elsize1, data2, elsize2, size)
+    if ret < 0:
+        raise ValueError("Unknown array datatype")
 
+
+cdef int _keysort_any(int type_num, char *data1, size_t elsize1,
+                      char *data2, size_t elsize2, size_t size) nogil:
     # floating types
     if type_num == cnp.NPY_FLOAT16:
-        _keysort[npy_float16](<npy_float16*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_float16](<npy_float16*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_FLOAT32:
-        _keysort[npy_float32](<npy_float32*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_float32](<npy_float32*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_FLOAT64:
-        _keysort[npy_float64](<npy_float64*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_float64](<npy_float64*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_LONGDOUBLE:
-        _keysort[npy_longdouble](<npy_longdouble*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_longdouble](<npy_longdouble*>data1, data2, elsize2, size)
     # signed integer types
     elif type_num == cnp.NPY_INT8:
-        _keysort[npy_int8](<npy_int8*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_int8](<npy_int8*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_INT16:
-        _keysort[npy_int16](<npy_int16*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_int16](<npy_int16*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_INT32:
-        _keysort[npy_int32](<npy_int32*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_int32](<npy_int32*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_INT64:
-        _keysort[npy_int64](<npy_int64*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_int64](<npy_int64*>data1, data2, elsize2, size)
     # unsigned integer types
     elif type_num == cnp.NPY_UINT8:
-        _keysort[npy_uint8](<npy_uint8*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_uint8](<npy_uint8*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_UINT16:
-        _keysort[npy_uint16](<npy_uint16*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_uint16](<npy_uint16*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_UINT32:
-        _keysort[npy_uint32](<npy_uint32*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_uint32](<npy_uint32*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_UINT64:
-        _keysort[npy_uint64](<npy_uint64*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_uint64](<npy_uint64*>data1, data2, elsize2, size)
     # other
     elif type_num == cnp.NPY_BOOL:
-        _keysort[npy_bool](<npy_bool*>array1.data, array2.data, elsize2, size)
+        _keysort[npy_bool](<npy_bool*>data1, data2, elsize2, size)
     elif type_num == cnp.NPY_STRING:
-        _keysort_string(array1.data, elsize1, array2.data, elsize2, size)
+        _keysort_string(data1, elsize1, data2, elsize2, size)
     else:
-        raise ValueError("Unknown array datatype")
+        return -1
+    return 0
 
 
 cdef inline void swap_bytes(char *x, char *y, size_t n) nogil:
@@ -616,6 +634,30 @@ cdef class IndexArray(Array):
       raise HDF5ExtError("Problems reading the index indices.")
 
 
+  def _read_index_slices(self, ndarray irows, ndarray starts,
+                         ndarray stops, ndarray idx):
+    """Read the ``[starts[i], stops[i])`` indices of every ``irows[i]``
+    slice into `idx`, one after the other.
+
+    This is a single call from Python, but one hyperslab is still read
+    for every slice (reusing the same dataspaces).  The `irows`, `starts`
+    and `stops` arrays must be contiguous ``uint64`` ones.
+
+    """
+
+    cdef herr_t ret
+    cdef size_t nslices = irows.shape[0]
+
+    with nogil:
+        ret = H5ARRAYOread_readSlices(self.dataset_id, self.type_id, nslices,
+                                      <hsize_t *>irows.data,
+                                      <hsize_t *>starts.data,
+                                      <hsize_t *>stops.data, idx.data)
+
+    if ret < 0:
+      raise HDF5ExtError("Problems reading the index indices.")
+
+
   def _init_sorted_slice(self, index):
     """Initialize the structures for doing a binary search."""
 
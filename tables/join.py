@@ -0,0 +1,569 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  PyTables Developers
+#
+# $Id$
+#
+########################################################################
+
+"""Joins between tables.
+
+Functions:
+
+`join`
+    Join the rows of two tables into a new table.
+
+"""
+from __future__ import absolute_import
+
+import os
+import math
+import tempfile
+
+import numpy
+import six
+from six.moves import range
+
+from .utilsextension import get_nested_field
+
+
+_MAX_CACHED_KEYS = 4096
+"""The number of keys whose chunks are remembered by index lookups."""
+
+_LOOKUP_MAX_READS = 2
+"""The times the chunks of the right table may be read (on average) by
+an index lookup join before switching to a hash join."""
+
+_HASH_MULTIPLIER = numpy.uint64(0x9E3779B97F4A7C15)
+"""Fibonacci hashing multiplier for spreading keys among partitions."""
+
+
+def _hash_keys(keys):
+    """Get a 64-bit hash of every key in `keys`.
+
+    Equal keys always get the same hash, whatever the type they come
+    from, as long as they have been cast to a common type.
+
+    """
+
+    kind = keys.dtype.kind
+    if kind == 'S':
+        # FNV-1a over the bytes of every key
+        codes = numpy.ascontiguousarray(keys).view('u1').reshape(
+            len(keys), keys.dtype.itemsize)
+        hashes = numpy.empty(len(keys), dtype='u8')
+        hashes.fill(0xcbf29ce484222325)
+        with numpy.errstate(over='ignore'):
+            for column in codes.T:
+                hashes ^= column
+                hashes *= numpy.uint64(0x100000001b3)
+    elif kind in 'fc':
+        # Positive and negative zeros are equal keys
+        hashes = (keys + 0).astype('f8', copy=False).real.view('u8')
+    else:
+        hashes = keys.astype('u8')
+    with numpy.errstate(over='ignore'):
+        return hashes * _HASH_MULTIPLIER
+
+
+def _match(lkeys, rkeys, outer=False):
+    """Get the pairs of positions of `lkeys` and `rkeys` with equal keys.
+
+    The `rkeys` must be sorted.  Two arrays ``(lpos, rpos)`` with the
+    positions of matching keys are returned, with the pairs for every
+    left key together and in order.  If `outer` is true, keys in `lkeys`
+    with no match are also returned, paired with a -1 position.  NaN
+    keys never match.
+
+    """
+
+    lo = numpy.searchsorted(rkeys, lkeys, 'left')
+    counts = numpy.searchsorted(rkeys, lkeys, 'right') - lo
+    if lkeys.dtype.kind in 'fc':
+        counts[numpy.isnan(lkeys)] = 0
+    if outer:
+        nmatches = numpy.maximum(counts, 1)
+    else:
+        nmatches = counts
+    lpos = numpy.repeat(numpy.arange(len(lkeys)), nmatches)
+    # Positions in rkeys go from lo to lo + counts for every left key
+    firsts = numpy.cumsum(nmatches) - nmatches
+    rpos = numpy.arange(len(lpos)) - numpy.repeat(firsts - lo, nmatches)
+    if outer:
+        rpos[numpy.repeat(counts == 0, nmatches)] = -1
+    return lpos, rpos
+
+
+class _Joiner(object):
+    """Writer of the rows resulting from a join to a new table."""
+
+    def __init__(self, left, right, lkey, rkey, how, suffixes):
+        self.left = left
+        self.right = right
+        self.lkey = lkey
+        self.rkey = rkey
+        self.outer = (how == 'left')
+
+        ldtype, rdtype = left.dtype, right.dtype
+        lkeytype, rkeytype = left.coldtypes[lkey], right.coldtypes[rkey]
+        if lkeytype.shape != () or rkeytype.shape != ():
+            raise ValueError("join columns must have scalar values")
+        if (lkeytype.kind == 'S') != (rkeytype.kind == 'S'):
+            raise TypeError("join columns ``%s`` and ``%s`` have "
+                            "incompatible types" % (lkey, rkey))
+        self.keytype = numpy.result_type(lkeytype, rkeytype)
+        """The type both keys are cast to for comparing them."""
+
+        # The right key is redundant when both keys share the name
+        rnames = [name for name in rdtype.names
+                  if not (name == rkey and rkey == lkey)]
+        clashes = set(ldtype.names) & set(rnames)
+        fields, self.lfields, self.rfields = [], [], []
+        for names, dtype, suffix, pairs in [
+                (ldtype.names, ldtype, suffixes[0], self.lfields),
+                (rnames, rdtype, suffixes[1], self.rfields)]:
+            for name in names:
+                outname = name + suffix if name in clashes else name
+                fields.append((outname, dtype.fields[name][0]))
+                pairs.append((outname, name))
+        self.dtype = numpy.dtype(fields)
+        """The type of the rows in the result."""
+
+        defaults = right._v_wdflts
+        if defaults is None:
+            defaults = numpy.zeros(1, dtype=rdtype)
+        self.rdefaults = defaults
+        """The values of right columns for unmatched left rows."""
+        self.output = None
+        self.nrowsinbuf = max(left.nrowsinbuf, 1)
+
+    def keys(self, rows, colname):
+        """Get the keys in `rows` as the common type of keys."""
+
+        return get_nested_field(rows, colname).astype(self.keytype,
+                                                      copy=False)
+
+    def create_output(self, where, name, **kwargs):
+        """Create the table for the result."""
+
+        kwargs.setdefault('expectedrows', self.left.nrows)
+        self.output = self.left._v_file.create_table(where, name, self.dtype,
+                                                     **kwargs)
+        return self.output
+
+    def write(self, lrows, rrows, lpos, rpos):
+        """Write the pairs of rows at `lpos` in `lrows` and `rpos` in
+        `rrows` (-1 meaning no right row) to the output."""
+
+        if len(lpos) == 0:
+            return
+        if self.outer:
+            # Unmatched rows get the defaults at the end of rrows
+            rrows = numpy.concatenate((rrows, self.rdefaults))
+            rpos = numpy.where(rpos < 0, len(rrows) - 1, rpos)
+        nrowsinbuf = self.nrowsinbuf
+        for start in range(0, len(lpos), nrowsinbuf):
+            lsel = lrows[lpos[start:start + nrowsinbuf]]
+            rsel = rrows[rpos[start:start + nrowsinbuf]]
+            result = numpy.empty(len(lsel), dtype=self.dtype)
+            for outname, name in self.lfields:
+                result[outname] = lsel[name]
+            for outname, name in self.rfields:
+                result[outname] = rsel[name]
+            self.output.append(result)
+
+    def join_rows(self, lrows, rrows, rkeys=None, rorder=None):
+        """Join `lrows` against all the matching `rrows`.
+
+        If given, `rkeys` are the sorted keys of `rrows`, and `rorder`
+        the positions of `rrows` in that order.
+
+        """
+
+        if rkeys is None:
+            rkeys = self.keys(rrows, self.rkey)
+            rorder = numpy.argsort(rkeys, kind='mergesort')
+            rkeys = rkeys[rorder]
+        lpos, rpos = _match(self.keys(lrows, self.lkey), rkeys, self.outer)
+        if len(rorder) > 0:
+            rpos = numpy.where(rpos < 0, -1, rorder[rpos])
+        self.write(lrows, rrows, lpos, rpos)
+
+    # Merge join
+    # ~~~~~~~~~~
+    def _sorted_buffers(self, index, pending):
+        """Iterate over the ``(keys, coords)`` of a table in the order of
+        its CSI `index`, a buffer at a time.
+
+        NaN keys (which come last) are not yielded, and their coordinates
+        are added to the `pending` list instead.
+
+        """
+
+        nelements, nrowsinbuf = index.nelements, self.nrowsinbuf
+        for start in range(0, nelements, nrowsinbuf):
+            stop = min(start + nrowsinbuf, nelements)
+            keys = index.read_sorted(start, stop).astype(self.keytype)
+            coords = index.read_indices(start, stop).astype(numpy.int64)
+            if keys.dtype.kind in 'fc':
+                nans = numpy.isnan(keys)
+                if nans.any():
+                    pending.append(coords[nans])
+                    keys, coords = keys[~nans], coords[~nans]
+            yield keys, coords
+
+    def _read_rows(self, table, coords):
+        """Read the rows at `coords` (in that order)."""
+
+        order = numpy.argsort(coords, kind='mergesort')
+        rows = table._read_coordinates(coords[order])
+        result = numpy.empty_like(rows)
+        result[order] = rows
+        return result
+
+    def _join_sorted(self, lkeys, lcoords, rkeys, rcoords):
+        if len(lkeys) == 0 or (len(rkeys) == 0 and not self.outer):
+            return
+        lpos, rpos = _match(lkeys, rkeys, self.outer)
+        if len(lpos) == 0:
+            return
+        lrows = self._read_rows(self.left, lcoords)
+        rrows = self._read_rows(self.right, rcoords)
+        self.write(lrows, rrows, lpos, rpos)
+
+    def merge(self, lindex, rindex):
+        """Join the tables following their CSI indexes on the keys.
+
+        Buffers of keys are read from both indexes in order, and the keys
+        lower than the last one read on both sides are joined, since no
+        further row can match them.
+
+        """
+
+        lnans, rnans = [], []
+        lbuffers = self._sorted_buffers(lindex, lnans)
+        rbuffers = self._sorted_buffers(rindex, rnans)
+        empty = (numpy.empty(0, self.keytype), numpy.empty(0, numpy.int64))
+        (lkeys, lcoords), (rkeys, rcoords) = empty, empty
+        lmore = rmore = True
+
+        def refill(buffers, keys, coords):
+            for newkeys, newcoords in buffers:
+                return (numpy.concatenate((keys, newkeys)),
+                        numpy.concatenate((coords, newcoords)), True)
+            return keys, coords, False
+
+        while True:
+            while lmore and len(lkeys) == 0:
+                lkeys, lcoords, lmore = refill(lbuffers, lkeys, lcoords)
+            while rmore and len(rkeys) == 0:
+                rkeys, rcoords, rmore = refill(rbuffers, rkeys, rcoords)
+            if len(lkeys) == 0 and not lmore:
+                break
+            if not (lmore or rmore):
+                self._join_sorted(lkeys, lcoords, rkeys, rcoords)
+                break
+            # Keys lower than the bound are in memory on both sides
+            bound = min([keys[-1] for keys, more in
+                         [(lkeys, lmore), (rkeys, rmore)] if more])
+            nleft = numpy.searchsorted(lkeys, bound, 'left')
+            nright = numpy.searchsorted(rkeys, bound, 'left')
+            self._join_sorted(lkeys[:nleft], lcoords[:nleft],
+                              rkeys[:nright], rcoords[:nright])
+            lkeys, lcoords = lkeys[nleft:], lcoords[nleft:]
+            rkeys, rcoords = rkeys[nright:], rcoords[nright:]
+            if lmore and not lkeys[-1] > bound:
+                lkeys, lcoords, lmore = refill(lbuffers, lkeys, lcoords)
+            if rmore and not rkeys[-1] > bound:
+                rkeys, rcoords, rmore = refill(rbuffers, rkeys, rcoords)
+            if not self.outer and len(rkeys) == 0 and not rmore:
+                break
+
+        # Left rows with NaN keys never match
+        for coords in lnans:
+            if self.outer:
+                lrows = self._read_rows(self.left, coords)
+                self.write(lrows, self.right._get_container(0),
+                           numpy.arange(len(coords)),
+                           numpy.repeat(-1, len(coords)))
+
+    # Index lookup join
+    # ~~~~~~~~~~~~~~~~~
+    def _key_chunks(self, index, key, nchunks, cache):
+        """Get the chunks of the right table that may hold `key`."""
+
+        chunks = cache.get(key)
+        if chunks is not None:
+            return chunks
+        range_ = index.get_lookup_range(('eq',), (key,))
+        if range_ and (index.search(range_) > 0 or index.reduction > 1):
+            chunkmap = index.get_chunkmap()[:nchunks]
+            chunks = numpy.flatnonzero(chunkmap)
+        else:
+            chunks = numpy.empty(0, dtype=numpy.intp)
+        if len(cache) >= _MAX_CACHED_KEYS:
+            cache.clear()
+        cache[key] = chunks
+        return chunks
+
+    def lookup(self, rindex, npartitions, tmp_dir=None):
+        """Join every buffer of the left table against the right rows
+        found by searching its keys in the index of the right table.
+
+        Every buffer reads the chunks selected by its keys, so the
+        fraction of selected chunks is tracked.  If at that rate the right
+        table would be read more than ``_LOOKUP_MAX_READS`` times, the
+        rest of the left table is joined by :meth:`_Joiner.hash_join`
+        (with `npartitions` and `tmp_dir`) instead.
+
+        """
+
+        left, right = self.left, self.right
+        nrowsinbuf = self.nrowsinbuf
+        nbuffers = int(math.ceil(float(left.nrows) / nrowsinbuf))
+        nselected = 0
+        nrowsinchunk = right.chunkshape[0]
+        nchunks = int(math.ceil(float(right.nrows) / nrowsinchunk))
+        # Chunks from this one on hold rows not in the index yet
+        tailchunk = min(nchunks,
+                        (rindex.nelements + rindex.ndelta) // nrowsinchunk)
+        cache = {}
+        rkeytype = right.coldtypes[self.rkey]
+        for ndone, lrows in enumerate(_iter_buffers(left, nrowsinbuf)):
+            # Chunks that would be read by all the buffers at this rate
+            if nselected * nbuffers > _LOOKUP_MAX_READS * nchunks * ndone:
+                self.hash_join(npartitions, tmp_dir,
+                               start=ndone * nrowsinbuf)
+                return
+            lkeys = numpy.unique(self.keys(lrows, self.lkey))
+            # Keys out of the domain of the right column never match
+            lkeys = lkeys[lkeys.astype(rkeytype) == lkeys]
+            if len(lkeys) == 0:
+                self.join_rows(lrows, right._get_container(0))
+                continue
+            chunkmap = numpy.zeros(nchunks, dtype=bool)
+            chunkmap[tailchunk:] = True
+            for i, key in enumerate(lkeys.tolist()):
+                chunkmap[self._key_chunks(rindex, key, nchunks, cache)] = True
+                # Stop searching once every chunk is to be read anyway
+                if i % 64 == 63 and chunkmap.all():
+                    break
+            nselected += numpy.count_nonzero(chunkmap)
+            # Read the runs of selected chunks and keep matching rows
+            rparts = []
+            edges = numpy.diff(numpy.concatenate(([0], chunkmap, [0])))
+            for first, last in zip(numpy.flatnonzero(edges == 1),
+                                   numpy.flatnonzero(edges == -1)):
+                rrows = right._read(first * nrowsinchunk,
+                                    min(last * nrowsinchunk, right.nrows), 1)
+                rkeys = self.keys(rrows, self.rkey)
+                pos = numpy.searchsorted(lkeys, rkeys)
+                pos[pos == len(lkeys)] = 0
+                rparts.append(rrows[lkeys[pos] == rkeys])
+            if rparts:
+                rrows = numpy.concatenate(rparts)
+            else:
+                rrows = right._get_container(0)
+            self.join_rows(lrows, rrows)
+
+    # Hash join
+    # ~~~~~~~~~
+    def hash_join(self, npartitions, tmp_dir=None, start=0):
+        """Join the tables keeping the rows of the right one in memory.
+
+        If `npartitions` is larger than 1, rows of both tables are split
+        by the hash of their keys into partitions saved in a temporary
+        file, and every partition is joined separately.  Only the rows of
+        the left table from `start` on are joined.
+
+        """
+
+        left, right = self.left, self.right
+        if npartitions <= 1:
+            rrows = right._read(0, right.nrows, 1)
+            rkeys = self.keys(rrows, self.rkey)
+            rorder = numpy.argsort(rkeys, kind='mergesort')
+            rkeys = rkeys[rorder]
+            for lrows in _iter_buffers(left, self.nrowsinbuf, start):
+                self.join_rows(lrows, rrows, rkeys, rorder)
+            return
+
+        from .file import open_file
+        fd, tmpfilename = tempfile.mkstemp(".tmp", "pytables-", tmp_dir)
+        # Close the file descriptor so as to avoid leaks
+        os.close(fd)
+        tmpfile = open_file(tmpfilename, "w")
+        try:
+            lparts = self._partition(left, self.lkey, tmpfile, 'left',
+                                     npartitions, start)
+            rparts = self._partition(right, self.rkey, tmpfile, 'right',
+                                     npartitions)
+            for lpart, rpart in zip(lparts, rparts):
+                if rpart.nrows == 0 and not self.outer:
+                    continue
+                rrows = rpart.read()
+                rkeys = self.keys(rrows, self.rkey)
+                rorder = numpy.argsort(rkeys, kind='mergesort')
+                rkeys = rkeys[rorder]
+                for lrows in _iter_buffers(lpart, self.nrowsinbuf):
+                    self.join_rows(lrows, rrows, rkeys, rorder)
+        finally:
+            tmpfile.close()
+            os.remove(tmpfilename)
+
+    def _partition(self, table, key, tmpfile, name, npartitions, start=0):
+        """Split the rows of `table` from `start` on in partitions by
+        hashing `key`."""
+
+        group = tmpfile.create_group('/', name)
+        expectedrows = (table.nrows - start) // npartitions + 1
+        parts = [tmpfile.create_table(group, 'p%d' % i, table.dtype,
+                                      expectedrows=expectedrows)
+                 for i in range(npartitions)]
+        for rows in _iter_buffers(table, self.nrowsinbuf, start):
+            hashes = _hash_keys(self.keys(rows, key))
+            which = (hashes >> numpy.uint64(32)) % numpy.uint64(npartitions)
+            order = numpy.argsort(which, kind='mergesort')
+            counts = numpy.bincount(which.astype(numpy.intp),
+                                    minlength=npartitions)
+            rows = rows[order]
+            first = 0
+            for part, count in zip(parts, counts):
+                if count > 0:
+                    part.append(rows[first:first + count])
+                first += count
+        for part in parts:
+            part.flush()
+        return parts
+
+
+def _iter_buffers(table, nrowsinbuf, start=0):
+    """Iterate over the rows of `table` from `start` on, a buffer at a
+    time."""
+
+    nrows = table.nrows
+    for start in range(start, nrows, nrowsinbuf):
+        yield table._read(start, min(start + nrowsinbuf, nrows), 1)
+
+
+def _lookup_index(table, colname):
+    """Get the index of `colname` in `table` if it can be searched."""
+
+    column = table.cols._f_col(colname)
+    if not column.is_indexed:
+        return None
+    index = column.index
+    if index.dirty:
+        return None
+    return index
+
+
+def join(left, right, on, where, name, how='inner',
+         suffixes=('_left', '_right'), tmp_dir=None, **kwargs):
+    """Join the rows of two tables with equal keys into a new table.
+
+    Every row of the left table is paired with every row of the right
+    table having the same value in the on column, and every pair is
+    saved as a row of a new table called name under the where group of
+    the file of the left table.  The new table is returned.
+
+    Parameters
+    ----------
+    left, right : Table
+        The tables to be joined.
+    on : str or pair of str
+        The name of the column with the keys in both tables, or a
+        ``(left_column, right_column)`` pair.  Key columns must have
+        scalar values, either numerical in both tables or strings in
+        both tables.  NaN keys do not match any other key.
+    where, name
+        The location of the new table, like in :meth:`File.create_table`.
+    how : str
+        With 'inner' (the default), only rows of the left table with some
+        match are kept.  With 'left', rows of the left table without a
+        match are kept too, with the default values for the columns of
+        the right table.
+    suffixes : pair of str
+        Columns from both tables with the same name are renamed by
+        appending these suffixes.  The key column of the right table is
+        left out when both key columns have the same name.
+    tmp_dir : str
+        The directory for the temporary file of a partitioned hash join
+        (see below).  The default is the system temporary directory.
+    kwargs
+        Other keyword arguments (like filters or expectedrows) are passed
+        to :meth:`File.create_table` when creating the new table.
+
+    Notes
+    -----
+    The rows of both tables are never fully loaded in memory.  The
+    strategy for the join depends on the indexes of the key columns:
+
+    * If both key columns have a CSI index, the indexes are read in key
+      order and the keys of both tables are merged buffer by buffer.
+    * Otherwise, if the right key column is indexed, the keys of every
+      buffer of the left table are searched in the index, and only the
+      chunks of the right table that may hold them are read.  If so many
+      chunks are selected that the right table would end up being read
+      several times, the rest of the left table is joined as below.
+    * Otherwise, the right table is kept in memory while the left table
+      is read buffer by buffer.  If the right table is larger than the
+      :data:`parameters.JOIN_MAX_MEMORY` parameter, both tables are first
+      split in partitions by the hash of their keys into a temporary file,
+      and every pair of partitions is joined separately.
+
+    The order of the rows in the new table depends on the strategy.
+
+    Examples
+    --------
+
+    ::
+
+        sales = tables.join(h5file.root.sales, h5file.root.products,
+                            on='product_id', where='/', name='detailed')
+
+    .. versionadded:: 3.5
+
+    """
+
+    if how not in ('inner', 'left'):
+        raise ValueError("how must be 'inner' or 'left', not %r" % (how,))
+    if isinstance(on, six.string_types):
+        lkey = rkey = on
+    else:
+        lkey, rkey = on
+    for table, colname in [(left, lkey), (right, rkey)]:
+        table._g_check_open()
+        if colname not in table.coldtypes:
+            raise KeyError("table ``%s`` has no column named ``%s``"
+                           % (table._v_pathname, colname))
+
+    joiner = _Joiner(left, right, lkey, rkey, how, suffixes)
+    lindex = left._get_csi_index(lkey)
+    rindex = right._get_csi_index(rkey)
+    output = joiner.create_output(where, name, **kwargs)
+    if lindex is not None and rindex is not None:
+        joiner.merge(lindex, rindex)
+    else:
+        maxmemory = left._v_file.params['JOIN_MAX_MEMORY']
+        rsize = right.nrows * right.rowsize
+        npartitions = int(math.ceil(float(rsize) / maxmemory))
+        rindex = _lookup_index(right, rkey)
+        if rindex is not None:
+            joiner.lookup(rindex, npartitions, tmp_dir)
+        else:
+            joiner.hash_join(npartitions, tmp_dir)
+    output.flush()
+    return output
+
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## fill-column: 72
+## End:
@@ -35,12 +35,17 @@ import io
 import os
 import re
 import warnings
+from bisect import bisect_left
+from collections import deque
+from distutils.version import LooseVersion
 
 import numpy as np
 
 import tables
 import six
 
+from ..utils import Task
+
 
 NodeType = 'file'
 """Value for NODE_TYPE node system attribute."""
@@ -49,6 +54,14 @@ NodeTypeVersions = [1, 2]
 """Supported values for NODE_TYPE_VERSION node system attribute."""
 
 
+_copy_block_size = 8 * 1024 * 1024
+"""The size of the blocks copied at a time between files and file nodes."""
+
+_direct_chunk_io = (LooseVersion(tables.which_lib_version("hdf5")[1]) >=
+                    LooseVersion("1.10.2"))
+"""Whether the HDF5 library can read and write stored chunks directly."""
+
+
 # have a Python2/3 compatible way to check for string
 try:
     string_types = six.string_types
@@ -66,6 +79,9 @@ class RawPyTablesIO(io.RawIOBase):
         lambda l: (l, ),
     ]
 
+    # The minimum size of the buffer used by ``readline()``.
+    _line_buffer_size = 64 * 1024
+
     def __init__(self, node, mode=None):
         super(RawPyTablesIO, self).__init__()
 
@@ -85,6 +101,15 @@ class RawPyTablesIO(io.RawIOBase):
         self._vshape = self._size_to_shape[self._version]
         self._vtype = node.atom.dtype.base.type
 
+        # Buffer of whole chunks for ``readline()``, and the offsets of
+        # the line separators in it
+        chunksize = int(node.chunkshape[0]) if node.chunkshape else 1
+        nchunks = max(1, self._line_buffer_size // chunksize)
+        self._lbufsize = chunksize * nchunks
+        self._lbuf = None
+        self._lbufstart = 0
+        self._lbufeols = []
+
     # read only attribute
     @property
     def mode(self):
@@ -174,6 +199,7 @@ class RawPyTablesIO(io.RawIOBase):
         finally:
             # Release node object to allow closing the file.
             self._node = None
+            self._lbuf = None
 
     def flush(self):
         """Flush write buffers, if applicable.
@@ -248,27 +274,39 @@ class RawPyTablesIO(io.RawIOBase):
         if self._pos >= self._node.nrows:
             return 0
 
-        n = len(b)
-        start = self._pos
-        stop = self._pos + n
-
-        # XXX optimized path
-        #if stop <= self._node.nrows and isinstance(b, np.ndarray):
-        #    self._node.read(start, stop, out=b)
-        #    self._pos += n
-        #    return n
+        try:
+            out = np.frombuffer(b, dtype=np.uint8)
+        except (TypeError, ValueError):  # not a contiguous byte buffer
+            out = None
+        if out is not None and not out.flags.writeable:
+            out = None
 
-        if stop > self._node.nrows:
-            stop = self._node.nrows
-            n = stop - start
+        start = self._pos
+        stop = min(start + len(b), self._node.nrows)
+        n = stop - start
 
-        # XXX This ought to work with anything that supports the buffer API
-        b[:n] = self._node.read(start, stop).tostring()
+        if out is not None:
+            # Read straight into the caller's buffer
+            self._node.read(start, stop, out=out[:n])
+        else:
+            b[:n] = self._node.read(start, stop).tostring()
 
         self._pos += n
 
         return n
 
+    #def readall(self) -> bytes:
+    def readall(self):
+        """Read until EOF, using a single read from the node."""
+
+        self._checkClosed()
+        self._checkReadable()
+
+        start = self._pos
+        stop = max(start, self._node.nrows)
+        self._pos = stop
+        return self._node.read(start, stop).tostring()
+
     #def readline(self, limit: int = -1) -> bytes:
     def readline(self, limit=-1):
         """Read and return a line from the stream.
@@ -284,71 +322,118 @@ class RawPyTablesIO(io.RawIOBase):
         self._checkClosed()
         self._checkReadable()
 
-        chunksize = self._node.chunkshape[0] if self._node.chunkshape else -1
+        if limit is None:
+            limit = -1
 
-        # XXX: check
-        lsep = b'\n'
-        lseplen = len(lsep)
+        partial = []
+        size = 0
+        while limit <= 0 or size < limit:
+            buf, eols = self._line_buffer()
+            if buf is None:  # EOF
+                break
+            offset = self._pos - self._lbufstart
+            # Look for the next separator among the ones in the buffer.
+            i = bisect_left(eols, offset)
+            found = i < len(eols)
+            end = eols[i] + 1 if found else len(buf)
+            if limit > 0 and end - offset > limit - size:
+                end = offset + limit - size
+                found = False
+            partial.append(buf[offset:end])
+            size += end - offset
+            self._pos += end - offset
+            if found:
+                break
 
-        # Set the remaining bytes to read to the specified size.
-        remsize = limit
+        return b''.join(partial)
 
-        partial = []
-        finished = False
+    def __iter__(self):
+        """Iterate over the lines in the stream.
+
+        Lines are taken from whole chunks of the node at once, with no
+        seeking nor reading for every line.  The iterator follows the
+        position of the stream, but it is exhausted at EOF, so a new one
+        is needed to iterate again after seeking back.
+
+        """
 
-        while not finished:
-            # Read a string limited by the remaining number of bytes.
-            if limit <= 0:
-                ibuff = self.read(chunksize)
+        self._checkClosed()
+        self._checkReadable()
+        return self._iter_lines()
+
+    def _iter_lines(self):
+        """Generate the lines from the current position until EOF."""
+
+        while True:
+            buf, eols = self._line_buffer()
+            if buf is None:  # EOF
+                return
+            bufstart = self._lbufstart
+            offset = self._pos - bufstart
+            for i in range(bisect_left(eols, offset), len(eols)):
+                if self._pos != bufstart + offset or self._lbuf is not buf:
+                    break  # moved, reloaded or closed elsewhere
+                end = eols[i] + 1
+                line = buf[offset:end]
+                self._pos = bufstart + end
+                offset = end
+                yield line
             else:
-                ibuff = self.read(min(remsize, chunksize))
-            ibufflen = len(ibuff)
-            remsize -= ibufflen
-
-            if ibufflen >= lseplen:
-                # Separator fits, look for EOL string.
-                eolindex = ibuff.find(lsep)
-            elif ibufflen == 0:
-                # EOF was immediately reached.
-                finished = True
-                continue
-            else:  # ibufflen < lseplen
-                # EOF was hit and separator does not fit. ;)
-                partial.append(ibuff)
-                finished = True
+                if offset < len(buf):
+                    # The last line spans more buffers (or ends at EOF)
+                    line = self.readline()
+                    if line:
+                        yield line
                 continue
+            # Raise the proper error if closed
+            self._checkClosed()
 
-            if eolindex >= 0:
-                # Found an EOL. If there are trailing characters,
-                # cut the input buffer and seek back;
-                # else add the whole input buffer.
-                trailing = ibufflen - lseplen - eolindex  # Bytes beyond EOL.
-                if trailing > 0:
-                    obuff = ibuff[:-trailing]
-                    self.seek(-trailing, 1)
-                    remsize += trailing
-                else:
-                    obuff = ibuff
-                finished = True
-            elif lseplen > 1 and (limit <= 0 or remsize > 0):
-                # Seek back a little since the end of the read string
-                # may have fallen in the middle of the line separator.
-                obuff = ibuff[:-lseplen + 1]
-                self.seek(-lseplen + 1, 1)
-                remsize += lseplen - 1
-            else:  # eolindex<0 and (lseplen<=1 or (limit>0 and remsize<=0))
-                # Did not find an EOL, add the whole input buffer.
-                obuff = ibuff
-
-            # Append (maybe cut) buffer.
-            partial.append(obuff)
-
-            # If a limit has been specified and the remaining count
-            # reaches zero, the reading is finished.
-            if limit > 0 and remsize <= 0:
-                finished = True
+    def __next__(self):
+        """Return the next line from the stream.
 
-        return b''.join(partial)
+        Lines are taken from the buffer of ``readline()`` when possible,
+        with no further checks (the buffer is dropped on close).
+
+        """
+
+        buf = self._lbuf
+        if buf is not None:
+            bufstart = self._lbufstart
+            offset = self._pos - bufstart
+            eols = self._lbufeols
+            i = bisect_left(eols, offset)
+            if i < len(eols) and offset >= 0:
+                end = eols[i] + 1
+                self._pos = bufstart + end
+                return buf[offset:end]
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    next = __next__  # Python 2
+
+    def _line_buffer(self):
+        """Get the buffer holding the current position and its separators.
+
+        The buffer is made of whole chunks of the node, and the offsets
+        of the ``\\n`` separators in it are found at once with NumPy.
+        A ``(None, None)`` tuple is returned at EOF.
+
+        """
+
+        pos, nrows = self._pos, self._node.nrows
+        buf, start = self._lbuf, self._lbufstart
+        if buf is None or not start <= pos < start + len(buf):
+            if pos >= nrows:
+                return None, None
+            start = pos - pos % self._lbufsize
+            data = self._node.read(start, min(start + self._lbufsize, nrows))
+            data = data.reshape(-1)
+            buf = data.tostring()
+            self._lbuf, self._lbufstart = buf, start
+            self._lbufeols = np.flatnonzero(data == ord(b'\n')).tolist()
+        return buf, self._lbufeols
 
     #def write(self, b: bytes) -> int:
     def write(self, b):
@@ -702,6 +787,120 @@ def open_node(node, mode='r'):
 
 
 
+def _zlib_level(node):
+    """Get the level of the zlib compression of the chunks in `node`.
+
+    ``None`` is returned if the chunks can not be compressed and
+    decompressed outside of the HDF5 library, i.e. if direct chunk I/O
+    is not supported or the only filter applied is not zlib.
+
+    """
+
+    if not _direct_chunk_io:
+        return None
+    filters = node.filters
+    if (filters.complevel == 0 or filters.complib != 'zlib' or
+            filters.fletcher32):
+        return None
+    # Shuffling single bytes is a no-op, so it can be ignored
+    return filters.complevel
+
+
+def _chunk_offset(node, row):
+    """Get the offset of the chunk starting at `row` in `node`."""
+
+    offset = np.zeros(len(node.shape), dtype=np.uint64)
+    offset[0] = row
+    return offset
+
+
+def _inflate_chunk(node, data, size):
+    """Decompress the zlib `data` of a chunk with `size` bytes.
+
+    ``None`` is returned if `data` is missing or not valid.
+
+    """
+
+    if data is None:
+        return None
+    out = np.empty(size, dtype=np.uint8)
+    if node._g_inflate_chunk(data, out) != size:
+        return None
+    return out
+
+
+def _save_chunks(node, fd, complevel, nthreads):
+    """Append the contents of the `fd` file to `node` a chunk at a time.
+
+    Chunks are compressed with zlib at `complevel` in up to `nthreads`
+    background threads while the next ones are read, and they are
+    written in order straight to the dataset, bypassing the HDF5 filter
+    pipeline.  The last chunk is padded with zeros.
+
+    """
+
+    chunksize = node.chunkshape[0]  # one byte per row
+    nrows = node.nrows
+    tasks = deque()
+    try:
+        nread = chunksize
+        while nread == chunksize:
+            chunk = np.zeros(chunksize, dtype=np.uint8)
+            nread = fd.readinto(chunk)
+            if nread:
+                task = Task(node._g_deflate_chunk, chunk, complevel)
+                task.start()
+                tasks.append((nread, task))
+            while tasks and (len(tasks) >= nthreads or nread < chunksize):
+                size, task = tasks.popleft()
+                data = task.result()
+                node.truncate(nrows + size)
+                node._g_write_chunk(_chunk_offset(node, nrows), data)
+                nrows += size
+    finally:
+        for size, task in tasks:
+            task.join()
+
+
+def _read_chunks(node, fd, nthreads):
+    """Write the contents of `node` to the `fd` file a chunk at a time.
+
+    Chunks are read straight from the dataset, bypassing the HDF5 filter
+    pipeline, and they are decompressed in up to `nthreads` background
+    threads while the next ones are read.  Chunks which can not be
+    decompressed that way are read through the filter pipeline.
+
+    """
+
+    chunksize = node.chunkshape[0]  # one byte per row
+    nrows = node.nrows
+    tasks = deque()
+    try:
+        for start in range(0, nrows, chunksize):
+            try:
+                chunk = node._g_read_chunk(_chunk_offset(node, start))
+            except tables.HDF5ExtError:
+                # Some HDF5 versions fail with chunks not stored yet
+                chunk = None
+            data = None
+            if chunk is not None and chunk[1] == 0:
+                data = chunk[0]
+            task = Task(_inflate_chunk, node, data, chunksize)
+            task.start()
+            tasks.append((start, task))
+            while tasks and (len(tasks) >= nthreads or
+                             start + chunksize >= nrows):
+                cstart, task = tasks.popleft()
+                cstop = min(cstart + chunksize, nrows)
+                chunk = task.result()
+                if chunk is None:
+                    chunk = node.read(cstart, cstop)
+                fd.write(chunk.reshape(-1)[:cstop - cstart])
+    finally:
+        for start, task in tasks:
+            task.join()
+
+
 def save_to_filenode(h5file, filename, where, name=None, overwrite=False,
                      title="", filters=None):
     """Save a file's contents to a filenode inside a PyTables file.
@@ -779,19 +978,27 @@ def save_to_filenode(h5file, filename, where, name=None, overwrite=False,
     except tables.NoSuchNodeError:
         pass
 
-    # read data from disk
-    with open(filename, "rb") as fd:
-        data = fd.read()
-
     # remove existing filenode if present
     try:
         f.remove_node(where=where, name=name)
     except tables.NoSuchNodeError:
         pass
 
-    # write file's contents to filenode
-    fnode = new_node(f, where=where, name=name, title=title, filters=filters)
-    fnode.write(data)
+    # stream file's contents to filenode
+    fnode = new_node(f, where=where, name=name, title=title, filters=filters,
+                     expectedsize=os.path.getsize(filename))
+    nthreads = f.params['MAX_FILENODE_THREADS']
+    complevel = _zlib_level(fnode.node) if nthreads > 1 else None
+    with open(filename, "rb") as fd:
+        if complevel is not None:
+            _save_chunks(fnode.node, fd, complevel, nthreads)
+        else:
+            buf = bytearray(_copy_block_size)
+            view = memoryview(buf)
+            nread = fd.readinto(buf)
+            while nread:
+                fnode.write(view[:nread])
+                nread = fd.readinto(buf)
     fnode.attrs._filename = os.path.split(filename)[1]
     fnode.close()
 
@@ -869,16 +1076,22 @@ def read_from_filenode(h5file, filename, where, name=None, overwrite=False,
             f.close()
         raise IOError("The file '%s' cannot be written to" % filename)
 
-    # read data from filenode
-    data = fnode.read()
-    fnode.close()
-
-    # store data to file
+    # stream data from filenode to file
+    nthreads = f.params['MAX_FILENODE_THREADS']
+    complevel = _zlib_level(fnode.node) if nthreads > 1 else None
     with open(filename, "wb") as fd:
-        fd.write(data)
+        if complevel is not None:
+            _read_chunks(fnode.node, fd, nthreads)
+        else:
+            buf = bytearray(min(_copy_block_size, fnode.node.nrows))
+            view = memoryview(buf)
+            nread = fnode.readinto(buf)
+            while nread:
+                fd.write(view[:nread])
+                nread = fnode.readinto(buf)
+    fnode.close()
 
     # cleanup
-    del data
     if new_h5file:
         f.close()
 
@@ -13,14 +13,17 @@
 """Unit test for the filenode module."""
 from __future__ import absolute_import
 
+import io
 import os
+import array
 import shutil
 import tempfile
 import warnings
 
+import numpy
 from pkg_resources import resource_filename
 
-from ... import open_file, file, NoSuchNodeError
+from ... import open_file, file, Filters, NoSuchNodeError
 from ...nodes import filenode
 from ...tests.common import (
     unittest, TempFileMixin, parse_argv, print_versions,
@@ -589,6 +592,71 @@ class MonoReadlineTestCase(ReadlineTestCase):
     line_separator = b'\n'
 
 
+class BufferedReadTestCase(TempFileMixin, TestCase):
+    """Tests reading lines and buffers spanning several chunks."""
+
+    def setUp(self):
+        super(BufferedReadTestCase, self).setUp()
+
+        # Lines of many lengths, some much longer than a chunk.
+        self.lines = [b'%d ' % i * (i % 7 or 5000) + b'\n'
+                      for i in range(4000)]
+        self.data = b''.join(self.lines) + b'unterminated'
+        fnode = filenode.new_node(self.h5file, where='/', name='test')
+        fnode.write(self.data)
+        fnode.close()
+
+        self.fnode = filenode.open_node(self.h5file.get_node('/test'))
+
+    def tearDown(self):
+        self.fnode.close()
+        self.fnode = None
+        super(BufferedReadTestCase, self).tearDown()
+
+    def test00_Iterate(self):
+        """Iterating over lines larger than the line buffer."""
+
+        self.assertGreater(len(self.data), 4 * self.fnode._lbufsize)
+        self.assertEqual(list(self.fnode), self.lines + [b'unterminated'])
+        self.assertEqual(self.fnode.tell(), len(self.data))
+
+    def test01_IterateAndSeek(self):
+        """Mixing iteration with seeks and line reads."""
+
+        datafile = io.BytesIO(self.data)
+        lines = iter(self.fnode)
+        for pos in [0, 10, 70000, 70001, len(self.data) - 200]:
+            self.fnode.seek(pos)
+            datafile.seek(pos)
+            self.assertEqual(next(lines), datafile.readline())
+            self.assertEqual(self.fnode.readline(), datafile.readline())
+            self.assertEqual(next(lines), datafile.readline())
+            self.assertEqual(self.fnode.tell(), datafile.tell())
+
+    def test02_ReadlineSize(self):
+        """Reading lines with a size limit across buffers."""
+
+        datafile = io.BytesIO(self.data)
+        for size in [1, 3, 1000, 40000, -1] * 100:
+            self.assertEqual(self.fnode.readline(size),
+                             datafile.readline(size))
+
+    def test03_Readinto(self):
+        """Reading into several kinds of buffers."""
+
+        for buf in [bytearray(1000), memoryview(bytearray(1000)),
+                    numpy.zeros(1000, dtype=numpy.uint8), array.array('b')]:
+            pos = len(self.data) - 600
+            self.fnode.seek(pos)
+            nbytes = self.fnode.readinto(buf)
+            self.assertEqual(nbytes, min(600, len(buf)))
+            self.assertEqual(bytes(buf[:nbytes]),
+                             self.data[pos:pos + nbytes])
+        self.fnode.seek(0)
+        self.assertEqual(self.fnode.read(), self.data)
+        self.assertEqual(self.fnode.read(), b'')
+
+
 #class MultiReadlineTestCase(ReadlineTestCase):
 #    "Tests reading multibyte-separated text lines from an existing file node."
 #
@@ -1024,6 +1092,82 @@ class DirectReadWriteTestCase(TempFileMixin, TestCase):
                           name="THISNODEDOESNOTEXIST")
 
 
+class StreamingCopyMixin(TempFileMixin):
+    """Round trips of files through save_to_filenode/read_from_filenode."""
+
+    sizes = [0, 1, 1000, 65536, 5 * 65536 + 5]
+    filters = [None, Filters(5, 'zlib'), Filters(1, 'zlib', shuffle=False),
+               Filters(5, 'zlib', fletcher32=True)]
+
+    def setUp(self):
+        self.open_kwargs = {'MAX_FILENODE_THREADS': self.nthreads}
+        super(StreamingCopyMixin, self).setUp()
+        self.srcfname = tempfile.mktemp()
+        self.dstfname = tempfile.mktemp()
+
+    def tearDown(self):
+        for fname in (self.srcfname, self.dstfname):
+            if os.access(fname, os.R_OK):
+                os.remove(fname)
+        super(StreamingCopyMixin, self).tearDown()
+
+    def _write_source(self, size):
+        # Compressible, but not trivial data
+        data = numpy.arange(size, dtype=numpy.uint32) * 7 // 5
+        data = data.astype(numpy.uint8).tostring()
+        with open(self.srcfname, "wb") as fd:
+            fd.write(data)
+        return data
+
+    def test00_RoundTrip(self):
+        for size in self.sizes:
+            data = self._write_source(size)
+            for i, filters in enumerate(self.filters):
+                name = 'node%d_%d' % (size, i)
+                filenode.save_to_filenode(self.h5file, self.srcfname, "/",
+                                          name=name, filters=filters)
+                node = self.h5file.get_node("/", name)
+                self.assertEqual(node.nrows, size)
+                self.assertEqual(node.read().tostring(), data)
+                filenode.read_from_filenode(self.h5file, self.dstfname, "/",
+                                            name=name, overwrite=True)
+                with open(self.dstfname, "rb") as fd:
+                    self.assertEqual(fd.read(), data)
+
+    def test01_ReadWithOtherThreads(self):
+        data = self._write_source(100000)
+        filenode.save_to_filenode(self.h5file, self.srcfname, "/",
+                                  name="node", filters=Filters(5, 'zlib'))
+        self._reopen(MAX_FILENODE_THREADS=5 - self.nthreads)
+        fnode = filenode.open_node(self.h5file.root.node)
+        self.assertEqual(fnode.read(), data)
+        fnode.close()
+        filenode.read_from_filenode(self.h5file, self.dstfname, "/",
+                                    name="node")
+        with open(self.dstfname, "rb") as fd:
+            self.assertEqual(fd.read(), data)
+
+    def test02_AppendAfterSave(self):
+        data = self._write_source(5000)
+        filenode.save_to_filenode(self.h5file, self.srcfname, "/",
+                                  name="node", filters=Filters(5, 'zlib'))
+        fnode = filenode.open_node(self.h5file.root.node, 'a+')
+        fnode.write(b"tail")
+        fnode.close()
+        filenode.read_from_filenode(self.h5file, self.dstfname, "/",
+                                    name="node")
+        with open(self.dstfname, "rb") as fd:
+            self.assertEqual(fd.read(), data + b"tail")
+
+
+class SerialStreamingCopyTestCase(StreamingCopyMixin, TestCase):
+    nthreads = 1
+
+
+class ThreadedStreamingCopyTestCase(StreamingCopyMixin, TestCase):
+    nthreads = 4
+
+
 def suite():
     """suite() -> test suite
 
@@ -1039,11 +1183,14 @@ def suite():
     theSuite.addTest(unittest.makeSuite(OpenFileTestCase))
     theSuite.addTest(unittest.makeSuite(ReadFileTestCase))
     theSuite.addTest(unittest.makeSuite(MonoReadlineTestCase))
+    theSuite.addTest(unittest.makeSuite(BufferedReadTestCase))
     #theSuite.addTest(unittest.makeSuite(MultiReadlineTestCase))
     #theSuite.addTest(unittest.makeSuite(LineSeparatorTestCase))
     theSuite.addTest(unittest.makeSuite(AttrsTestCase))
     theSuite.addTest(unittest.makeSuite(ClosedH5FileTestCase))
     theSuite.addTest(unittest.makeSuite(DirectReadWriteTestCase))
+    theSuite.addTest(unittest.makeSuite(SerialStreamingCopyTestCase))
+    theSuite.addTest(unittest.makeSuite(ThreadedStreamingCopyTestCase))
 
     return theSuite
 
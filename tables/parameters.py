@@ -43,6 +43,20 @@ ITERSEQ_MAX_SIZE = 1 * _MB
 ITERSEQ_MAX_SLOTS = 128
 """The maximum number of slots in ITERSEQ cache."""
 
+PERSISTENT_QUERY_CACHE = False
+"""Save the results of indexed queries in the file.
+
+When true, the row coordinates fulfilling an indexed query are also
+saved (as hidden nodes next to the table) when the file is writable,
+so that repeating the same query after reopening the file does not need
+to touch the index.  The saved results are dropped as soon as the table
+data is modified.  At most `ITERSEQ_MAX_SLOTS` results are saved per
+table.
+
+.. versionadded:: 3.5
+
+"""
+
 LIMBOUNDS_MAX_SIZE = 256 * _KB
 """The maximum size for the query limits (for example, ``(lim1, lim2)``
 in conditions like ``lim1 <= col < lim2``) cached during index lookups
@@ -51,6 +65,21 @@ in conditions like ``lim1 <= col < lim2``) cached during index lookups
 LIMBOUNDS_MAX_SLOTS = 128
 """The maximum number of slots for LIMBOUNDS cache."""
 
+CHUNKMAP_MAX_SIZE = 1 * _MB
+"""The maximum size for the maps of table chunks computed by index
+lookups and cached for repeated queries (in bytes).
+
+.. versionadded:: 3.5
+
+"""
+
+CHUNKMAP_MAX_SLOTS = 128
+"""The maximum number of slots for CHUNKMAP cache.
+
+.. versionadded:: 3.5
+
+"""
+
 TABLE_MAX_SIZE = 1 * _MB
 """The maximum size for table chunks cached during index queries."""
 
@@ -229,6 +258,92 @@ is 1.  In other cases a value of 2 or 4 could make sense.
 
 """
 
+MAX_READ_THREADS = 1    # 1 means no pipelined reads
+"""The maximum number of threads that PyTables should use for reading
+table data in the background.  When larger than 1, in-kernel queries
+read (and decompress) the next I/O buffers while the condition is
+being evaluated on the current one, and table reads let Blosc use this
+number of threads.  Calls to the HDF5 library are still serialized.
+If `None`, it is automatically set to the number of cores in your
+machine.
+
+.. versionadded:: 3.5
+
+"""
+
+MAX_INDEX_THREADS = 1    # 1 means serial index builds
+"""The maximum number of threads that PyTables should use for sorting
+index slices.  When larger than 1, the slices of new or updated indexes
+are sorted in background threads while the next slices are read from
+the table and the sorted ones are saved.  At most this number of slices
+(plus one) is kept in memory.  Calls to the HDF5 library are still
+serialized.  If `None`, it is automatically set to the number of cores
+in your machine.
+
+.. versionadded:: 3.5
+
+"""
+
+MAX_FILENODE_THREADS = 1    # 1 means serial copies
+"""The maximum number of threads that PyTables should use for
+compressing or decompressing the chunks of file nodes in
+:func:`tables.nodes.filenode.save_to_filenode` and
+:func:`tables.nodes.filenode.read_from_filenode`.  When larger than 1,
+nodes compressed with zlib (and no other filter) are copied a whole
+chunk at a time, with the chunks being (de)compressed in background
+threads.  Calls to the HDF5 library are still serialized.
+If `None`, it is automatically set to the number of cores in your
+machine.
+
+.. versionadded:: 3.5
+
+"""
+
+DEFERRED_AUTO_INDEX = False
+"""Postpone the index updates of tables with automatic indexing.
+
+When true, rows appended to tables with :attr:`Table.autoindex` set are
+not added to the indexes when the table is flushed, so the cost of
+updating (and optimizing) the indexes does not add to the latency of
+the writer.  Queries keep using the indexes for the rows already indexed
+and scan the remaining rows in-kernel.  Pending rows are indexed by
+calling :meth:`Table.flush_rows_to_index`, or when the file is opened
+again for writing with this parameter unset and the table is flushed.
+Sorted reads of a file opened in read-only mode refuse to use an index
+with pending rows.
+
+.. versionadded:: 3.5
+
+"""
+
+MAX_INDEX_DELTA_RUNS = 0    # 0 means that the last row is always re-sorted
+"""The maximum number of delta runs kept in a full index.
+
+Rows added to an index which do not fill a new slice go to its last
+row, which is sorted again as a whole, so small appends to a table with
+large slices spend most of their time re-sorting the rows already
+indexed.  When this is larger than 0, the new rows are sorted on their
+own and kept in a separate *delta run* instead, and searches look up
+delta runs along with the rest of the index.  Once this many runs
+exist, when the index is read in sorted order, or when the table is
+closed in a writable file, they are merged into the last row (see
+:meth:`Index.compact`).
+
+.. versionadded:: 3.5
+
+"""
+
+JOIN_MAX_MEMORY = 64 * _MB
+"""The maximum amount of memory (in bytes) that :func:`tables.join`
+should use for keeping the rows of the right table.  When the right
+table is larger than this and no index can be used, both tables are
+split into partitions saved in a temporary file, so that every
+partition of the right table fits in this amount of memory.
+
+.. versionadded:: 3.5
+
+"""
+
 USER_BLOCK_SIZE = 0
 """Sets the user block size of a file.
 
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  PyTables Developers
+#
+# $Id$
+#
+########################################################################
+
+"""Here is defined the persistent cache of query results.
+
+Classes:
+
+`QueryCacheG`
+    Hidden group keeping the results of indexed queries on a table.
+`QueryResultArray`
+    Row coordinates fulfilling a cached query.
+
+"""
+from __future__ import absolute_import
+
+import hashlib
+
+import numpy
+
+from .node import NotLoggedMixin
+from .group import Group
+from .array import Array
+from .path import join_path, split_path
+
+
+def query_cache_name_of(node):
+    return '_p_q_%s' % node._v_name
+
+
+def query_cache_pathname_of(node):
+    nodeParentPath = split_path(node._v_pathname)[0]
+    return join_path(nodeParentPath, query_cache_name_of(node))
+
+
+class QueryResultArray(NotLoggedMixin, Array):
+    """Row coordinates fulfilling a cached query."""
+
+    _c_classid = 'QUERYRESULT'
+
+
+class QueryCacheG(NotLoggedMixin, Group):
+    """Hidden group keeping the results of indexed queries on a table.
+
+    Every result is saved as a `QueryResultArray` child whose name is
+    derived from the query key, and which remembers the full key and the
+    version of the table it was computed for.  The version is a counter
+    kept in the group that is incremented every time the table data is
+    modified (see :meth:`QueryCacheG.invalidate`).
+
+    """
+
+    _c_classid = 'QCACHE'
+
+    @property
+    def version(self):
+        """The modification counter of the cached table."""
+
+        return int(self._v_attrs.VERSION)
+
+    def _g_check_name(self, name):
+        if not name.startswith('_p_q_'):
+            raise ValueError(
+                "names of query cache groups must start with ``_p_q_``: %s"
+                % name)
+
+    def _g_post_init_hook(self):
+        super(QueryCacheG, self)._g_post_init_hook()
+        if self._v_new:
+            self._v_attrs.VERSION = 0
+
+    @staticmethod
+    def _key_name(key):
+        digest = hashlib.md5(repr(key).encode('utf-8')).hexdigest()
+        return 'r' + digest
+
+    def get(self, key):
+        """Get the cached coordinates for `key`, or None if missing."""
+
+        name = self._key_name(key)
+        if name not in self._v_children:
+            return None
+        result = self._f_get_child(name)
+        attrs = result._v_attrs
+        if attrs.VERSION != self.version or attrs.KEY != repr(key):
+            return None
+        return result.read()
+
+    def put(self, key, coords, maxslots):
+        """Save `coords` as the result for `key`.
+
+        Nothing is saved if the cache already holds `maxslots` results.
+
+        """
+
+        name = self._key_name(key)
+        if name in self._v_children:
+            self._f_get_child(name)._f_remove()
+        elif len(self._v_children) >= maxslots:
+            return
+        coords = numpy.asarray(coords, dtype='int64')
+        result = QueryResultArray(self, name, coords, _log=False)
+        result._v_attrs.KEY = repr(key)
+        result._v_attrs.VERSION = self.version
+
+    def invalidate(self):
+        """Drop every cached result and increment the table version."""
+
+        for name in list(self._v_children):
+            self._f_get_child(name)._f_remove()
+        self._v_attrs.VERSION = self.version + 1
+
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## fill-column: 72
+## End:
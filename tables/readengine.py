@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  PyTables Developers
+#
+# $Id$
+#
+########################################################################
+
+"""Here is defined the ReadEngine class.
+
+Classes:
+
+`ReadEngine`
+    Pipelined reader of table I/O buffers.
+
+"""
+from __future__ import absolute_import
+
+import sys
+import threading
+from collections import deque
+
+import numpy
+import six
+from six.moves import queue
+
+from .conditions import call_on_recarr
+from .utilsextension import get_nested_field, set_blosc_max_threads
+
+
+class _Job(object):
+    """A function call to be run by the read workers."""
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+        self.value = None
+        self.exc_info = None
+        self._done = threading.Event()
+
+    def run(self):
+        try:
+            self.value = self.func(*self.args)
+        except BaseException:
+            self.exc_info = sys.exc_info()
+        self._done.set()
+
+    def join(self):
+        """Wait for the call to finish."""
+
+        self._done.wait()
+
+    def result(self):
+        """Wait for the call to finish and return its value.
+
+        Exceptions raised in the call are raised again here.
+
+        """
+
+        self.join()
+        if self.exc_info is not None:
+            exc_info, self.exc_info = self.exc_info, None
+            six.reraise(*exc_info)
+        return self.value
+
+
+class _Workers(object):
+    """Persistent threads running the jobs of every read engine.
+
+    Threads are started as engines need them, up to the largest number
+    of threads requested, and they are kept waiting for more jobs
+    afterwards instead of being started for every buffer.
+
+    """
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._nthreads = 0
+
+    def _work(self):
+        while True:
+            self._jobs.get().run()
+
+    def submit(self, nthreads, func, *args):
+        """Run `func` with `args` in one of (at least) `nthreads` threads.
+
+        A :class:`_Job` for getting the result is returned.
+
+        """
+
+        with self._lock:
+            while self._nthreads < nthreads:
+                thread = threading.Thread(target=self._work,
+                                          name="PyTablesReader")
+                thread.daemon = True
+                thread.start()
+                self._nthreads += 1
+        job = _Job(func, *args)
+        self._jobs.put(job)
+        return job
+
+
+_workers = _Workers()
+
+
+class ReadEngine(object):
+    """Pipelined reader of table I/O buffers.
+
+    The engine reads and decompresses table I/O buffers in background
+    threads (which are kept alive and shared by all the engines) and
+    hands them back in order, optionally together with the
+    result of evaluating a compiled condition on them.  Calls to the
+    HDF5 library are always serialized on a lock, since HDF5 itself
+    does not allow concurrent calls; what runs in parallel is the
+    reading (and decompression) of the next buffers with the
+    evaluation of the condition on the current ones.  On top of that,
+    Blosc is allowed to use up to `nthreads` threads for decompressing
+    chunks during a scan (see :meth:`ReadEngine.scan`).
+
+    Parameters
+    ----------
+    table : Table
+        The table to be read.
+    nthreads : int
+        The number of threads to be used.  This is also the number of
+        I/O buffers being read ahead of the consumer.
+    start, stop, step : int
+        The (positive step) range of rows to be read.
+
+    """
+
+    def __init__(self, table, nthreads, start, stop, step=1):
+        assert step > 0, "the read engine only supports positive steps"
+        self.table = table
+        """The table to be read."""
+        self.nthreads = max(nthreads, 1)
+        """The number of threads to be used."""
+        self.start = start
+        self.stop = stop
+        self.step = step
+        self.nrowsinbuf = table.nrowsinbuf
+        """The number of rows in every I/O buffer."""
+        self._iolock = threading.Lock()
+        """Lock serializing the calls to the HDF5 library."""
+        self._evallock = threading.Lock()
+        """Lock serializing the evaluation of conditions, since compiled
+        Numexpr functions cannot be run concurrently."""
+        self._prefetched = None
+        """The task reading ahead the next buffer in `fetch()`."""
+        self._spare = None
+        """Spare buffer for the read ahead in `fetch()`."""
+
+    def _next_position(self, pos):
+        """Return the first selected row at or after `pos`."""
+
+        step = self.step
+        if step > 1:
+            pos += (self.start - pos) % step
+        return pos
+
+    def _read(self, start, nrows, buf):
+        with self._iolock:
+            return self.table._read_records(start, nrows, buf)
+
+    def _read_and_eval(self, start, nrows, buf, condition):
+        nrecords = self._read(start, nrows, buf)
+        valid = None
+        if condition is not None:
+            condfunc, condargs, condkwargs = condition
+            with self._evallock:
+                valid = call_on_recarr(condfunc, condargs, buf[:nrecords],
+                                       **condkwargs)
+        return start, nrecords, buf, valid
+
+    def iterbuffers(self, condition=None):
+        """Iterate over the I/O buffers in the engine range.
+
+        Tuples of ``(start, nrecords, buffer, valid)`` are yielded in
+        row order, where `valid` is the boolean result of evaluating
+        `condition` (a ``(function, args, kwargs)`` tuple like
+        ``Table._where_condition``) over ``buffer[:nrecords]``, or
+        ``None`` if no condition was given.  Only buffers holding some
+        row in the selected range are read.
+
+        The yielded buffer is only valid until the next one is requested.
+        Up to `nthreads` buffers are read and evaluated ahead of the
+        consumer, so the consumer must not call the HDF5 library while
+        iterating (use :meth:`ReadEngine.fetch` for that).  With a single
+        thread, buffers are read and evaluated on demand by the caller.
+
+        """
+
+        nrowsinbuf, stop = self.nrowsinbuf, self.stop
+        table = self.table
+        if self.nthreads == 1:
+            # No threads at all: read and evaluate in the caller
+            buf = table._get_container(nrowsinbuf)
+            pos = self._next_position(self.start)
+            while pos < stop:
+                nrows = min(nrowsinbuf, stop - pos)
+                yield self._read_and_eval(pos, nrows, buf, condition)
+                pos = self._next_position(pos + nrows)
+            return
+
+        free = [table._get_container(nrowsinbuf)
+                for i in range(self.nthreads + 1)]
+        tasks = deque()
+        state = {'pos': self._next_position(self.start)}
+
+        def submit():
+            pos = state['pos']
+            if pos >= stop:
+                return
+            nrows = min(nrowsinbuf, stop - pos)
+            state['pos'] = self._next_position(pos + nrows)
+            tasks.append(_workers.submit(self.nthreads, self._read_and_eval,
+                                         pos, nrows, free.pop(), condition))
+
+        try:
+            for i in range(self.nthreads):
+                submit()
+            previous = None
+            while tasks:
+                result = tasks.popleft().result()
+                if previous is not None:
+                    free.append(previous)
+                submit()
+                yield result
+                previous = result[2]
+        finally:
+            # Never leave HDF5 calls running behind the consumer's back
+            for task in tasks:
+                task.join()
+
+    def fetch(self, start, nrows, buf, condition=None):
+        """Read `nrows` rows from `start` and evaluate them.
+
+        This returns a ``(nrecords, buffer, valid)`` tuple with the
+        number of rows actually read, the buffer holding them and the
+        result of `condition` on them (see :meth:`ReadEngine.iterbuffers`).
+        The next buffer in the range is read ahead while the condition is
+        being evaluated, and it will be used by the next call if it asks
+        for it.  No read is left running when this method returns, so it
+        is safe to call the HDF5 library between calls (this is what
+        ``Table.where()`` iterators need, since user code runs between
+        rows).
+
+        The returned buffer is either `buf` or the one read ahead, which
+        is handed over with no copies.  In the latter case, `buf` is kept
+        by the engine for reading ahead, so the caller should only use
+        the returned buffer from then on.
+
+        """
+
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is not None and prefetched.args[:2] == (start, nrows):
+            nrecords = prefetched.result()
+            buf, spare = prefetched.args[2], buf
+        else:
+            nrecords = self._read(start, nrows, buf)
+            spare = self._spare
+            if spare is None:
+                spare = self.table._get_container(self.nrowsinbuf)
+        self._spare = spare
+
+        # Read the next buffer while evaluating the condition on this one
+        task = None
+        nextstart = self._next_position(start + nrecords)
+        if nrecords == nrows and nextstart < self.stop:
+            task = _workers.submit(1, self._read, nextstart, nrows, spare)
+        try:
+            valid = None
+            if condition is not None:
+                condfunc, condargs, condkwargs = condition
+                valid = call_on_recarr(condfunc, condargs, buf[:nrecords],
+                                       **condkwargs)
+        finally:
+            if task is not None:
+                task.join()
+        if task is not None and task.exc_info is None:
+            self._prefetched = task
+        return nrecords, buf, valid
+
+    def scan(self, func, *args):
+        """Call `func` with `args` letting Blosc use `nthreads` threads.
+
+        This is meant for reads that do not give control back to user
+        code before finishing, like ``Table.read()``.  The previous
+        number of Blosc threads is restored afterwards.
+
+        """
+
+        nthreads = self.nthreads
+        if nthreads <= self.table._v_file.params['MAX_BLOSC_THREADS']:
+            return func(*args)
+        previous = set_blosc_max_threads(nthreads)
+        try:
+            return func(*args)
+        finally:
+            set_blosc_max_threads(previous)
+
+    def fill(self, result, field=None):
+        """Fill `result` with the rows (or `field`) in the engine range."""
+
+        start, step = self.start, self.step
+        nresult = 0
+        for bstart, nrecords, buf, _ in self.iterbuffers():
+            first = (start - bstart) % step
+            rows = buf[first:nrecords:step]
+            if field:
+                rows = get_nested_field(rows, field)
+            result[nresult:nresult + len(rows)] = rows
+            nresult += len(rows)
+        return nresult
+
+    def select(self, condition, field=None):
+        """Get the rows (or `field`) in the engine range fulfilling
+        `condition`.
+
+        Every I/O buffer is evaluated as a whole and the matching rows
+        are compacted with its boolean mask, so no per-row Python code
+        is run.  The result is a new array with the rows in order.
+
+        """
+
+        start, step = self.start, self.step
+        chunks = []
+        for bstart, nrecords, buf, valid in self.iterbuffers(condition):
+            if step > 1:
+                first = (start - bstart) % step
+                rows = buf[first:nrecords:step][valid[first::step]]
+            else:
+                rows = buf[:nrecords][valid]
+            if len(rows) == 0:
+                continue
+            if field:
+                rows = get_nested_field(rows, field)
+            chunks.append(rows)
+        if not chunks:
+            empty = self.table._get_container(0)
+            return get_nested_field(empty, field) if field else empty
+        if len(chunks) == 1:
+            return chunks[0]
+        return numpy.concatenate(chunks)
+
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## fill-column: 72
+## End:
@@ -28,7 +28,7 @@ import numexpr
 from . import tableextension
 from .lrucacheextension import ObjectCache, NumCache
 from .atom import Atom
-from .conditions import compile_condition
+from .conditions import compile_condition, extract_in_lists, InList
 from numexpr.necompiler import getType as numexpr_getType, double
 from numexpr.expressions import functions as numexpr_functions
 from .flavor import flavor_of, array_as_internal, internal_to_flavor
@@ -41,9 +41,15 @@ from .exceptions import (
 from .utilsextension import get_nested_field
 
 from .path import join_path, split_path
+from .querycache import (
+    QueryCacheG, query_cache_name_of, query_cache_pathname_of)
+from .readengine import ReadEngine
+from .aggregate import Aggregator
+from .topk import TopK
 from .index import (
     OldIndex, default_index_filters, default_auto_index, Index, IndexesDescG,
     IndexesTableG)
+from .chunkindex import ChunkIndex, BitmapIndex, ZoneMap
 
 import six
 from six.moves import range
@@ -169,6 +175,9 @@ def _table__where_indexed(self, compiled, condition, condvars,
     for key, value in six.iteritems(condvars):
         if isinstance(value, numpy.ndarray):
             values.append((key, value.item()))
+        elif isinstance(value, InList):
+            values.append((key, value.values.dtype.str,
+                           value.values.tobytes()))
     # Build a key for the sequence cache
     seqkey = (condition, tuple(values), (start, stop, step))
     # Do a lookup in sequential cache for this query
@@ -176,6 +185,12 @@ def _table__where_indexed(self, compiled, condition, condvars,
     if nslot >= 0:
         # Get the row sequence from the cache
         seq = self._seqcache.getitem(nslot)
+    else:
+        # Try with the results saved in the file, if any
+        seq = self._load_query_result(seqkey)
+        if seq is not None:
+            self._seqcache.setitem(seqkey, seq, len(seq) * 8)
+    if seq is not None:
         if len(seq) == 0:
             return iter([])
         # seq is a list.
@@ -195,6 +210,11 @@ def _table__where_indexed(self, compiled, condition, condvars,
     strexpr = compiled.string_expression
     cmvars = {}
     tcoords = 0
+    nrowsinchunk = self.chunkshape[0]
+    nchunks = int(math.ceil(float(self.nrows) / nrowsinchunk))
+    # Chunks from this one on hold rows not yet added to some index
+    # (see DEFERRED_AUTO_INDEX), and they are always scanned
+    tailchunk = nchunks
     for i, idxexpr in enumerate(idxexprs):
         var, ops, lims = idxexpr
         col = condvars[var]
@@ -206,27 +226,33 @@ def _table__where_indexed(self, compiled, condition, condvars,
         range_ = index.get_lookup_range(ops, lims)
         ncoords = index.search(range_)
         tcoords += ncoords
+        tailchunk = min(tailchunk,
+                        (index.nelements + index.ndelta) // nrowsinchunk)
         if index.reduction == 1 and ncoords == 0:
             # No values from index condition, thus the chunkmap should be empty
-            nrowsinchunk = self.chunkshape[0]
-            nchunks = int(math.ceil(float(self.nrows) / nrowsinchunk))
             chunkmap = numpy.zeros(shape=nchunks, dtype="bool")
         else:
             # Get the chunkmap from the index
             chunkmap = index.get_chunkmap()
+            if len(chunkmap) < nchunks:
+                chunkmap = numpy.concatenate(
+                    (chunkmap, numpy.zeros(nchunks - len(chunkmap), "bool")))
         # Assign the chunkmap to the cmvars dictionary
         cmvars["e%d" % i] = chunkmap
 
-    if index.reduction == 1 and tcoords == 0:
+    if index.reduction == 1 and tcoords == 0 and tailchunk == nchunks:
         # No candidates found in any indexed expression component, so leave now
         self._seqcache.setitem(seqkey, [], 1)
+        self._save_query_result(seqkey, [])
         return iter([])
 
     # Compute the final chunkmap
     chunkmap = numexpr.evaluate(strexpr, cmvars)
+    chunkmap[tailchunk:] = True
     if not chunkmap.any():
         # The chunkmap is all False, so the result is empty
         self._seqcache.setitem(seqkey, [], 1)
+        self._save_query_result(seqkey, [])
         return iter([])
 
     if profile:
@@ -273,6 +299,9 @@ def _column__create_index(self, optlevel, kind, filters, tmp_dir,
         raise TypeError("complex columns can not be indexed")
     if dtype.shape != ():
         raise TypeError("multidimensional columns can not be indexed")
+    if kind == 'bitmap' and dtype.kind not in 'biuS':
+        raise TypeError("bitmap indexes can only be created on boolean, "
+                        "integer or string columns")
 
     # Get the indexes group for table, and if not exists, create it
     try:
@@ -307,7 +336,8 @@ def _column__create_index(self, optlevel, kind, filters, tmp_dir,
         expectedrows = table.nrows
 
     # Create the index itself
-    index = Index(
+    indexclass = {'bitmap': BitmapIndex, 'zonemap': ZoneMap}.get(kind, Index)
+    index = indexclass(
         idgroup, name, atom=atom,
         title="Index for %s column" % name,
         kind=kind,
@@ -619,6 +649,8 @@ class Table(tableextension.Table, Leaf):
         don't have automatic indexing activated and you want to do an an
         immediate update use `Table.flush_rows_to_index()`; for an immediate
         reindexing of invalidated indexes, use `Table.reindex_dirty()`.
+        See the `DEFERRED_AUTO_INDEX` parameter for keeping the index
+        updates out of table flushes.
 
         This value is persistent.
 
@@ -750,6 +782,8 @@ class Table(tableextension.Table, Leaf):
         self._seqcache_key = None
         """The key under which to save a query's results (list of row indexes)
         or None to not save."""
+        self._read_engine = None
+        """The read engine to be used by the next in-kernel query, if any."""
         max_slots = parentnode._v_file.params['COND_CACHE_SLOTS']
         self._condition_cache = CacheDict(max_slots)
         """Cache of already compiled conditions."""
@@ -908,7 +942,7 @@ class Table(tableextension.Table, Leaf):
         # since their respective index objects share
         # the same number of elements.
         if self.indexed:
-            self._indexedrows = indexobj.nelements
+            self._indexedrows = indexobj.nelements + indexobj.ndelta
             self._unsaved_indexedrows = self.nrows - self._indexedrows
             # Put the autoindex value in a cache variable
             self._autoindex = self.autoindex
@@ -1201,7 +1235,9 @@ very small/large chunksize, you may want to increase/decrease it."""
 
         Nested columns and columns from other tables are not allowed
         (`TypeError` and `ValueError` are raised, respectively).  Also,
-        non-column variable values are converted to NumPy arrays.
+        non-column variable values are converted to NumPy arrays.  The
+        ``in_()`` calls in `expression` get `InList` values under the
+        names given by ``extract_in_lists()``.
 
         `depth` specifies the depth of the frame in order to reach local
         or global variables.
@@ -1209,6 +1245,7 @@ very small/large chunksize, you may want to increase/decrease it."""
         """
 
         # Get the names of variables used in the expression.
+        expression, inlists = extract_in_lists(expression)
         exprvarscache = self._exprvars_cache
         if expression not in exprvarscache:
             # Protection against growing the cache too much
@@ -1219,7 +1256,8 @@ very small/large chunksize, you may want to increase/decrease it."""
             cexpr = compile(expression, '<string>', 'eval')
             exprvars = [var for var in cexpr.co_names
                         if var not in ['None', 'False', 'True']
-                        and var not in numexpr_functions]
+                        and var not in numexpr_functions
+                        and var not in inlists]
             exprvarscache[expression] = exprvars
         else:
             exprvars = exprvarscache[expression]
@@ -1244,32 +1282,36 @@ very small/large chunksize, you may want to increase/decrease it."""
         # Look for the required variables first among the ones
         # explicitly provided by the user, then among implicit columns,
         # then among external variables (only if no explicit variables).
-        reqvars = {}
-        for var in exprvars:
-            # Get the value.
+        def get_value(var):
             if uservars is not None and var in uservars:
-                val = uservars[var]
+                return uservars[var]
             elif var in colinstances:
-                val = colinstances[var]
+                return colinstances[var]
             elif uservars is None and var in user_locals:
-                val = user_locals[var]
+                return user_locals[var]
             elif uservars is None and var in user_globals:
-                val = user_globals[var]
-            else:
-                raise NameError("name ``%s`` is not defined" % var)
+                return user_globals[var]
+            raise NameError("name ``%s`` is not defined" % var)
+
+        def check_column(var, val):
+            if val.shape[1:] != ():
+                raise NotImplementedError(
+                    "variable ``%s`` refers to "
+                    "a multidimensional column, "
+                    "not yet supported in conditions, sorry" % var)
+            if (val._table_file is not tblfile or
+                    val._table_path != tblpath):
+                raise ValueError("variable ``%s`` refers to a column "
+                                 "which is not part of table ``%s``"
+                                 % (var, tblpath))
+
+        reqvars = {}
+        for var in exprvars:
+            val = get_value(var)
 
             # Check the value.
             if hasattr(val, 'pathname'):  # non-nested column
-                if val.shape[1:] != ():
-                    raise NotImplementedError(
-                        "variable ``%s`` refers to "
-                        "a multidimensional column, "
-                        "not yet supported in conditions, sorry" % var)
-                if (val._table_file is not tblfile or
-                        val._table_path != tblpath):
-                    raise ValueError("variable ``%s`` refers to a column "
-                                     "which is not part of table ``%s``"
-                                     % (var, tblpath))
+                check_column(var, val)
                 if val.dtype.str[1:] == 'u8':
                     raise NotImplementedError(
                         "variable ``%s`` refers to "
@@ -1287,6 +1329,22 @@ very small/large chunksize, you may want to increase/decrease it."""
                 else:
                     val = numpy.asarray(val)
             reqvars[var] = val
+        for var, (colvar, values) in six.iteritems(inlists):
+            if uservars is not None and isinstance(uservars.get(var), InList):
+                # Already looked up (e.g. by ``Table.read_where()``)
+                reqvars[var] = uservars[var]
+                continue
+            col = get_value(colvar)
+            if not hasattr(col, 'pathname'):
+                raise TypeError("variable ``%s`` in ``in_()`` does not "
+                                "refer to a column" % colvar)
+            check_column(colvar, col)
+            if isinstance(values, tuple):  # variable
+                values = get_value(values[0])
+            values = numpy.asarray(values)
+            if values.dtype.kind == 'U':
+                values = numpy.char.encode(values, 'ascii')
+            reqvars[var] = InList(col, values.ravel())
         return reqvars
 
     def _get_condition_key(self, condition, condvars):
@@ -1303,7 +1361,11 @@ very small/large chunksize, you may want to increase/decrease it."""
         # Column paths and types for each of the previous variable.
         colpaths, vartypes = [], []
         for (var, val) in six.iteritems(condvars):
-            if hasattr(val, 'pathname'):  # column
+            if isinstance(val, InList):
+                # Only the tested column matters, not the values
+                colnames.append(var)
+                colpaths.append(('in_', val.pathname))
+            elif hasattr(val, 'pathname'):  # column
                 colnames.append(var)
                 colpaths.append(val.pathname)
             else:  # array
@@ -1346,7 +1408,7 @@ very small/large chunksize, you may want to increase/decrease it."""
 
         # start with normal variables
         typemap = dict(list(zip(varnames, vartypes)))
-        indexedcols = []
+        indexedcols, neqcols = [], []
         for colname in colnames:
             col = condvars[colname]
 
@@ -1358,10 +1420,14 @@ very small/large chunksize, you may want to increase/decrease it."""
             if (self._enabled_indexing_in_queries  # no in-kernel searches
                     and self.colindexed[col.pathname] and not col.index.dirty):
                 indexedcols.append(colname)
+                if col.index.kind == 'bitmap':
+                    # These can be used in ``!=`` comparisons too
+                    neqcols.append(colname)
 
         indexedcols = frozenset(indexedcols)
         # Now let ``compile_condition()`` do the Numexpr-related job.
-        compiled = compile_condition(condition, typemap, indexedcols)
+        compiled = compile_condition(condition, typemap, indexedcols,
+                                     frozenset(neqcols))
 
         # Check that there actually are columns in the condition.
         if not set(compiled.parameters).intersection(set(colnames)):
@@ -1524,6 +1590,8 @@ very small/large chunksize, you may want to increase/decrease it."""
 
         args = [condvars[param] for param in compiled.parameters]
         self._where_condition = (compiled.function, args, compiled.kwargs)
+        if chunkmap is None and step == 1:
+            self._read_engine = self._get_read_engine(start, stop, step)
         row = tableextension.Row(self)
         if profile:
             show_stats("Exiting table._where", tref)
@@ -1543,6 +1611,15 @@ very small/large chunksize, you may want to increase/decrease it."""
         """
 
         self._g_check_open()
+        (start, stop, step) = self._process_range_read(start, stop, step)
+        condvars = self._required_expr_vars(condition, condvars, depth=2)
+        compiled = self._compile_condition(condition, condvars)
+        if not compiled.index_expressions and step > 0:
+            # In-kernel query: select whole I/O buffers, not single rows
+            result = self._read_where_inkernel(compiled, condvars,
+                                               start, stop, step, field)
+            return internal_to_flavor(result, self.flavor)
+
         coords = [p.nrow for p in
                   self._where(condition, condvars, start, stop, step)]
         self._where_condition = None  # reset the conditions
@@ -1556,6 +1633,20 @@ very small/large chunksize, you may want to increase/decrease it."""
                     return self.read(cstart, cstop, field=field)
         return self.read_coordinates(coords, field)
 
+    def _read_where_inkernel(self, compiled, condvars, start, stop, step,
+                             field=None):
+        """Columnar counterpart of `self._where()` for `read_where()`."""
+
+        if field and field not in self.coldtypes:
+            if field not in self.description._v_names:
+                raise KeyError(("Field {0} not found in table "
+                                "{1}").format(field, self))
+        args = [condvars[param] for param in compiled.parameters]
+        condition = (compiled.function, args, compiled.kwargs)
+        nthreads = self._v_file.params['MAX_READ_THREADS']
+        engine = ReadEngine(self, nthreads, start, stop, step)
+        return engine.select(condition, field)
+
     def append_where(self, dstTable, condition=None, condvars=None,
                      start=None, stop=None, step=None):
         """Append rows fulfilling the condition to the dstTable table.
@@ -1652,6 +1743,21 @@ very small/large chunksize, you may want to increase/decrease it."""
                 "`sortby` can only be a `Column` or string object, "
                 "but you passed an object of type: %s" % type(sortby))
         if icol.is_indexed and icol.index.kind == "full":
+            if self._unsaved_indexedrows > 0 and self.autoindex:
+                # Sorted reads need every row in the index
+                if not self._v_file._iswritable():
+                    raise ValueError(
+                        "the index of field `%s` in table `%s` lacks %d "
+                        "rows which can not be indexed in a read-only file"
+                        % (sortby, self, self._unsaved_indexedrows))
+                self.flush_rows_to_index()
+            if icol.index.ndelta > 0:
+                if not self._v_file._iswritable():
+                    raise ValueError(
+                        "the index of field `%s` in table `%s` has delta "
+                        "runs which can not be merged in a read-only file"
+                        % (sortby, self))
+                icol.index.compact()
             if checkCSI and not icol.index.is_csi:
                 # The index exists, but it is not a CSI one.
                 raise ValueError(
@@ -1722,6 +1828,147 @@ very small/large chunksize, you may want to increase/decrease it."""
         coords = index[start:stop:step]
         return self.read_coordinates(coords, field)
 
+    def topk(self, sortby, k, largest=True, field=None, condition=None,
+             condvars=None, start=None, stop=None, step=None):
+        """Read the rows with the k largest (or smallest) values of a column.
+
+        The rows are returned sorted by the values of the sortby column,
+        in descending order for the largest values or in ascending order
+        for the smallest ones (when largest is false), and there are less
+        than k of them only if the table (or the selection) is shorter.
+        NaN values are greater than any other value, as in NumPy sorts,
+        and rows with equal values are returned in no particular order::
+
+            # The ten best scores over 1000 games
+            best = table.topk('score', 10, condition='games > 1000')
+
+        The sortby argument may be a column name or a :class:`Column`
+        instance, and field has the same meaning as in
+        :meth:`Table.read_sorted`.  If a condition is given, only the rows
+        fulfilling it are considered.  The condition, condvars, start,
+        stop and step arguments have the same meaning as in
+        :meth:`Table.where`.
+
+        If the sortby column has a CSI index (see
+        :meth:`Column.create_csindex`), only the end of the index is read,
+        until k rows in the selection are found.  Otherwise, rows are read
+        one I/O buffer at a time, and only the k best values and their
+        coordinates are kept.
+
+        .. versionadded:: 3.5
+
+        """
+
+        self._g_check_open()
+        if isinstance(sortby, Column):
+            sortby = sortby.pathname
+        topk = TopK(self, sortby, k, largest)
+        (start, stop, step) = self._process_range_read(start, stop, step)
+        if condition is not None:
+            condvars = self._required_expr_vars(condition, condvars,
+                                                depth=2)
+            compiled = self._compile_condition(condition, condvars)
+            args = [condvars[param] for param in compiled.parameters]
+            condition = (compiled.function, args, compiled.kwargs)
+        if start < stop and k > 0:
+            index = self._get_csi_index(sortby)
+            if index is not None:
+                topk.scan_sorted(index, start, stop, step, condition)
+            else:
+                nthreads = self._v_file.params['MAX_READ_THREADS']
+                engine = ReadEngine(self, nthreads, start, stop, step)
+                topk.scan(engine, condition)
+        return internal_to_flavor(topk.result(field), self.flavor)
+
+    def aggregate(self, by, aggs, condition=None, condvars=None,
+                  start=None, stop=None, step=None):
+        """Group the rows by the values of a column and aggregate others.
+
+        The rows in the table (or in the given range) are grouped by the
+        distinct values of the by column, and the columns in the aggs
+        mapping are aggregated over every group.  aggs maps column names
+        to one of the following operations, or to a sequence of them:
+
+        * 'count': the number of rows in the group.
+        * 'sum': the sum of the values of the column in the group.
+        * 'min' and 'max': the minimum and maximum values.
+        * 'mean': the mean of the values (as a double).
+
+        All but 'count' require numerical (or boolean) columns.  The
+        result is a structured array of the current flavor with a row for
+        every group, sorted by the values of by.  It has a field named
+        after by, plus a field per aggregation, named after its column
+        for single operations or as ``<column>_<operation>`` when a
+        sequence of operations is given for a column (or for operations
+        on the by column itself)::
+
+            # Fields are status, status_count, energy_min and energy_max
+            stats = table.aggregate('status', {'status': 'count',
+                                               'energy': ['min', 'max']})
+
+        If a condition is given, only the rows fulfilling it are
+        aggregated.  The condition, condvars, start, stop and step
+        arguments have the same meaning as in :meth:`Table.where`.
+
+        Rows are read one I/O buffer at a time, and the groups of every
+        buffer are looked up in a hash table holding the running
+        aggregates of each group, so memory usage depends on the number
+        of groups and not on the number of rows.  If the by column has a CSI index (see
+        :meth:`Column.create_csindex`), rows are read in the order of the
+        index instead, and only the last group of every buffer is kept
+        pending.
+
+        .. versionadded:: 3.5
+
+        """
+
+        self._g_check_open()
+        aggregator = Aggregator(self, by, aggs)
+        (start, stop, step) = self._process_range_read(start, stop, step)
+        if condition is not None:
+            condvars = self._required_expr_vars(condition, condvars,
+                                                depth=2)
+            compiled = self._compile_condition(condition, condvars)
+            args = [condvars[param] for param in compiled.parameters]
+            condition = (compiled.function, args, compiled.kwargs)
+        if start < stop:
+            index = self._get_csi_index(by)
+            if index is not None:
+                aggregator.scan_sorted(index, start, stop, step, condition)
+            else:
+                nthreads = self._v_file.params['MAX_READ_THREADS']
+                engine = ReadEngine(self, nthreads, start, stop, step)
+                aggregator.scan(engine, condition)
+        return internal_to_flavor(aggregator.result(), self.flavor)
+
+    def _get_csi_index(self, colname):
+        """Get the CSI index of `colname` if it holds every row.
+
+        Queries do not modify the index: if it has unindexed rows or delta
+        runs, a `PerformanceWarning` is issued and ``None`` is returned, so
+        rows should be scanned instead.
+
+        """
+
+        column = self.cols._f_col(colname)
+        if not column.is_indexed:
+            return None
+        index = column.index
+        if index.kind != 'full' or index.dirty:
+            return None
+        if self._unsaved_indexedrows > 0 or index.ndelta > 0:
+            # Unindexed rows and delta runs are left to flush(), close()
+            # or reindex()
+            warnings.warn("the index of column ``%s`` in table ``%s`` has "
+                          "rows pending to be indexed or merged, so rows "
+                          "are scanned instead; reindex the column to use "
+                          "the index again" % (colname, self._v_pathname),
+                          PerformanceWarning)
+            return None
+        if not index.is_csi:
+            return None
+        return index
+
     def iterrows(self, start=None, stop=None, step=None):
         """Iterate over the table using a Row instance.
 
@@ -1789,6 +2036,14 @@ very small/large chunksize, you may want to increase/decrease it."""
 
         return self.iterrows()
 
+    def _get_read_engine(self, start, stop, step):
+        """Get a read engine for the given range, or None if not worth it."""
+
+        nthreads = self._v_file.params['MAX_READ_THREADS']
+        if nthreads > 1 and step > 0 and stop - start > self.nrowsinbuf:
+            return ReadEngine(self, nthreads, start, stop, step)
+        return None
+
     def _read(self, start, stop, step, field=None, out=None):
         """Read a range of rows and return an in-memory object."""
 
@@ -1842,10 +2097,14 @@ very small/large chunksize, you may want to increase/decrease it."""
             result = out
 
         # Call the routine to fill-up the resulting array
+        engine = self._get_read_engine(start, stop, step)
         if step == 1 and not field:
             # This optimization works three times faster than
             # the row._fill_col method (up to 170 MB/s on a pentium IV @ 2GHz)
-            self._read_records(start, stop - start, result)
+            if engine is not None:
+                engine.scan(self._read_records, start, stop - start, result)
+            else:
+                self._read_records(start, stop - start, result)
         # Warning!: _read_field_name should not be used until
         # H5TBread_fields_name in tableextension will be finished
         # F. Alted 2005/05/26
@@ -1853,6 +2112,8 @@ very small/large chunksize, you may want to increase/decrease it."""
         elif field and step > 15 and 0:
             # For step>15, this seems to work always faster than row._fill_col.
             self._read_field_name(result, start, stop, step, field)
+        elif engine is not None:
+            engine.scan(engine.fill, result, field)
         else:
             self.row._fill_col(result, start, stop, step, field)
 
@@ -2168,8 +2429,9 @@ very small/large chunksize, you may want to increase/decrease it."""
             # The table caches for indexed queries are dirty now
             self._dirtycache = True
             if self.autoindex:
-                # Flush the unindexed rows
-                self.flush_rows_to_index(_lastrow=False)
+                if not self._v_file.params['DEFERRED_AUTO_INDEX']:
+                    # Flush the unindexed rows
+                    self.flush_rows_to_index(_lastrow=False)
             else:
                 # All the columns are dirty now
                 self._mark_columns_as_dirty(self.colpathnames)
@@ -2183,6 +2445,16 @@ very small/large chunksize, you may want to increase/decrease it."""
         structured arrays, lists of tuples or array records, and a
         string or Python buffer.
 
+        C-contiguous NumPy structured arrays with exactly the same dtype
+        as the table are written straight to disk, without any copy.
+
+        rows may also be a dictionary mapping column names (or paths of
+        nested columns) to sequences of values, all of them with the same
+        length.  Columns not in the dictionary get their default values.
+
+        .. versionchanged:: 3.5
+           Added the zero-copy path and support for dictionaries of columns.
+
         Examples
         --------
 
@@ -2216,24 +2488,78 @@ very small/large chunksize, you may want to increase/decrease it."""
             raise HDF5ExtError(
                 "You cannot append rows to a non-chunked table.", h5bt=False)
 
-        # Try to convert the object into a recarray compliant with table
-        try:
-            iflavor = flavor_of(rows)
-            if iflavor != 'python':
-                rows = array_as_internal(rows, iflavor)
-            # Works for Python structures and always copies the original,
-            # so the resulting object is safe for in-place conversion.
-            wbufRA = numpy.rec.array(rows, dtype=self._v_dtype)
-        except Exception as exc:  # XXX
-            raise ValueError("rows parameter cannot be converted into a "
-                             "recarray object compliant with table '%s'. "
-                             "The error was: <%s>" % (str(self), exc))
+        if isinstance(rows, dict):
+            wbufRA = self._columns_to_recarr(rows)
+        elif self._is_compliant_buffer(rows):
+            # The rows can be written as they are
+            wbufRA = rows
+        else:
+            # Try to convert the object into a recarray compliant with table
+            try:
+                iflavor = flavor_of(rows)
+                if iflavor != 'python':
+                    rows = array_as_internal(rows, iflavor)
+                # Works for Python structures and always copies the original,
+                # so the resulting object is safe for in-place conversion.
+                wbufRA = numpy.rec.array(rows, dtype=self._v_dtype)
+            except Exception as exc:  # XXX
+                raise ValueError("rows parameter cannot be converted into a "
+                                 "recarray object compliant with table '%s'. "
+                                 "The error was: <%s>" % (str(self), exc))
         lenrows = wbufRA.shape[0]
         # If the number of rows to append is zero, don't do anything else
         if lenrows > 0:
             # Save write buffer to disk
             self._save_buffered_rows(wbufRA, lenrows)
 
+    def _is_compliant_buffer(self, rows):
+        """Can `rows` be written to disk with no conversion at all?
+
+        This is the case of one-dimensional, C-contiguous and aligned
+        arrays with the very same dtype as the table, unless the table
+        has columns that need to be converted in place before writing
+        (which would modify the user data).
+
+        """
+
+        return (isinstance(rows, numpy.ndarray) and
+                rows.dtype == self._v_dtype and
+                rows.ndim == 1 and
+                rows.flags.c_contiguous and rows.flags.aligned and
+                not self._time64colnames)
+
+    def _columns_to_recarr(self, columns):
+        """Interleave a dictionary of `columns` into a new recarray."""
+
+        nrows = None
+        for name, column in six.iteritems(columns):
+            column_len = len(column)
+            if nrows is None:
+                nrows = column_len
+            elif column_len != nrows:
+                raise ValueError("all the columns to be appended to table "
+                                 "'%s' must have the same length" % self)
+        wbufRA = self._get_container(nrows or 0)
+        if set(columns) != set(self.colpathnames):
+            # Some column may be missing, so start with the defaults
+            if self._v_wdflts is None:
+                wbufRA[:] = numpy.zeros(1, dtype=self._v_dtype)
+            else:
+                wbufRA[:] = self._v_wdflts
+        for name, column in six.iteritems(columns):
+            try:
+                field = get_nested_field(wbufRA, name)
+            except (KeyError, ValueError):
+                raise ValueError("table '%s' has no column named ``%s``"
+                                 % (self, name))
+            try:
+                field[:] = column
+            except Exception as exc:
+                raise ValueError("column ``%s`` cannot be converted into "
+                                 "the type of the table '%s' column. "
+                                 "The error was: <%s>" % (name, self, exc))
+        return wbufRA
+
     def _conv_to_recarr(self, obj):
         """Try to convert the object into a recarray."""
 
@@ -2289,7 +2615,7 @@ very small/large chunksize, you may want to increase/decrease it."""
             self._update_elements(lcoords, coords, recarr)
 
         # Redo the index if needed
-        self._reindex(self.colpathnames)
+        self._reindex(self.colpathnames, coords, recarr[:lcoords])
 
         return SizeType(lcoords)
 
@@ -2344,7 +2670,8 @@ very small/large chunksize, you may want to increase/decrease it."""
         self._update_records(start, stop, step, recarr)
 
         # Redo the index if needed
-        self._reindex(self.colpathnames)
+        self._reindex(self.colpathnames,
+                      numpy.arange(start, stop, step), recarr)
 
         return SizeType(lenrows)
 
@@ -2425,7 +2752,7 @@ very small/large chunksize, you may want to increase/decrease it."""
         # save this modified rows in table
         self._update_records(start, stop, step, mod_recarr)
         # Redo the index if needed
-        self._reindex([colname])
+        self._reindex([colname], numpy.arange(start, stop, step), mod_recarr)
 
         return SizeType(nrows)
 
@@ -2501,7 +2828,7 @@ very small/large chunksize, you may want to increase/decrease it."""
         # save this modified rows in table
         self._update_records(start, stop, step, mod_recarr)
         # Redo the index if needed
-        self._reindex(names)
+        self._reindex(names, numpy.arange(start, stop, step), mod_recarr)
 
         return SizeType(nrows)
 
@@ -2510,7 +2837,9 @@ very small/large chunksize, you may want to increase/decrease it."""
 
         This can be useful when you have chosen non-automatic indexing
         for the table (see the :attr:`Table.autoindex` property in
-        :class:`Table`) and you want to update the indexes on it.
+        :class:`Table`) and you want to update the indexes on it.  It is
+        also the way to index the rows appended to an automatically
+        indexed table when the `DEFERRED_AUTO_INDEX` parameter is set.
 
         """
 
@@ -2536,6 +2865,10 @@ very small/large chunksize, you may want to increase/decrease it."""
         # use of the table, it gets dangerous when closing the file, since the
         # column may be accessing a table which is being destroyed.
         index = self.cols._g_col(colname).index
+        if isinstance(index, ChunkIndex):
+            # There are no slices here, so every row is indexed right away
+            index.add_rows(start + nrows)
+            return nrows
         slicesize = index.slicesize
         # The next loop does not rely on xrange so that it can
         # deal with long ints (i.e. more than 32-bit integers)
@@ -2544,14 +2877,31 @@ very small/large chunksize, you may want to increase/decrease it."""
         startLR = index.sorted.nrows * slicesize
         indexedrows = startLR - start
         stop = start + nrows - slicesize + 1
-        while startLR < stop:
-            index.append(
-                [self._read(startLR, startLR + slicesize, 1, colname)],
-                update=update)
-            indexedrows += slicesize
-            startLR += slicesize
+
+        def read_slices(startLR):
+            while startLR < stop:
+                yield self._read(startLR, startLR + slicesize, 1, colname)
+                startLR += slicesize
+
+        if startLR < stop:
+            # Slices are sorted in parallel while the next ones are read
+            nslices = (stop - startLR - 1) // slicesize + 1
+            index.append_slices(
+                read_slices(startLR), update=update,
+                nthreads=self._v_file.params['MAX_INDEX_THREADS'])
+            indexedrows += nslices * slicesize
+            startLR += nslices * slicesize
         # index the remaining rows in last row
         if lastrow and startLR < self.nrows:
+            maxruns = self._v_file.params['MAX_INDEX_DELTA_RUNS']
+            deltastart = index.nelements + index.ndelta
+            if (update and index.nelementsILR > 0 and
+                    index.ndeltaruns < maxruns and deltastart < self.nrows):
+                # Sort just the new rows instead of the whole last row
+                index.append_delta(
+                    self._read(deltastart, self.nrows, 1, colname),
+                    deltastart)
+                return indexedrows + self.nrows - startLR
             index.append_last_row(
                 [self._read(startLR, self.nrows, 1, colname)],
                 update=update)
@@ -2656,6 +3006,81 @@ very small/large chunksize, you may want to increase/decrease it."""
         if 'row' in self.__dict__:
             self.__dict__['row'] = tableextension.Row(self)
 
+    @property
+    def _dirtycache(self):
+        """Whether the data caches are dirty or not."""
+        return self._cachedirty
+
+    @_dirtycache.setter
+    def _dirtycache(self, dirty):
+        self._cachedirty = dirty
+        if (dirty and self._v_isopen and
+                self.__dict__.get('_querycache_exists') is not False):
+            # The data has changed, so saved query results are stale now.
+            # They are dropped at the next flush or query cache access,
+            # instead of on every write.
+            self._querycache_stale = True
+
+    def _get_query_cache(self, create=False):
+        """Get the persistent query cache of this table.
+
+        If the table has no such cache, a new one is created if `create` is
+        true, otherwise None is returned.
+
+        """
+
+        # Whether the cache exists is only looked up in the file once
+        exists = self.__dict__.get('_querycache_exists')
+        if exists is not False:
+            try:
+                qcache = self._v_file._get_node(query_cache_pathname_of(self))
+            except NoSuchNodeError:
+                self._querycache_exists = False
+            else:
+                self._querycache_exists = True
+                return qcache
+        if not create:
+            return None
+        qcache = QueryCacheG(
+            self._v_parent, query_cache_name_of(self),
+            "Query cache for table " + self._v_pathname, new=True)
+        self._querycache_exists = True
+        self._querycache_stale = False
+        return qcache
+
+    def _invalidate_query_cache(self):
+        """Drop the saved query results if the data changed since they
+        were saved."""
+
+        if (not self.__dict__.get('_querycache_stale') or
+                self._v_file.mode == 'r'):
+            return
+        self._querycache_stale = False
+        qcache = self._get_query_cache()
+        if qcache is not None:
+            qcache.invalidate()
+
+    def _load_query_result(self, seqkey):
+        """Get the saved coordinates for the `seqkey` query, if any."""
+
+        if not self._v_file.params['PERSISTENT_QUERY_CACHE']:
+            return None
+        self._invalidate_query_cache()
+        qcache = self._get_query_cache()
+        if qcache is None:
+            return None
+        return qcache.get(seqkey)
+
+    def _save_query_result(self, seqkey, seq):
+        """Save the coordinates in `seq` as the result of `seqkey`."""
+
+        params = self._v_file.params
+        if not params['PERSISTENT_QUERY_CACHE'] or self._v_file.mode == 'r':
+            return
+        self._invalidate_query_cache()
+        qcache = self._get_query_cache(create=True)
+        qcache.put(seqkey, seq, params['ITERSEQ_MAX_SLOTS'])
+
     def _g_move(self, newparent, newname):
         """Move this node in the hierarchy.
 
@@ -2664,6 +3089,7 @@ very small/large chunksize, you may want to increase/decrease it."""
         """
 
         itgpathname = _index_pathname_of(self)
+        qcpathname = query_cache_pathname_of(self)
 
         # First, move the table to the new location.
         super(Table, self)._g_move(newparent, newname)
@@ -2678,6 +3104,16 @@ very small/large chunksize, you may want to increase/decrease it."""
             newiname = _index_name_of(self)
             itgroup._g_move(newigroup, newiname)
 
+        # Saved query results would be stale somewhere else, so drop them.
+        try:
+            qcgroup = self._v_file._get_node(qcpathname)
+        except NoSuchNodeError:
+            pass
+        else:
+            qcgroup._f_remove(recursive=True)
+        self._querycache_exists = False
+        self._querycache_stale = False
+
     def _g_remove(self, recursive=False, force=False):
         # Remove the associated index group (if any).
         itgpathname = _index_pathname_of(self)
@@ -2689,6 +3125,11 @@ very small/large chunksize, you may want to increase/decrease it."""
             itgroup._f_remove(recursive=True)
             self.indexed = False   # there are indexes no more
 
+        # Remove the saved query results (if any).
+        qcgroup = self._get_query_cache()
+        if qcgroup is not None:
+            qcgroup._f_remove(recursive=True)
+
         # Remove the leaf itself from the hierarchy.
         super(Table, self)._g_remove(recursive, force)
 
@@ -2717,8 +3158,13 @@ very small/large chunksize, you may want to increase/decrease it."""
                     col = cols._g_col(colname)
                     col.index.dirty = True
 
-    def _reindex(self, colnames):
-        """Re-index columns in `colnames` if automatic indexing is true."""
+    def _reindex(self, colnames, coords=None, rows=None):
+        """Re-index columns in `colnames` if automatic indexing is true.
+
+        If the coordinates and the new contents of the modified `rows` are
+        given, zone maps are just updated with them.
+
+        """
 
         if self.indexed:
             colindexed, cols = self.colindexed, self.cols
@@ -2727,6 +3173,11 @@ very small/large chunksize, you may want to increase/decrease it."""
             for colname in colnames:
                 if colindexed[colname]:
                     col = cols._g_col(colname)
+                    if (rows is not None and isinstance(col.index, ZoneMap)
+                            and not col.index.dirty):
+                        col.index.update_rows(
+                            coords, get_nested_field(rows, colname))
+                        continue
                     col.index.dirty = True
                     colstoindex.append(colname)
             # Now, re-index the dirty ones
@@ -2898,17 +3349,19 @@ very small/large chunksize, you may want to increase/decrease it."""
         # Flush rows that remains to be appended
         if 'row' in self.__dict__:
             self.row._flush_buffered_rows()
-        if self.indexed and self.autoindex:
-            # Flush any unindexed row
-            rowsadded = self.flush_rows_to_index(_lastrow=True)
-            assert rowsadded <= 0 or self._indexedrows == self.nrows, \
-                ("internal error: the number of indexed rows (%d) "
-                 "and rows in the table (%d) is not equal; "
-                 "please report this to the authors."
-                 % (self._indexedrows, self.nrows))
+        if self.indexed and self.autoindex and self._v_file._iswritable():
+            if not self._v_file.params['DEFERRED_AUTO_INDEX']:
+                # Flush any unindexed row
+                rowsadded = self.flush_rows_to_index(_lastrow=True)
+                assert rowsadded <= 0 or self._indexedrows == self.nrows, \
+                    ("internal error: the number of indexed rows (%d) "
+                     "and rows in the table (%d) is not equal; "
+                     "please report this to the authors."
+                     % (self._indexedrows, self.nrows))
             if self._dirtyindexes:
                 # Finally, re-index any dirty column
                 self.reindex_dirty()
+        self._invalidate_query_cache()
 
         super(Table, self).flush()
 
@@ -2932,9 +3385,13 @@ very small/large chunksize, you may want to increase/decrease it."""
         # I've added a Performance warning in order to compel the user to
         # call self.flush() before the table is being preempted.
         # F. Alted 2006-08-03
+        # Rows pending to be indexed are expected with deferred indexing
+        unsaved_indexedrows = (
+            self._unsaved_indexedrows > 0 and
+            not self._v_file.params['DEFERRED_AUTO_INDEX'])
         if (('row' in self.__dict__ and self.row._get_unsaved_nrows() > 0) or
             (self.indexed and self.autoindex and
-             (self._unsaved_indexedrows > 0 or self._dirtyindexes))):
+             (unsaved_indexedrows or self._dirtyindexes))):
             warnings.warn(("table ``%s`` is being preempted from alive nodes "
                            "without its buffers being flushed or with some "
                            "index being dirty.  This may lead to very "
@@ -2964,6 +3421,15 @@ very small/large chunksize, you may want to increase/decrease it."""
         # Flush right now so the row object does not get in the middle.
         if flush:
             self.flush()
+            # Merge the delta runs of indexes, so that the file can be read
+            # in sorted order even when opened in read-only mode
+            if self.indexed and self._v_file._iswritable():
+                for colname, colindexed in six.iteritems(self.colindexed):
+                    if colindexed:
+                        index = self.cols._g_col(colname).index
+                        if (not isinstance(index, ChunkIndex) and
+                                not index.dirty):
+                            index.compact()
 
         # Some warnings can be issued after calling `self._g_set_location()`
         # in `self.__init__()`.  If warnings are turned into exceptions,
@@ -3560,12 +4026,24 @@ class Column(object):
             resources for creating the index.
         kind : str
             The kind of the index to be built.  It can take the 'ultralight',
-            'light', 'medium' or 'full' values.  Lighter kinds ('ultralight'
-            and 'light') mean that the index takes less space on disk, but will
-            perform queries slower.  Heavier kinds ('medium' and 'full') mean
-            better chances for reducing the entropy of the index (increasing
-            the query speed) at the price of using more disk space as well as
-            more CPU, memory and I/O resources for creating the index.
+            'light', 'medium', 'full', 'bitmap' or 'zonemap' values.  Lighter
+            kinds ('ultralight' and 'light') mean that the index takes less
+            space on disk, but will perform queries slower.  Heavier kinds
+            ('medium' and 'full') mean better chances for reducing the
+            entropy of the index (increasing the query speed) at the price of
+            using more disk space as well as more CPU, memory and I/O
+            resources for creating the index.
+
+            The 'bitmap' kind builds a :class:`tables.chunkindex.BitmapIndex`
+            instead, which records which table chunks hold each distinct value
+            of the column.  It is meant for low-cardinality boolean, integer
+            or string columns, and it can also be used in ``!=`` comparisons.
+            The 'zonemap' kind builds a :class:`tables.chunkindex.ZoneMap`,
+            which just records the minimum and maximum values of the column
+            in every table chunk.  It is meant for range queries on columns
+            whose values are clustered along the table (e.g. timestamps of
+            rows appended in time order), and it is very cheap to update.
+            The optlevel and tmp_dir arguments do not apply to these kinds.
 
             Note that selecting a full kind with an optlevel of 9 (the maximum)
             guarantees the creation of an index with zero entropy, that is, a
@@ -3586,7 +4064,7 @@ class Column(object):
 
         """
 
-        kinds = ['ultralight', 'light', 'medium', 'full']
+        kinds = ['ultralight', 'light', 'medium', 'full', 'bitmap', 'zonemap']
         if kind not in kinds:
             raise ValueError("Kind must have any of these values: %s" % kinds)
         if (not isinstance(optlevel, six.integer_types) or
@@ -728,6 +728,7 @@ cdef class Row:
   cdef object  _table_file, _table_path
   cdef object  modified_fields
   cdef object  seqcache_key
+  cdef object  engine
 
   # The nrow() method has been converted into a property, which is handier
   property nrow:
@@ -799,7 +800,18 @@ cdef class Row:
       self.wfields[name] = self.wrec[name]
 
     # Get the read buffer for this instance (it is private, remember!)
-    buff = self.iobuf = table._get_container(self.nrowsinbuf)
+    buff = table._get_container(self.nrowsinbuf)
+    self._set_read_buffer(buff)
+
+    # Get the stride of these buffers
+    self._stride = buff.strides[0]
+    # The rowsize
+    self._rowsize = self.dtype.itemsize
+    self.nrows = table.nrows  # This value may change
+
+  cdef _set_read_buffer(self, buff):
+    """Make `buff` the read buffer of this instance"""
+    self.iobuf = buff
     # Build the rfields dictionary for faster access to columns
     # This is quite fast, as it only takes around 5 us per column
     # in my laptop (Pentium 4 @ 2 GHz).
@@ -808,12 +820,7 @@ cdef class Row:
     for i, name in enumerate(self.dtype.names):
       self.rfields[i] = buff[name]
       self.rfields[name] = buff[name]
-
-    # Get the stride of these buffers
-    self._stride = buff.strides[0]
-    # The rowsize
-    self._rowsize = self.dtype.itemsize
-    self.nrows = table.nrows  # This value may change
+    self.rfieldscache = {}
 
   cdef _init_loop(self, hsize_t start, long long stop, long long step,
                  object coords, object chunkmap):
@@ -834,6 +841,7 @@ cdef class Row:
         self.nextelement = start
     self._nrow = start - self.step
     self.wherecond = 0
+    self.engine = None
     self.indexed = 0
 
     self.nrows = table.nrows   # Update the row counter
@@ -857,6 +865,8 @@ cdef class Row:
       #self.condkwargs = {'ex_uses_vml': True}
       self.condfunc, self.condargs, self.condkwargs = table._where_condition
       table._where_condition = None
+      self.engine = table._read_engine
+      table._read_engine = None
 
     if table._use_index:
       # Indexing code depends on this condition (see #319)
@@ -1077,15 +1087,28 @@ cdef class Row:
         if self.stopb > self.nrowsinbuf:
           self.stopb = self.nrowsinbuf
         self._row = self.startb - self.step
-        # Read a chunk
-        recout = self.table._read_records(self.nextelement, self.nrowsinbuf,
-                                          self.iobuf)
-        self.nrowsread = self.nrowsread + recout
-        self.indexchunk = -self.step
+        if self.engine is not None:
+          # Read a chunk and evaluate the condition while the next one
+          # is being read in the background.
+          recout, buff, self.indexvalid = self.engine.fetch(
+            self.nextelement, self.nrowsinbuf, self.iobuf,
+            (self.condfunc, self.condargs, self.condkwargs))
+          if buff is not self.iobuf:
+            # The engine handed over its read-ahead buffer
+            self._set_read_buffer(buff)
+          self.nrowsread = self.nrowsread + recout
+          self.indexchunk = -self.step
+        else:
+          # Read a chunk
+          recout = self.table._read_records(self.nextelement, self.nrowsinbuf,
+                                            self.iobuf)
+          self.nrowsread = self.nrowsread + recout
+          self.indexchunk = -self.step
 
-        # Evaluate the condition on this table fragment.
-        self.indexvalid = call_on_recarr(
-          self.condfunc, self.condargs, self.iobuf[:recout], **self.condkwargs)
+          # Evaluate the condition on this table fragment.
+          self.indexvalid = call_on_recarr(
+            self.condfunc, self.condargs, self.iobuf[:recout],
+            **self.condkwargs)
         self.index_valid_data = <char *>self.indexvalid.data
 
         # Is there any interesting information in this buffer?
@@ -1179,9 +1202,11 @@ cdef class Row:
       seqcache = self.table._seqcache
       # Guessing iterseq size: Each element in self.iterseq should take at least 8 bytes
       seqcache.setitem_(self.seqcache_key, self.iterseq, len(self.iterseq) * 8)
+      self.table._save_query_result(self.seqcache_key, self.iterseq)
     self._riterator = 0        # out of iterator
     self.iterseq = None        # empty seqcache-related things
     self.seqcache_key = None
+    self.engine = None         # release the read engine, if any
     if self._mod_nrows > 0:    # Check if there is some modified row
       self._flush_mod_rows()     # Flush any possible modified row
     self.modified_fields = set()  # Empty the set of modified fields
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+"""Test module for the asynchronous API in ``tables.aio``."""
+
+from __future__ import absolute_import
+
+import sys
+
+import numpy
+
+import tables
+from tables.tests import common
+from tables.tests.common import unittest
+from tables.tests.common import PyTablesTestCase as TestCase
+
+try:
+    import asyncio
+    from tables import aio
+except (ImportError, SyntaxError):
+    aio = None
+
+
+@unittest.skipIf(aio is None, 'tables.aio requires Python 3')
+class AsyncReadTestCase(common.TempFileMixin, TestCase):
+    nrows = 1000
+
+    def setUp(self):
+        super(AsyncReadTestCase, self).setUp()
+        self.data = numpy.zeros(self.nrows, dtype=[('i', 'i4'), ('f', 'f8')])
+        self.data['i'] = numpy.arange(self.nrows)
+        self.data['f'] = numpy.arange(self.nrows) % 7
+        self.h5file.create_table('/', 'table', self.data)
+        self.h5file.create_array('/', 'array', numpy.arange(100))
+        self.h5file.create_group('/', 'group')
+        self.h5file.close()
+
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.afile = self.wait(aio.open_file(self.h5fname))
+        self.h5file = self.afile.file
+
+    def tearDown(self):
+        self.wait(self.afile.close())
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        self.h5file = tables.open_file(self.h5fname)
+        super(AsyncReadTestCase, self).tearDown()
+
+    def wait(self, awaitable):
+        return self.loop.run_until_complete(awaitable)
+
+    def collect(self, aiterator):
+        batches = []
+        while True:
+            try:
+                batches.append(self.wait(aiterator.__anext__()))
+            except StopAsyncIteration:
+                return batches
+
+    def test00_get_node(self):
+        atable = self.wait(self.afile.get_node('/table'))
+        self.assertIsInstance(atable, aio.AsyncTable)
+        self.assertEqual(atable.nrows, self.nrows)
+        aarray = self.wait(self.afile.get_node('/', 'array'))
+        self.assertIsInstance(aarray, aio.AsyncLeaf)
+        self.assertEqual(len(aarray), 100)
+        group = self.wait(self.afile.get_node('/group'))
+        self.assertIsInstance(group, tables.Group)
+        self.assertRaises(tables.NoSuchNodeError,
+                          self.wait, self.afile.get_node('/missing'))
+
+    def test00b_metadata(self):
+        atable = self.wait(self.afile.get_node('/table'))
+        self.assertEqual(atable.shape, (self.nrows,))
+        self.assertEqual(atable.colnames, ['i', 'f'])
+        aarray = self.wait(self.afile.get_node('/array'))
+        self.assertEqual(aarray.dtype, numpy.arange(100).dtype)
+        # Other attributes would access HDF5 from the event loop
+        for name in ['attrs', 'cols', 'append', 'modify_rows', 'flush']:
+            self.assertRaises(AttributeError, getattr, atable, name)
+        self.assertRaises(AttributeError, getattr, aarray, 'attrs')
+
+    def test01_read(self):
+        atable = self.wait(self.afile.get_node('/table'))
+        self.assertTrue(common.areArraysEqual(self.wait(atable.read()),
+                                              self.data))
+        self.assertTrue(common.areArraysEqual(self.wait(atable[10:20]),
+                                              self.data[10:20]))
+        aarray = self.wait(self.afile.get_node('/array'))
+        self.assertEqual(self.wait(aarray[5]), 5)
+        self.assertEqual(self.wait(aarray.read(0, 3)).tolist(), [0, 1, 2])
+
+    def test02_read_where(self):
+        atable = self.wait(self.afile.get_node('/table'))
+        limit = 2
+        result = self.wait(atable.read_where('f < limit'))
+        expected = self.data[self.data['f'] < 2]
+        self.assertTrue(common.areArraysEqual(result, expected))
+        coords = self.wait(atable.get_where_list('f == 3'))
+        self.assertEqual(coords.tolist(),
+                         numpy.nonzero(self.data['f'] == 3)[0].tolist())
+        rows = self.wait(atable.read_coordinates([3, 1], field='i'))
+        self.assertEqual(rows.tolist(), [3, 1])
+
+    def test03_iterrows(self):
+        atable = self.wait(self.afile.get_node('/table'))
+        batches = self.collect(atable.iterrows(batch_size=300))
+        self.assertEqual([len(batch) for batch in batches],
+                         [300, 300, 300, 100])
+        self.assertTrue(common.areArraysEqual(numpy.concatenate(batches),
+                                              self.data))
+        batches = self.collect(atable.iterrows(5, 995, 3, batch_size=100))
+        self.assertTrue(common.areArraysEqual(numpy.concatenate(batches),
+                                              self.data[5:995:3]))
+
+    def test04_where(self):
+        atable = self.wait(self.afile.get_node('/table'))
+        limit = 1
+        batches = self.collect(atable.where('f < limit', start=2, stop=1000,
+                                            batch_size=100))
+        data = self.data[2:]
+        self.assertTrue(common.areArraysEqual(numpy.concatenate(batches),
+                                              data[data['f'] < 1]))
+        self.assertEqual(self.collect(atable.where('f > 10')), [])
+
+    def test05_context_manager(self):
+        afile = self.wait(aio.open_file(self.h5fname))
+        self.assertIs(self.wait(afile.__aenter__()), afile)
+        self.wait(afile.__aexit__(None, None, None))
+        self.assertFalse(afile.file.isopen)
+
+    def test05b_open_error(self):
+        executors = []
+        executor_class = aio.ThreadPoolExecutor
+
+        def new_executor(*args, **kwargs):
+            executor = executor_class(*args, **kwargs)
+            executors.append(executor)
+            return executor
+
+        aio.ThreadPoolExecutor = new_executor
+        try:
+            self.assertRaises(IOError, self.wait,
+                              aio.open_file(self.h5fname + '.missing'))
+        finally:
+            aio.ThreadPoolExecutor = executor_class
+        # The worker thread is released
+        self.assertTrue(executors[0]._shutdown)
+
+    def test06_gather(self):
+        atable = self.wait(self.afile.get_node('/table'))
+        futures = [atable[i] for i in range(10)]
+        rows = self.wait(asyncio.gather(*futures))
+        self.assertEqual([row['i'] for row in rows], list(range(10)))
+
+
+def suite():
+    theSuite = unittest.TestSuite()
+    theSuite.addTest(unittest.makeSuite(AsyncReadTestCase))
+    return theSuite
+
+
+if __name__ == '__main__':
+    common.parse_argv(sys.argv)
+    common.print_versions()
+    unittest.main(defaultTest='suite')
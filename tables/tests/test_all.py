@@ -51,6 +51,8 @@ def suite():
         'tables.tests.test_index_backcompat',
         'tables.tests.test_aux',
         'tables.tests.test_utils',
+        'tables.tests.test_aio',
+        'tables.tests.test_join',
         # Sub-packages
         'tables.nodes.tests.test_filenode',
     ]
@@ -2668,6 +2668,65 @@ class TestCreateArrayArgs(common.TempFileMixin, TestCase):
                           shape=shape)
 
 
+class MemmapTestCase(common.TempFileMixin, TestCase):
+
+    def test00_read(self):
+        """Mapping an array in a writable file."""
+
+        data = numpy.arange(1000.).reshape(10, 100)
+        array = self.h5file.create_array('/', 'array', data)
+        mmap = array.as_memmap()
+        self.assertIsInstance(mmap, numpy.memmap)
+        self.assertFalse(mmap.flags.writeable)
+        self.assertTrue(allequal(mmap, data))
+        self.assertEqual(mmap[3, 5], data[3, 5])
+
+    def test01_reopen(self):
+        """Mapping arrays in a read-only file, with different byteorders."""
+
+        self.h5file.create_array('/', 'little',
+                                 numpy.arange(10, dtype='<i4'))
+        self.h5file.create_array('/', 'big', numpy.arange(10, dtype='>i4'))
+        self.h5file.create_array('/', 'strings', [b'a', b'bc', b'def'])
+        self._reopen()
+        for name in ('little', 'big', 'strings'):
+            array = self.h5file.get_node('/', name)
+            self.assertTrue(allequal(array.as_memmap(),
+                                     numpy.asarray(array.read())))
+
+    def test02_userblock(self):
+        """Mapping arrays in files with a user block."""
+
+        self._reopen('w', user_block_size=1024)
+        data = numpy.arange(100, dtype='int16')
+        array = self.h5file.create_array('/', 'array', data)
+        self.assertTrue(allequal(array.as_memmap(), data))
+
+    def test03_empty(self):
+        """Mapping empty arrays."""
+
+        array = self.h5file.create_array('/', 'array', numpy.zeros((0, 3)))
+        mmap = array.as_memmap()
+        self.assertEqual(mmap.shape, (0, 3))
+
+    def test04_chunked(self):
+        """Chunked arrays can not be mapped."""
+
+        carray = self.h5file.create_carray('/', 'carray',
+                                           obj=numpy.arange(10))
+        self.assertRaises(ValueError, carray.as_memmap)
+        earray = self.h5file.create_earray('/', 'earray',
+                                           obj=numpy.arange(10))
+        self.assertRaises(ValueError, earray.as_memmap)
+
+    def test05_driver(self):
+        """Only files on disk can be mapped."""
+
+        self._reopen('w', driver='H5FD_CORE')
+        array = self.h5file.create_array('/', 'array', numpy.arange(10))
+        self.assertRaises(ValueError, array.as_memmap)
+
+
 def suite():
     theSuite = unittest.TestSuite()
     niter = 1
@@ -2734,6 +2793,7 @@ def suite():
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
         theSuite.addTest(unittest.makeSuite(TestCreateArrayArgs))
         theSuite.addTest(unittest.makeSuite(BroadcastTest))
+        theSuite.addTest(unittest.makeSuite(MemmapTestCase))
 
     return theSuite
 
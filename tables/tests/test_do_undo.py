@@ -2619,6 +2619,88 @@ class NotLoggedTestCase(common.TempFileMixin, TestCase):
         self.assertRaises(AttributeError, getattr, arr._v_attrs, 'foo')
 
 
+class ActionLogBufferTestCase(common.TempFileMixin, TestCase):
+    """Test the buffering of actions before writing the action log."""
+
+    def setUp(self):
+        super(ActionLogBufferTestCase, self).setUp()
+        self.h5file.enable_undo()
+
+    def test00_pendingUntilMark(self):
+        """Actions are written to the log when a mark is created."""
+
+        h5file = self.h5file
+        for i in range(3):
+            h5file.create_group('/', 'group%d' % i)
+        self.assertEqual(h5file._actionlog.nrows, 1)  # the implicit mark
+        self.assertEqual(h5file._curaction, 3)
+        h5file.mark()
+        self.assertEqual(h5file._actionlog.nrows, 5)
+        self.assertEqual(h5file._curaction, 4)
+        self.assertEqual(h5file._pending_actions, [])
+
+    def test01_pendingUntilFlush(self):
+        """Actions are written to the log when the file is flushed."""
+
+        h5file = self.h5file
+        h5file.create_group('/', 'group')
+        h5file.flush()
+        self.assertEqual(h5file._actionlog.nrows, 2)
+        self.assertEqual(h5file._pending_actions, [])
+
+    def test02_manyActions(self):
+        """Undoing and redoing more actions than fit in the buffer."""
+
+        h5file = self.h5file
+        ngroups = 2 * h5file._actionlog.nrowsinbuf + 3
+        for i in range(ngroups):
+            h5file.create_group('/', 'group%d' % i)
+        self.assertTrue(len(h5file._pending_actions) <
+                        h5file._actionlog.nrowsinbuf)
+        h5file.undo()
+        for i in range(ngroups):
+            self.assertTrue('/group%d' % i not in h5file)
+        h5file.redo()
+        for i in range(ngroups):
+            self.assertTrue('/group%d' % i in h5file)
+
+    def test03_undoPending(self):
+        """Undoing pending actions and logging new ones after that."""
+
+        h5file = self.h5file
+        h5file.create_group('/', 'group1')
+        h5file.mark()
+        h5file.create_group('/', 'group2')
+        h5file.undo()
+        self.assertTrue('/group1' in h5file)
+        self.assertTrue('/group2' not in h5file)
+        # The new action replaces the undone one
+        h5file.create_group('/', 'group3')
+        h5file.redo()
+        self.assertTrue('/group2' not in h5file)
+        self.assertTrue('/group3' in h5file)
+        h5file.undo()
+        self.assertTrue('/group1' in h5file)
+        self.assertTrue('/group3' not in h5file)
+
+    def test04_reopen(self):
+        """Pending actions are saved when the file is closed."""
+
+        h5file = self.h5file
+        h5file.create_group('/', 'group1')
+        h5file.mark()
+        h5file.create_group('/', 'group2')
+        h5file.create_group('/group2', 'group3')
+        self._reopen('r+')
+        h5file = self.h5file
+        self.assertEqual(h5file._curaction, 4)
+        h5file.undo()
+        self.assertTrue('/group1' in h5file)
+        self.assertTrue('/group2' not in h5file)
+        h5file.goto(-1)
+        self.assertTrue('/group2/group3' in h5file)
+
+
 class CreateParentsTestCase(common.TempFileMixin, TestCase):
     """Test the ``createparents`` flag."""
 
@@ -2727,6 +2809,7 @@ def suite():
         theSuite.addTest(unittest.makeSuite(AttributesTestCase))
         theSuite.addTest(unittest.makeSuite(ComplexTestCase))
         theSuite.addTest(unittest.makeSuite(NotLoggedTestCase))
+        theSuite.addTest(unittest.makeSuite(ActionLogBufferTestCase))
         theSuite.addTest(unittest.makeSuite(CreateParentsTestCase))
     if common.heavy:
         pass
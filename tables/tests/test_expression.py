@@ -1511,6 +1511,203 @@ class VeryLargeInputs2(VeryLargeInputsTestCase):
     shape = (2**32 + 1,)    # check that arrays > 32-bit are supported
 
 
+class PipelineTestCase(common.TempFileMixin, TestCase):
+    """Tests for the pipelined evaluation of expressions."""
+
+    # Rows are large enough so that the computation takes several blocks
+    shape = (2000, 1000)
+
+    def setUp(self):
+        super(PipelineTestCase, self).setUp()
+        filters = tables.Filters(complevel=1)
+        self.a = np.arange(np.prod(self.shape), dtype='f8').reshape(
+            self.shape)
+        self.b = np.linspace(0, 1, self.shape[1])
+        self.a1 = self.h5file.create_carray('/', 'a1', obj=self.a,
+                                            filters=filters)
+        self.b1 = self.h5file.create_array('/', 'b1', obj=self.b)
+        self.expected = 2 * self.a + np.sin(self.b)
+
+    def _expr(self, depth=2, nthreads=None):
+        expr = tables.Expr('2 * a1 + sin(b1)',
+                           uservars={'a1': self.a1, 'b1': self.b1})
+        expr.set_pipeline(depth, nthreads)
+        return expr
+
+    def test00_carray(self):
+        """Pipelined evaluation into an on-disk array."""
+
+        out = self.h5file.create_carray('/', 'out', tables.Float64Atom(),
+                                        self.shape)
+        for depth in [1, 2, 4]:
+            expr = self._expr(depth)
+            expr.set_output(out)
+            expr.eval()
+            self.assertTrue(common.allequal(out[:], self.expected))
+            out[:] = 0
+
+    def test01_ranges(self):
+        """Pipelined evaluation with input and output ranges."""
+
+        out = self.h5file.create_carray('/', 'out', tables.Float64Atom(),
+                                        self.shape)
+        expr = self._expr()
+        expr.set_inputs_range(3, 1990, 2)
+        expr.set_output(out)
+        expr.set_output_range(10, 1004)
+        expr.eval()
+        self.assertTrue(common.allequal(out[10:1004],
+                                        self.expected[3:1990:2][:994]))
+        self.assertTrue(common.allequal(out[:10], np.zeros((10, 1000))))
+
+    def test02_append(self):
+        """Pipelined evaluation appending to an enlargeable array."""
+
+        out = self.h5file.create_earray('/', 'out', tables.Float64Atom(),
+                                        (0, self.shape[1]))
+        expr = self._expr(depth=3, nthreads=2)
+        expr.set_output(out, append_mode=True)
+        expr.eval()
+        self.assertTrue(common.allequal(out[:], self.expected))
+
+    def test03_numpy_output(self):
+        """Pipelined evaluation into a new NumPy array."""
+
+        self.assertTrue(common.allequal(self._expr().eval(), self.expected))
+
+    def test04_write_error(self):
+        """Errors when writing the output are raised by `eval()`."""
+
+        class BadOutput(object):
+            shape = self.shape
+
+            def __setitem__(self, key, value):
+                if key[0].start > 0:
+                    raise IndexError("no room for %r" % (key,))
+
+        expr = self._expr()
+        expr.set_output(BadOutput())
+        self.assertRaises(IndexError, expr.eval)
+
+    def test05_bad_args(self):
+        """Invalid pipeline settings are refused."""
+
+        expr = self._expr()
+        self.assertRaises(ValueError, expr.set_pipeline, -1)
+        self.assertRaises(ValueError, expr.set_pipeline, 2, 0)
+
+    def test06_no_full_reads(self):
+        """Sliced operands are read block after block, never in full."""
+
+        full_reads = []
+        read = tables.CArray.read
+
+        def counting_read(leaf, start=None, stop=None, *args, **kwargs):
+            if start is None and stop is None:
+                full_reads.append(leaf._v_pathname)
+            return read(leaf, start, stop, *args, **kwargs)
+
+        b2 = self.h5file.create_carray('/', 'b2', obj=self.a)
+        expr = tables.Expr('a1 * b2', uservars={'a1': self.a1, 'b2': b2})
+        expr.set_pipeline(2)
+        tables.CArray.read = counting_read
+        try:
+            result = expr.eval()
+        finally:
+            tables.CArray.read = read
+        self.assertEqual(full_reads, [])
+        self.assertTrue(common.allequal(result, self.a * self.a))
+
+
+class ReduceTestCase(common.TempFileMixin, TestCase):
+    """Tests for reductions of the outcome of expressions."""
+
+    shape = (2000, 3, 4)
+    ops = [('sum', np.sum), ('min', np.min), ('max', np.max),
+           ('mean', np.mean), ('count', np.count_nonzero)]
+
+    def setUp(self):
+        super(ReduceTestCase, self).setUp()
+        self.a = np.arange(np.prod(self.shape), dtype='f8').reshape(
+            self.shape) % 97
+        self.b = np.linspace(-1, 1, self.shape[-1])
+        self.a1 = self.h5file.create_carray('/', 'a1', obj=self.a,
+                                            chunkshape=(100, 3, 4))
+        self.b1 = self.h5file.create_array('/', 'b1', obj=self.b)
+        self.expected = self.a * self.b - 3
+
+    def _expr(self):
+        return tables.Expr('a1 * b1 - 3',
+                           uservars={'a1': self.a1, 'b1': self.b1})
+
+    def _check(self, expr, expected):
+        for op, func in self.ops:
+            for axis in [None, 0, 1, 2, -1]:
+                result = expr.reduce(op, axis)
+                if common.verbose:
+                    print("Reduction %s along %s: %r" % (op, axis, result))
+                self.assertTrue(np.allclose(result, func(expected, axis)),
+                                "%s along axis %s differs" % (op, axis))
+                self.assertEqual(np.shape(result),
+                                 np.shape(func(expected, axis)))
+
+    def test00_reduce(self):
+        """Reducing the outcome, in full and along every axis."""
+
+        self._check(self._expr(), self.expected)
+
+    def test01_range(self):
+        """Reducing the outcome of a range of inputs."""
+
+        expr = self._expr()
+        expr.set_inputs_range(7, 1900, 3)
+        self._check(expr, self.expected[7:1900:3])
+
+    def test02_pipeline(self):
+        """Reducing the outcome with a pipelined evaluation."""
+
+        expr = self._expr()
+        expr.set_pipeline(3)
+        self._check(expr, self.expected)
+
+    def test03_count(self):
+        """Counting the elements fulfilling a condition."""
+
+        expr = tables.Expr('a1 > 50', uservars={'a1': self.a1})
+        self.assertEqual(expr.reduce('count'),
+                         np.count_nonzero(self.a > 50))
+        self.assertEqual(expr.reduce('sum'), np.sum(self.a > 50))
+
+    def test04_empty(self):
+        """Reducing an empty outcome."""
+
+        expr = self._expr()
+        expr.set_inputs_range(10, 10)
+        self.assertEqual(expr.reduce('sum'), 0)
+        self.assertEqual(expr.reduce('count'), 0)
+        self.assertTrue(np.isnan(expr.reduce('mean')))
+        self.assertRaises(ValueError, expr.reduce, 'min')
+
+    def test05_bad_args(self):
+        """Invalid reductions are refused."""
+
+        expr = self._expr()
+        self.assertRaises(ValueError, expr.reduce, 'median')
+        self.assertRaises(ValueError, expr.reduce, 'sum', 3)
+        self.assertRaises(ValueError, expr.reduce, 'sum', -4)
+
+    def test06_output_untouched(self):
+        """The output container is not used by reductions."""
+
+        out = self.h5file.create_carray('/', 'out', tables.Float64Atom(),
+                                        self.shape)
+        expr = self._expr()
+        expr.set_output(out)
+        self.assertTrue(np.allclose(expr.reduce('max'),
+                                    self.expected.max()))
+        self.assertTrue(common.allequal(out[:], np.zeros(self.shape)))
+
+
 def suite():
     """Return a test suite consisting of all the test cases in the module."""
 
@@ -1567,6 +1764,8 @@ def suite():
         theSuite.addTest(unittest.makeSuite(setOutputRange8))
         theSuite.addTest(unittest.makeSuite(setOutputRange9))
         theSuite.addTest(unittest.makeSuite(VeryLargeInputs1))
+        theSuite.addTest(unittest.makeSuite(PipelineTestCase))
+        theSuite.addTest(unittest.makeSuite(ReduceTestCase))
         if common.heavy:
             theSuite.addTest(unittest.makeSuite(VeryLargeInputs2))
     return theSuite
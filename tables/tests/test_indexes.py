@@ -14,6 +14,7 @@ from tables import (
     UInt16Col, Float32Col,
 )
 from tables.index import Index, default_auto_index, default_index_filters
+from tables.chunkindex import BitmapIndex, ZoneMap
 from tables.idxutils import calc_chunksize
 from tables.exceptions import OldIndexWarning
 from tables.tests import common
@@ -2657,6 +2658,796 @@ class TestIndexingNans(TempFileMixin, TestCase):
         self.assertEqual(len(results), 100*2)
 
 
+class PersistentQueryCacheTestCase(TempFileMixin, TestCase):
+    open_kwargs = {'persistent_query_cache': True}
+    condition = '(var3 > 10) & (var3 < 20)'
+
+    def setUp(self):
+        super(PersistentQueryCacheTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'table', TDescr)
+        table.append([(str(i).encode(), True, i % 100, float(i))
+                      for i in range(1000)])
+        table.cols.var3.create_index()
+        self.expected = [i for i in range(1000) if 10 < i % 100 < 20]
+
+    def _query(self, table):
+        return table.get_where_list(self.condition).tolist()
+
+    def test00_saved(self):
+        """Query results are saved next to the table."""
+
+        table = self.h5file.root.table
+        self.assertEqual(self._query(table), self.expected)
+        qcache = self.h5file.get_node('/_p_q_table')
+        self.assertEqual(len(qcache._v_children), 1)
+        self.assertFalse(qcache._f_isvisible())
+
+    def test01_reused(self):
+        """Saved results are used after reopening the file."""
+
+        self._query(self.h5file.root.table)
+        self._reopen(mode='r', persistent_query_cache=True)
+        table = self.h5file.root.table
+        search = Index.search
+        Index.search = None   # the index must not be needed at all
+        try:
+            self.assertEqual(self._query(table), self.expected)
+        finally:
+            Index.search = search
+
+    def test02_invalidated(self):
+        """Modifying the table drops the saved results."""
+
+        table = self.h5file.root.table
+        self._query(table)
+        qcache = self.h5file.get_node('/_p_q_table')
+        version = qcache.version
+        table.modify_column(0, 1, column=[15], colname='var3')
+        table.flush()
+        self.assertGreater(qcache.version, version)
+        self.assertEqual(len(qcache._v_children), 0)
+        self._reopen(mode='a', persistent_query_cache=True)
+        self.assertEqual(self._query(self.h5file.root.table),
+                         [0] + self.expected)
+
+    def test03_empty(self):
+        """Empty results are saved too."""
+
+        table = self.h5file.root.table
+        self.assertEqual(table.get_where_list('var3 > 1000').tolist(), [])
+        self._reopen(mode='r', persistent_query_cache=True)
+        table = self.h5file.root.table
+        self.assertEqual(table.get_where_list('var3 > 1000').tolist(), [])
+
+    def test04_remove(self):
+        """Removing or moving the table drops the saved results."""
+
+        table = self.h5file.root.table
+        self._query(table)
+        table.rename('table2')
+        self.assertNotIn('/_p_q_table', self.h5file)
+        self.assertNotIn('/_p_q_table2', self.h5file)
+        table.get_where_list('var3 < 10')
+        self.assertIn('/_p_q_table2', self.h5file)
+        table.remove()
+        self.assertNotIn('/_p_q_table2', self.h5file)
+
+    def test05_disabled(self):
+        """Nothing is saved by default."""
+
+        self._reopen(mode='a')
+        self._query(self.h5file.root.table)
+        self.assertNotIn('/_p_q_table', self.h5file)
+
+    def test06_no_lookups(self):
+        """Writing to tables without saved results does not look them up."""
+
+        self._reopen(mode='a', persistent_query_cache=True)
+        table = self.h5file.root.table
+        table.append([(b'x', True, 1, 1.)])
+        table.flush()
+        self.assertIs(table._querycache_exists, False)
+        get_node = self.h5file._get_node
+        lookups = []
+
+        def counting_get_node(nodepath):
+            lookups.append(nodepath)
+            return get_node(nodepath)
+
+        self.h5file._get_node = counting_get_node
+        try:
+            for i in range(10):
+                table.append([(b'x', True, i, 1.)])
+                table.modify_column(0, 1, column=[i], colname='var3')
+                table.flush()
+        finally:
+            del self.h5file._get_node
+        self.assertNotIn('/_p_q_table', lookups)
+
+    def test07_invalidated_once(self):
+        """Saved results are dropped once per flush, not per write."""
+
+        table = self.h5file.root.table
+        self._query(table)
+        qcache = self.h5file.get_node('/_p_q_table')
+        version = qcache.version
+        for i in range(5):
+            table.append([(b'x', True, i, 1.)])
+            table.modify_column(0, 1, column=[i], colname='var3')
+        self.assertEqual(qcache.version, version)
+        table.flush()
+        self.assertEqual(qcache.version, version + 1)
+        self.assertEqual(self._query(table),
+                         [i for i in range(1005)
+                          if 10 < table.cols.var3[i] < 20])
+
+
+class DeferredAutoIndexTestCase(TempFileMixin, TestCase):
+    open_kwargs = {'deferred_auto_index': True}
+    condition = '(var3 > 10) & (var3 < 20)'
+
+    def setUp(self):
+        super(DeferredAutoIndexTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'table', TDescr,
+                                         chunkshape=100)
+        table.append(self._rows(0, 1000))
+        table.cols.var3.create_csindex()
+        table.append(self._rows(1000, 2500))
+        table.flush()
+
+    def _rows(self, start, stop):
+        return [(str(i).encode(), True, i % 100, float(i))
+                for i in range(start, stop)]
+
+    def _expected(self, nrows):
+        return [i for i in range(nrows) if 10 < i % 100 < 20]
+
+    def test00_flush(self):
+        """Flushing does not update the indexes."""
+
+        table = self.h5file.root.table
+        index = table.cols.var3.index
+        self.assertFalse(index.dirty)
+        self.assertEqual(index.nelements, 1000)
+        self.assertEqual(table.nrows, 2500)
+
+    def test01_query(self):
+        """Queries scan the rows not yet indexed."""
+
+        table = self.h5file.root.table
+        self.assertEqual(table.will_query_use_indexing(self.condition),
+                         frozenset(['var3']))
+        self.assertEqual(table.get_where_list(self.condition).tolist(),
+                         self._expected(2500))
+        result = table.get_where_list('var3 == 15', start=900, stop=1500)
+        self.assertEqual(result.tolist(), [915, 1015, 1115, 1215, 1315, 1415])
+        self.assertEqual(table.get_where_list('var3 > 100').tolist(), [])
+
+    def test02_flush_rows_to_index(self):
+        """Pending rows are indexed on request."""
+
+        table = self.h5file.root.table
+        table.flush_rows_to_index()
+        self.assertEqual(table.cols.var3.index.nelements, 2500)
+        self.assertEqual(table.get_where_list(self.condition).tolist(),
+                         self._expected(2500))
+
+    def test03_reopen(self):
+        """Pending rows are kept across reopens and indexed on flush."""
+
+        self._reopen(mode='a', deferred_auto_index=True)
+        table = self.h5file.root.table
+        self.assertEqual(table.cols.var3.index.nelements, 1000)
+        self.assertEqual(table.get_where_list(self.condition).tolist(),
+                         self._expected(2500))
+        self._reopen(mode='a')
+        table = self.h5file.root.table
+        table.append(self._rows(2500, 3000))
+        table.flush()
+        self.assertEqual(table.cols.var3.index.nelements, 3000)
+        self.assertEqual(table.get_where_list(self.condition).tolist(),
+                         self._expected(3000))
+
+    def test04_read_sorted(self):
+        """Sorted reads index the pending rows first."""
+
+        table = self.h5file.root.table
+        result = table.read_sorted('var3', field='var3')
+        self.assertEqual(result.tolist(),
+                         sorted(i % 100 for i in range(2500)))
+
+    def test05_read_only(self):
+        """Pending rows are left alone in read-only files."""
+
+        self._reopen(mode='r')
+        table = self.h5file.root.table
+        self.assertEqual(table._unsaved_indexedrows, 1500)
+        self.assertEqual(table.get_where_list(self.condition).tolist(),
+                         self._expected(2500))
+        self.assertRaises(ValueError, table.read_sorted, 'var3',
+                          checkCSI=True)
+        self.assertRaises(ValueError, table.itersorted, 'var3')
+        # Neither flushing nor closing try to index the pending rows
+        table.flush()
+        self._reopen(mode='r')
+        self.assertEqual(self.h5file.root.table.cols.var3.index.nelements,
+                         1000)
+
+
+class ParallelIndexBuildTestCase(TempFileMixin, TestCase):
+    open_kwargs = {'max_index_threads': 4}
+    nrows = 500
+
+    def setUp(self):
+        super(ParallelIndexBuildTestCase, self).setUp()
+        self.data = numpy.random.RandomState(7).randint(0, 50, self.nrows)
+        for name in ('serial', 'parallel'):
+            table = self.h5file.create_table('/', name, TDescr)
+            table.append([(b'', True, value, 0.)
+                          for value in self.data])
+
+    def _build(self, kind, optlevel):
+        params = self.h5file.params
+        params['MAX_INDEX_THREADS'] = 1
+        try:
+            self.h5file.root.serial.cols.var3.create_index(
+                optlevel, kind, _blocksizes=small_blocksizes)
+        finally:
+            params['MAX_INDEX_THREADS'] = 4
+        self.h5file.root.parallel.cols.var3.create_index(
+            optlevel, kind, _blocksizes=small_blocksizes)
+        return (self.h5file.root.serial.cols.var3.index,
+                self.h5file.root.parallel.cols.var3.index)
+
+    def _check(self, kind, optlevel):
+        serial, parallel = self._build(kind, optlevel)
+        self.assertGreater(parallel.nslices, 4)
+        self.assertEqual(parallel.nelements, self.nrows)
+        self.assertEqual(parallel.sorted[:].tolist(),
+                         serial.sorted[:].tolist())
+        self.assertEqual(parallel.indices[:].tolist(),
+                         serial.indices[:].tolist())
+        table = self.h5file.root.parallel
+        expected = numpy.nonzero((self.data > 10) & (self.data < 20))[0]
+        self.assertEqual(
+            table.get_where_list('(var3 > 10) & (var3 < 20)').tolist(),
+            expected.tolist())
+
+    def test00_ultralight(self):
+        self._check('ultralight', 3)
+
+    def test01_light(self):
+        self._check('light', 6)
+
+    def test02_medium(self):
+        self._check('medium', 6)
+
+    def test03_full(self):
+        self._check('full', 9)
+        table = self.h5file.root.parallel
+        self.assertEqual(table.read_sorted('var3', field='var3').tolist(),
+                         sorted(self.data.tolist()))
+
+    def test04_append(self):
+        """Rows appended to an indexed table are sorted in parallel too."""
+
+        self._build('medium', 6)
+        for table in (self.h5file.root.serial, self.h5file.root.parallel):
+            table.append([(b'', True, value, 0.) for value in self.data])
+            table.flush()
+        serial = self.h5file.root.serial.cols.var3.index
+        parallel = self.h5file.root.parallel.cols.var3.index
+        self.assertEqual(parallel.nelements, 2 * self.nrows)
+        self.assertEqual(parallel.sorted[:].tolist(),
+                         serial.sorted[:].tolist())
+        self.assertEqual(parallel.indices[:].tolist(),
+                         serial.indices[:].tolist())
+
+
+class ChunkmapTestCase(TempFileMixin, TestCase):
+    nrows = 2000
+    limits = [(10, 20), (0, 1), (42, 42), (-5, 3), (95, 200), (60, 50)]
+
+    def setUp(self):
+        super(ChunkmapTestCase, self).setUp()
+        self.data = numpy.random.RandomState(5).randint(0, 100, self.nrows)
+        table = self.h5file.create_table('/', 'table', TDescr,
+                                         chunkshape=100)
+        table.append([(b'', True, value, 0.) for value in self.data])
+        table.flush()
+
+    def _check(self, kind, optlevel):
+        table = self.h5file.root.table
+        table.cols.var3.create_index(optlevel, kind,
+                                     _blocksizes=small_blocksizes)
+        index = table.cols.var3.index
+        self.assertGreater(index.nslices, 10)
+        for lo, hi in self.limits:
+            range_ = index.get_lookup_range(('ge', 'le'), (lo, hi))
+            index.search(range_)
+            chunkmap = index.get_chunkmap()
+            selected = (self.data >= lo) & (self.data <= hi)
+            expected = numpy.zeros(len(chunkmap), bool)
+            expected[numpy.flatnonzero(selected) // 100] = True
+            # Buckets may span several chunks, so some more chunks can
+            # be selected
+            self.assertFalse((expected & ~chunkmap).any())
+            self.assertLessEqual(chunkmap.sum(), 2 * expected.sum())
+            # Repeated lookups are cached
+            index.search(range_)
+            self.assertIs(index.get_chunkmap(), chunkmap)
+
+    def test00_ultralight(self):
+        self._check('ultralight', 3)
+
+    def test01_light(self):
+        self._check('light', 6)
+
+    def test02_medium(self):
+        self._check('medium', 6)
+
+    def test03_full(self):
+        self._check('full', 9)
+
+    def test04_append(self):
+        """Cached chunkmaps are dropped when the index changes."""
+
+        self._check('full', 6)
+        table = self.h5file.root.table
+        index = table.cols.var3.index
+        range_ = index.get_lookup_range(('ge', 'le'), (200, 300))
+        index.search(range_)
+        self.assertFalse(index.get_chunkmap().any())
+        table.append([(b'', True, 250, 0.)])
+        table.flush()
+        index.search(range_)
+        chunkmap = index.get_chunkmap()
+        self.assertEqual(numpy.flatnonzero(chunkmap).tolist(),
+                         [self.nrows // 100])
+
+
+class InListTestCase(TempFileMixin, TestCase):
+    nrows = 2000
+    keys = [3, 4, 5, 17, 60, 99, 150]
+
+    def setUp(self):
+        super(InListTestCase, self).setUp()
+        self.data = numpy.random.RandomState(7).randint(0, 100, self.nrows)
+        table = self.h5file.create_table('/', 'table', TDescr,
+                                         chunkshape=100)
+        table.append([(str(value).encode(), value % 2, value, value / 2.)
+                      for value in self.data])
+        table.flush()
+
+    def _check(self, condition, selected, condvars=None):
+        table = self.h5file.root.table
+        coords = table.get_where_list(condition, condvars)
+        self.assertEqual(sorted(coords), numpy.flatnonzero(selected).tolist())
+        rows = table.read_where(condition, condvars)
+        self.assertEqual(rows['var3'].tolist(),
+                         self.data[selected].tolist())
+
+    def _check_all(self, kind=None):
+        table = self.h5file.root.table
+        if kind is not None:
+            table.cols.var3.create_index(kind=kind,
+                                         _blocksizes=small_blocksizes)
+        self.assertEqual(bool(table.will_query_use_indexing(
+            'in_(var3, [1, 2])')), kind is not None)
+        data, keys = self.data, numpy.array(self.keys)
+        self._check('in_(var3, keys)', numpy.in1d(data, keys),
+                    {'var3': table.cols.var3, 'keys': keys})
+        self._check('in_(var3, [3, 4, 5, 17, 60, 99, 150])',
+                    numpy.in1d(data, keys))
+        self._check('in_(var3, [])', numpy.zeros(self.nrows, bool))
+        self._check('in_(var3, [3, 4.5, 5.0])', numpy.in1d(data, [3, 5]))
+        self._check('~in_(var3, [3, 4, 5])', ~numpy.in1d(data, [3, 4, 5]))
+        self._check('in_(var3, [3, 4, 5]) & (var4 > 2)',
+                    numpy.in1d(data, [3, 4, 5]) & (data > 4))
+        self._check('(var3 == 3) | (var3 == 60) | (var3 == 17)',
+                    numpy.in1d(data, [3, 60, 17]))
+
+    def test00_unindexed(self):
+        self._check_all()
+
+    def test01_medium(self):
+        self._check_all('medium')
+
+    def test02_full(self):
+        self._check_all('full')
+
+    def test03_bitmap(self):
+        self._check_all('bitmap')
+
+    def test04_zonemap(self):
+        self._check_all('zonemap')
+
+    def test05_strings(self):
+        table = self.h5file.root.table
+        table.cols.var1.create_index(kind='full')
+        selected = numpy.in1d(self.data, [3, 42])
+        self._check('in_(var1, [b"3", b"42"])', selected)
+        self._check('in_(var1, ["3", "42"])', selected)
+
+    def test06_floats(self):
+        table = self.h5file.root.table
+        table.cols.var4.create_index(kind='full')
+        self._check('in_(var4, keys)', numpy.in1d(self.data, [3, 4]),
+                    {'var4': table.cols.var4,
+                     'keys': [1.5, numpy.nan, 2.]})
+
+    def test07_or_equalities(self):
+        """OR chains of equalities use a single index lookup."""
+
+        table = self.h5file.root.table
+        table.cols.var3.create_index(kind='full')
+        compiled = table._compile_condition(
+            '(var3 == 3) | (var3 == 60) | (var3 == 17)',
+            {'var3': table.cols.var3})
+        [(var, ops, limits)] = compiled.index_expressions
+        self.assertEqual((var, ops), ('var3', ('in',)))
+        self.assertEqual(limits, ((3, 17, 60),))
+
+    def test08_ranges(self):
+        """Consecutive integers are searched as a single range."""
+
+        table = self.h5file.root.table
+        table.cols.var3.create_index(kind='full')
+        index = table.cols.var3.index
+        range_ = index.get_lookup_range(('in',), ([7, 3, 4, 5, 9, 8, 20],))
+        self.assertEqual(range_, ((3, 5), (7, 9), (20, 20)))
+        ncoords = index.search(range_)
+        selected = numpy.in1d(self.data, [3, 4, 5, 7, 8, 9, 20])
+        self.assertEqual(ncoords, selected.sum())
+        chunkmap = index.get_chunkmap()
+        self.assertTrue(chunkmap[numpy.flatnonzero(selected) // 100].all())
+        # Repeated lookups are cached
+        index.search(range_)
+        self.assertIs(index.get_chunkmap(), chunkmap)
+        # But not the lookups of every range on their own
+        self.assertGreaterEqual(
+            index.chunkmapcache.getslot(('ranges', range_, 0)), 0)
+        for item in range_:
+            self.assertLess(index.chunkmapcache.getslot((item, 0)), 0)
+            self.assertLess(index.limboundscache.getslot(item), 0)
+
+    def test09_no_column(self):
+        self.assertRaises(TypeError, self.h5file.root.table.read_where,
+                          'in_(keys, [1])', {'keys': numpy.arange(3)})
+
+
+class IndexDeltaRunsTestCase(TempFileMixin, TestCase):
+    open_kwargs = {'max_index_delta_runs': 3}
+    condition = '(var3 > 10) & (var3 < 20)'
+
+    def setUp(self):
+        super(IndexDeltaRunsTestCase, self).setUp()
+        self.data = numpy.random.RandomState(3).randint(0, 100, 1000)
+        table = self.h5file.create_table('/', 'table', TDescr,
+                                         chunkshape=100)
+        self._append(0, 300)
+        table.cols.var3.create_csindex()
+
+    def _append(self, start, stop):
+        table = self.h5file.root.table
+        table.append([(b'', True, value, 0.)
+                      for value in self.data[start:stop]])
+        table.flush()
+
+    def _check_query(self, nrows):
+        table = self.h5file.root.table
+        data = self.data[:nrows]
+        expected = numpy.nonzero((data > 10) & (data < 20))[0]
+        self.assertEqual(table.will_query_use_indexing(self.condition),
+                         frozenset(['var3']))
+        self.assertEqual(table.get_where_list(self.condition).tolist(),
+                         expected.tolist())
+        expected = numpy.nonzero(data == 42)[0]
+        self.assertEqual(table.get_where_list('var3 == 42').tolist(),
+                         expected.tolist())
+
+    def test00_append(self):
+        """Small appends are kept in delta runs."""
+
+        self._append(300, 320)
+        self._append(320, 350)
+        index = self.h5file.root.table.cols.var3.index
+        self.assertEqual(index.nelements, 300)
+        self.assertEqual(index.ndelta, 50)
+        self.assertEqual(index.ndeltaruns, 2)
+        self.assertFalse(index.is_csi)
+        self._check_query(350)
+
+    def test01_max_runs(self):
+        """Delta runs are merged once there are too many of them."""
+
+        for start in range(300, 400, 20):
+            self._append(start, start + 20)
+        index = self.h5file.root.table.cols.var3.index
+        self.assertEqual(index.nelements + index.ndelta, 400)
+        self.assertLessEqual(index.ndeltaruns, 3)
+        self.assertLess(index.ndelta, 100)
+        self._check_query(400)
+
+    def test02_compact(self):
+        """Sorted reads merge the delta runs first."""
+
+        self._append(300, 320)
+        table = self.h5file.root.table
+        result = table.read_sorted('var3', field='var3', checkCSI=True)
+        self.assertEqual(result.tolist(), sorted(self.data[:320].tolist()))
+        index = table.cols.var3.index
+        self.assertEqual(index.ndelta, 0)
+        self.assertEqual(index.nelements, 320)
+        self._check_query(320)
+
+    def test03_reopen(self):
+        """Delta runs are merged when the table is closed."""
+
+        self._append(300, 320)
+        self._reopen(mode='r')
+        table = self.h5file.root.table
+        index = table.cols.var3.index
+        self.assertEqual(index.ndelta, 0)
+        self.assertEqual(index.nelements, 320)
+        self.assertTrue(index.is_csi)
+        self._check_query(320)
+        result = table.read_sorted('var3', field='var3', checkCSI=True)
+        self.assertEqual(result.tolist(), sorted(self.data[:320].tolist()))
+        self._reopen(mode='a', max_index_delta_runs=3)
+        self._append(320, 330)
+        index = self.h5file.root.table.cols.var3.index
+        self.assertEqual(index.ndelta, 10)
+        self.assertEqual(index.ndeltaruns, 1)
+        self._check_query(330)
+
+    def test04_disabled(self):
+        """The last row is sorted again when delta runs are disabled."""
+
+        self.h5file.params['MAX_INDEX_DELTA_RUNS'] = 0
+        self._append(300, 320)
+        index = self.h5file.root.table.cols.var3.index
+        self.assertEqual(index.ndelta, 0)
+        self.assertEqual(index.nelements, 320)
+        self._check_query(320)
+
+
+class BitmapIndexTestCase(TempFileMixin, TestCase):
+    nrows = 5000
+    conditions = [
+        'var3 == 7',
+        'var3 != 0',
+        '~(var3 == 0)',
+        '(var3 == 1) | (var3 == 7)',
+        '(var3 != 1) & (var3 != 2)',
+        '(var3 > 3) & (var3 <= 7)',
+        'var2',
+        '~var2',
+        'var1 == b"b"',
+        '(var3 == 7) & (var4 < 4000)',
+        'var3 == 100',
+    ]
+
+    def setUp(self):
+        super(BitmapIndexTestCase, self).setUp()
+        self.data = self._data(self.nrows)
+        table = self.h5file.create_table('/', 'table', self.data,
+                                         chunkshape=100)
+        for colname in ('var1', 'var2', 'var3'):
+            table.colinstances[colname].create_index(kind='bitmap')
+
+    def _data(self, nrows, start=0):
+        data = numpy.zeros(nrows, dtype=[('var1', 'S4'), ('var2', '?'),
+                                         ('var3', 'i4'), ('var4', 'f8')])
+        data['var3'] = numpy.random.RandomState(start).randint(0, 5, nrows)
+        data['var3'][1000:1050] = 7   # a rare value in a few chunks
+        data['var2'] = data['var3'] == 3
+        data['var1'] = numpy.array([b'a', b'b', b'c'])[data['var3'] % 3]
+        data['var4'] = numpy.arange(start, start + nrows)
+        return data
+
+    def _check(self, table):
+        for condition in self.conditions:
+            self.assertTrue(table.will_query_use_indexing(condition))
+            result = table.get_where_list(condition)
+            table._enabled_indexing_in_queries = False
+            try:
+                expected = table.get_where_list(condition)
+            finally:
+                table._enabled_indexing_in_queries = True
+            self.assertEqual(result.tolist(), expected.tolist(), condition)
+
+    def test00_queries(self):
+        """Indexed queries give the same results as in-kernel ones."""
+
+        table = self.h5file.root.table
+        index = table.cols.var3.index
+        self.assertIsInstance(index, BitmapIndex)
+        self.assertEqual(index.kind, 'bitmap')
+        self.assertEqual(index.nelements, self.nrows)
+        self.assertEqual(index.cardinality, 6)
+        self._check(table)
+
+    def test01_chunkmap(self):
+        """Only the chunks holding the searched values are selected."""
+
+        table = self.h5file.root.table
+        index = table.cols.var3.index
+        self.assertEqual(index.search(index.get_lookup_range(['eq'], [7])),
+                         1)
+        self.assertEqual(index.get_chunkmap().nonzero()[0].tolist(), [10])
+        self.assertEqual(
+            index.search(index.get_lookup_range(['eq'], [100])), 0)
+
+    def test02_append(self):
+        """Appended rows are added to the index."""
+
+        table = self.h5file.root.table
+        table.append(self._data(1234, self.nrows))
+        table.flush()
+        self.assertEqual(table.cols.var3.index.nelements, self.nrows + 1234)
+        self._check(table)
+
+    def test03_reopen(self):
+        """The index is persistent."""
+
+        self._reopen(mode='a')
+        table = self.h5file.root.table
+        self.assertIsInstance(table.cols.var3.index, BitmapIndex)
+        self._check(table)
+        table.cols.var3.reindex()
+        self.assertEqual(table.cols.var3.index.kind, 'bitmap')
+        table.remove_rows(0, 1010)
+        self.assertFalse(table.cols.var3.index.dirty)
+        self._check(table)
+
+    def test04_neq_needs_bitmap(self):
+        """``!=`` comparisons can only use bitmap indexes."""
+
+        table = self.h5file.root.table
+        table.cols.var3.remove_index()
+        table.cols.var3.create_index(kind='medium')
+        self.assertEqual(table.will_query_use_indexing('var3 != 0'),
+                         frozenset())
+        self.assertEqual(table.will_query_use_indexing('~(var3 == 0)'),
+                         frozenset())
+
+    def test05_unsupported(self):
+        """Bitmap indexes can not be created on float columns."""
+
+        table = self.h5file.root.table
+        self.assertRaises(TypeError, table.cols.var4.create_index,
+                          kind='bitmap')
+
+
+class ZoneMapTestCase(TempFileMixin, TestCase):
+    nrows = 5000
+    conditions = [
+        '(var4 >= 1000) & (var4 < 1100)',
+        'var4 == 2345',
+        'var4 > 4950',
+        'var4 < 0',
+        'var3 == 7',
+        '(var3 > 3) & (var4 < 2000)',
+        'var1 == b"b"',
+        '~var2',
+    ]
+
+    def setUp(self):
+        super(ZoneMapTestCase, self).setUp()
+        self.data = self._data(self.nrows)
+        table = self.h5file.create_table('/', 'table', self.data,
+                                         chunkshape=100)
+        for colname in ('var1', 'var2', 'var3', 'var4'):
+            table.colinstances[colname].create_index(kind='zonemap')
+
+    def _data(self, nrows, start=0):
+        data = numpy.zeros(nrows, dtype=[('var1', 'S4'), ('var2', '?'),
+                                         ('var3', 'i4'), ('var4', 'f8')])
+        data['var3'] = numpy.random.RandomState(start).randint(0, 5, nrows)
+        data['var3'][1000:1050] = 7   # a rare value in a few chunks
+        data['var2'] = data['var3'] == 3
+        data['var1'] = numpy.array([b'a', b'b', b'c'])[data['var3'] % 3]
+        # A roughly sorted column, like a timestamp
+        data['var4'] = numpy.arange(start, start + nrows) + data['var3']
+        data['var4'][start % 7::97] = numpy.nan
+        return data
+
+    def _check(self, table):
+        for condition in self.conditions:
+            self.assertTrue(table.will_query_use_indexing(condition))
+            result = table.get_where_list(condition)
+            table._enabled_indexing_in_queries = False
+            try:
+                expected = table.get_where_list(condition)
+            finally:
+                table._enabled_indexing_in_queries = True
+            self.assertEqual(result.tolist(), expected.tolist(), condition)
+
+    def _chunks(self, index, ops, limits):
+        index.search(index.get_lookup_range(ops, limits))
+        return index.get_chunkmap().nonzero()[0].tolist()
+
+    def test00_queries(self):
+        """Queries using zone maps give the same results as in-kernel ones."""
+
+        table = self.h5file.root.table
+        index = table.cols.var4.index
+        self.assertIsInstance(index, ZoneMap)
+        self.assertEqual(index.kind, 'zonemap')
+        self.assertEqual(index.nelements, self.nrows)
+        self.assertEqual(index.mins.nrows, self.nrows // 100)
+        self.assertFalse(numpy.isnan(index.mins[:]).any())
+        self._check(table)
+
+    def test01_chunkmap(self):
+        """Only the chunks whose range can match are selected."""
+
+        index = self.h5file.root.table.cols.var4.index
+        var4 = self.data['var4'].reshape(-1, 100)
+        expected = numpy.nonzero(
+            (numpy.nanmax(var4, axis=1) >= 1000) &
+            (numpy.nanmin(var4, axis=1) < 1100))[0].tolist()
+        self.assertEqual(self._chunks(index, ['ge', 'lt'], [1000, 1100]),
+                         expected)
+        self.assertTrue(set([10]) <= set(expected) <= set([9, 10, 11]))
+        self.assertEqual(self._chunks(index, ['lt'], [0]), [])
+        index = self.h5file.root.table.cols.var3.index
+        self.assertEqual(self._chunks(index, ['eq'], [7]), [10])
+
+    def test02_append(self):
+        """Appended rows are added to the zone map."""
+
+        table = self.h5file.root.table
+        table.append(self._data(1234, self.nrows))
+        table.flush()
+        table.append(self._data(10, self.nrows + 1234))
+        table.flush()
+        index = table.cols.var4.index
+        self.assertEqual(index.nelements, self.nrows + 1244)
+        self.assertEqual(index.mins.nrows, (self.nrows + 1244 + 99) // 100)
+        self.assertEqual(index.maxs[-1], numpy.nanmax(table.cols.var4[-44:]))
+        self._check(table)
+
+    def test03_modify(self):
+        """Modified rows widen the ranges without rebuilding."""
+
+        table = self.h5file.root.table
+        index = table.cols.var4.index
+        table.modify_column(10, 20, column=numpy.arange(9000, 9010.),
+                            colname='var4')
+        table[3000] = (b'z', True, 100, -1.)
+        table.modify_coordinates([4001, 4999], self._data(2, 4001))
+        self.assertIs(table.cols.var4.index, index)
+        self.assertFalse(index.dirty)
+        self.assertEqual(index.maxs[0], 9009)
+        self.assertEqual(index.mins[30], -1)
+        self.assertEqual(self._chunks(index, ['gt'], [8000]), [0])
+        self.conditions = self.conditions + ['var4 > 8000', 'var3 == 100',
+                                             'var1 == b"z"']
+        self._check(table)
+
+    def test04_reopen(self):
+        """The zone map is persistent."""
+
+        self._reopen(mode='a')
+        table = self.h5file.root.table
+        self.assertIsInstance(table.cols.var4.index, ZoneMap)
+        self._check(table)
+        table.cols.var4.reindex()
+        self.assertEqual(table.cols.var4.index.kind, 'zonemap')
+        table.remove_rows(0, 1010)
+        self.assertFalse(table.cols.var4.index.dirty)
+        self._check(table)
+
+    def test05_bad_operator(self):
+        """Operators not supported by zone maps are refused."""
+
+        index = self.h5file.root.table.cols.var3.index
+        self.assertRaises(ValueError, index._search_chunks, (('ne', 7),),
+                          self.nrows // 100)
+
+
 def suite():
     theSuite = unittest.TestSuite()
 
@@ -2693,6 +3484,14 @@ def suite():
         theSuite.addTest(unittest.makeSuite(Issue119Time32ColTestCase))
         theSuite.addTest(unittest.makeSuite(Issue119Time64ColTestCase))
         theSuite.addTest(unittest.makeSuite(TestIndexingNans))
+        theSuite.addTest(unittest.makeSuite(PersistentQueryCacheTestCase))
+        theSuite.addTest(unittest.makeSuite(DeferredAutoIndexTestCase))
+        theSuite.addTest(unittest.makeSuite(ParallelIndexBuildTestCase))
+        theSuite.addTest(unittest.makeSuite(IndexDeltaRunsTestCase))
+        theSuite.addTest(unittest.makeSuite(ChunkmapTestCase))
+        theSuite.addTest(unittest.makeSuite(InListTestCase))
+        theSuite.addTest(unittest.makeSuite(BitmapIndexTestCase))
+        theSuite.addTest(unittest.makeSuite(ZoneMapTestCase))
     if heavy:
         # These are too heavy for normal testing
         theSuite.addTest(unittest.makeSuite(AI4bTestCase))
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""Test module for joins between tables (``tables.join``)."""
+
+from __future__ import absolute_import
+
+import os
+import sys
+import tempfile
+
+import numpy
+
+import tables
+from tables.tests import common
+from tables.tests.common import unittest
+from tables.tests.common import PyTablesTestCase as TestCase
+
+
+class JoinTestCase(common.TempFileMixin, TestCase):
+    """Joins without indexes, keeping the right table in memory."""
+
+    nleft = 500
+    nright = 120
+    open_kwargs = {}
+
+    def setUp(self):
+        super(JoinTestCase, self).setUp()
+        self.left = numpy.zeros(self.nleft, dtype=[('k', 'i4'), ('x', 'f8'),
+                                                   ('s', 'S3')])
+        self.left['k'] = (numpy.arange(self.nleft) * 7) % 150
+        self.left['x'] = numpy.arange(self.nleft) / 2.
+        self.left['s'] = (numpy.arange(self.nleft) % 10).astype('S3')
+        self.right = numpy.zeros(self.nright, dtype=[('k', 'i8'),
+                                                     ('x', 'f4'),
+                                                     ('name', 'S5')])
+        # Keys 0-99 with some duplicates, and keys that never match
+        self.right['k'] = numpy.arange(self.nright) % 100
+        self.right['k'][-5:] = 1000 + numpy.arange(5)
+        self.right['x'] = numpy.arange(self.nright)
+        self.right['name'] = self.right['k'].astype('S5')
+        self.ltable = self.h5file.create_table('/', 'left', self.left)
+        self.rtable = self.h5file.create_table('/', 'right', self.right)
+        # Force many I/O buffers
+        self.ltable.nrowsinbuf = self.rtable.nrowsinbuf = 32
+        self.create_indexes()
+
+    def create_indexes(self):
+        pass
+
+    def expected(self, how):
+        rows = []
+        for lrow in self.left.tolist():
+            matches = [rrow for rrow in self.right.tolist()
+                       if rrow[0] == lrow[0]]
+            if not matches and how == 'left':
+                matches = [(0, 0.0, b'')]
+            for rrow in matches:
+                rows.append(lrow + rrow[1:])
+        return sorted(rows)
+
+    def check(self, how):
+        result = tables.join(self.ltable, self.rtable, 'k', '/', 'result',
+                             how=how)
+        self.assertIs(result, self.h5file.root.result)
+        self.assertEqual(result.colnames, ['k', 'x_left', 's', 'x_right',
+                                           'name'])
+        rows = sorted(result.read().tolist())
+        if common.verbose:
+            print("Rows in the join:", len(rows))
+        self.assertEqual(rows, self.expected(how))
+
+    def test00_inner(self):
+        self.check('inner')
+
+    def test01_left(self):
+        self.check('left')
+
+    def test02_other_keys(self):
+        result = tables.join(self.ltable, self.rtable, ('s', 'name'), '/',
+                             'result', suffixes=('', '_r'))
+        self.assertEqual(result.colnames, ['k', 'x', 's', 'k_r', 'x_r',
+                                           'name'])
+        expected = sum(numpy.count_nonzero(self.right['name'] == s)
+                       for s in self.left['s'])
+        self.assertEqual(result.nrows, expected)
+        self.assertTrue((result.col('s') == result.col('name')).all())
+
+    def test03_empty(self):
+        self.ltable.remove_rows(0, self.ltable.nrows)
+        result = tables.join(self.ltable, self.rtable, 'k', '/', 'result')
+        self.assertEqual(result.nrows, 0)
+
+    def test04_bad_args(self):
+        self.assertRaises(ValueError, tables.join, self.ltable, self.rtable,
+                          'k', '/', 'result', how='outer')
+        self.assertRaises(KeyError, tables.join, self.ltable, self.rtable,
+                          'x_left', '/', 'result')
+        self.assertRaises(TypeError, tables.join, self.ltable, self.rtable,
+                          ('s', 'k'), '/', 'result')
+
+
+class PartitionedJoinTestCase(JoinTestCase):
+    """Joins partitioned in a temporary file."""
+
+    open_kwargs = {'join_max_memory': 500}
+
+    def test05_partitions(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            tables.join(self.ltable, self.rtable, 'k', '/', 'result',
+                        tmp_dir=tmp_dir)
+            self.assertEqual(self.h5file.root.result.nrows,
+                             len(self.expected('inner')))
+            # The temporary file is removed afterwards
+            self.assertEqual(os.listdir(tmp_dir), [])
+        finally:
+            os.rmdir(tmp_dir)
+
+
+class LookupJoinTestCase(JoinTestCase):
+    """Joins looking up keys in an index of the right table."""
+
+    kind = 'medium'
+
+    def create_indexes(self):
+        self.rtable.cols.k.create_index(kind=self.kind)
+
+    def _count_reads(self, lkeys):
+        """Join `lkeys` against a right table with many chunks and get
+        the number of right rows read, checking the result."""
+
+        data = numpy.zeros(2000, dtype=[('k', 'i4')])
+        data['k'] = numpy.arange(2000)
+        right = self.h5file.create_table('/', 'big', data, chunkshape=(20,))
+        right.cols.k.create_index(kind=self.kind)
+        left = self.h5file.create_table('/', 'keys', lkeys)
+        left.nrowsinbuf = 32
+        nread = []
+        read = right._read
+
+        def counting_read(start, stop, step, *args, **kwargs):
+            nread.append(stop - start)
+            return read(start, stop, step, *args, **kwargs)
+
+        right._read = counting_read
+        result = tables.join(left, right, 'k', '/', 'result')
+        self.assertEqual(sorted(result.col('k').tolist()),
+                         sorted(lkeys['k'].tolist()))
+        return sum(nread)
+
+    def test05_selective_lookups(self):
+        """Keys found in a few chunks read just those chunks."""
+
+        lkeys = numpy.zeros(500, dtype=[('k', 'i4')])
+        lkeys['k'] = numpy.arange(500) % 40
+        self.assertLessEqual(self._count_reads(lkeys), 16 * 40)
+
+    def test06_scattered_lookups(self):
+        """Keys found in most chunks do not read them for every buffer."""
+
+        lkeys = numpy.zeros(2000, dtype=[('k', 'i4')])
+        lkeys['k'] = numpy.random.RandomState(0).permutation(2000)
+        self.assertLessEqual(self._count_reads(lkeys), 3 * 2000)
+
+
+class BitmapLookupJoinTestCase(LookupJoinTestCase):
+    kind = 'bitmap'
+
+
+class MergeJoinTestCase(JoinTestCase):
+    """Joins merging the CSI indexes of both tables."""
+
+    def create_indexes(self):
+        self.ltable.cols.k.create_csindex()
+        self.rtable.cols.k.create_csindex()
+
+    def test05_nan_keys(self):
+        data = numpy.zeros(6, dtype=[('k', 'f8')])
+        data['k'] = [1, numpy.nan, 2, numpy.nan, -0.0, 2]
+        ftable = self.h5file.create_table('/', 'floats', data)
+        ftable.cols.k.create_csindex()
+        other = self.h5file.create_table('/', 'other', data[::-1])
+        other.cols.k.create_csindex()
+        result = tables.join(ftable, other, 'k', '/', 'result', how='left')
+        keys = result.col('k')
+        self.assertEqual(numpy.isnan(keys).sum(), 2)
+        self.assertEqual(sorted(keys[~numpy.isnan(keys)].tolist()),
+                         [-0.0, 1, 2, 2, 2, 2])
+
+
+def suite():
+    theSuite = unittest.TestSuite()
+    theSuite.addTest(unittest.makeSuite(JoinTestCase))
+    theSuite.addTest(unittest.makeSuite(PartitionedJoinTestCase))
+    theSuite.addTest(unittest.makeSuite(LookupJoinTestCase))
+    theSuite.addTest(unittest.makeSuite(BitmapLookupJoinTestCase))
+    theSuite.addTest(unittest.makeSuite(MergeJoinTestCase))
+    return theSuite
+
+
+if __name__ == '__main__':
+    common.parse_argv(sys.argv)
+    common.print_versions()
+    unittest.main(defaultTest='suite')
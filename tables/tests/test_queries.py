@@ -1211,11 +1211,10 @@ class IndexedTableUsage30(IndexedTableUsage):
         ' & (c_extra > 0)',
         ]
     idx_expr = [
-        ('c_int32', ('eq',), (3,)),
-        ('c_int32', ('eq',), (4,)),
+        ('c_int32', ('in',), ((3, 4),)),
         ('c_int32', ('eq',), (5,)),
     ]
-    str_expr = '((e0 | e1) & e2)'
+    str_expr = '(e0 & e1)'
 
 
 class IndexedTableUsage31(IndexedTableUsage):
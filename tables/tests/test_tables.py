@@ -5,6 +5,7 @@ from __future__ import absolute_import
 import os
 import sys
 import tempfile
+import threading
 from itertools import groupby
 
 import numpy as np
@@ -6499,6 +6500,443 @@ class TestCreateTableArgs(common.TempFileMixin, TestCase):
                           description=RecordDescriptionDict)
 
 
+class BulkAppendTestCase(common.TempFileMixin, TestCase):
+
+    def setUp(self):
+        super(BulkAppendTestCase, self).setUp()
+        self.dtype = np.dtype([('i', 'i4'), ('f', 'f8'),
+                               ('n', [('a', 'i2'), ('b', 'S3')])])
+        self.table = self.h5file.create_table('/', 'table', self.dtype)
+
+    def _data(self, nrows):
+        data = np.zeros(nrows, dtype=self.dtype)
+        data['i'] = np.arange(nrows)
+        data['f'] = np.arange(nrows) / 2.
+        data['n']['a'] = np.arange(nrows) % 7
+        data['n']['b'] = b'abc'
+        return data
+
+    def test00_compliant(self):
+        """Appending arrays with the table dtype."""
+
+        data = self._data(100)
+        self.assertTrue(self.table._is_compliant_buffer(data))
+        self.table.append(data)
+        self.table.append(data[:10])
+        self.assertTrue(allequal(self.table.read(),
+                                 np.concatenate([data, data[:10]])))
+
+    def test01_not_compliant(self):
+        """Arrays with other layouts are still converted."""
+
+        data = self._data(100)
+        self.assertFalse(self.table._is_compliant_buffer(data[::2]))
+        self.table.append(data[::2])
+        self.table.append(data.tolist())
+        self.assertTrue(allequal(self.table.read(),
+                                 np.concatenate([data[::2], data])))
+
+    def test02_columns(self):
+        """Appending a dictionary of columns."""
+
+        data = self._data(50)
+        self.table.append({'i': data['i'], 'f': data['f'].tolist(),
+                           'n/a': data['n']['a'], 'n/b': data['n']['b']})
+        self.table.append({'i': data['i'], 'f': data['f'],
+                           'n': data['n']})
+        self.assertTrue(allequal(self.table.read(),
+                                 np.concatenate([data, data])))
+
+    def test03_columns_defaults(self):
+        """Missing columns get their defaults."""
+
+        table = self.h5file.create_table('/', 'table2', {
+            'x': tables.IntCol(dflt=3, pos=0),
+            'y': tables.FloatCol(dflt=1.5, pos=1)})
+        table.append({'x': [1, 2]})
+        self.assertEqual(table.read().tolist(), [(1, 1.5), (2, 1.5)])
+
+    def test04_columns_errors(self):
+        """Wrong dictionaries of columns."""
+
+        self.assertRaises(ValueError, self.table.append,
+                          {'i': [1, 2], 'f': [1.]})
+        self.assertRaises(ValueError, self.table.append, {'x': [1, 2]})
+        self.assertRaises(ValueError, self.table.append, {'i': ['a', 'b']})
+        self.assertEqual(self.table.nrows, 0)
+
+    def test05_time64(self):
+        """Arrays are never modified in place."""
+
+        table = self.h5file.create_table('/', 'table2', {
+            't': tables.Time64Col()})
+        data = np.array([(1.5,), (2.25,)], dtype=table.dtype)
+        self.assertFalse(table._is_compliant_buffer(data))
+        table.append(data)
+        self.assertEqual(data['t'].tolist(), [1.5, 2.25])
+        self.assertEqual(table.read()['t'].tolist(), [1.5, 2.25])
+
+
+class ReadEngineTestCase(common.TempFileMixin, TestCase):
+    nthreads = 4
+    nrows = 1000
+
+    def setUp(self):
+        self.open_kwargs = {'max_read_threads': self.nthreads}
+        super(ReadEngineTestCase, self).setUp()
+        dtype = np.dtype([('i', 'i4'), ('f', 'f8'),
+                          ('n', [('a', 'i2'), ('b', 'S3')])])
+        self.data = np.zeros(self.nrows, dtype=dtype)
+        self.data['i'] = np.arange(self.nrows)
+        self.data['f'] = np.arange(self.nrows) % 17
+        self.data['n']['a'] = np.arange(self.nrows) % 5
+        self.table = self.h5file.create_table(
+            '/', 'table', self.data, chunkshape=10,
+            filters=tables.Filters(complevel=1))
+        # Force many I/O buffers so that the engine has work to do
+        self.table.nrowsinbuf = 30
+
+    def test00_params(self):
+        self.assertEqual(self.h5file.params['MAX_READ_THREADS'],
+                         self.nthreads)
+
+    def test01_read(self):
+        self.assertTrue(allequal(self.table.read(), self.data))
+        self.assertTrue(allequal(self.table.read(3, 900), self.data[3:900]))
+
+    def test02_read_step(self):
+        for start, stop, step in [(0, None, 3), (5, 990, 7), (1, 999, 100)]:
+            result = self.table.read(start, stop, step)
+            self.assertTrue(allequal(result, self.data[start:stop:step]))
+
+    def test03_read_field(self):
+        result = self.table.read(field='f')
+        self.assertTrue(allequal(result, self.data['f']))
+        result = self.table.read(2, 800, 3, field='n/a')
+        self.assertTrue(allequal(result, self.data['n']['a'][2:800:3]))
+
+    def test04_where(self):
+        result = [row['i'] for row in self.table.where('f < 3')]
+        expected = self.data['i'][self.data['f'] < 3]
+        self.assertEqual(result, expected.tolist())
+
+    def test05_where_range(self):
+        result = [row.nrow for row in self.table.where('f > 15', start=13,
+                                                       stop=977)]
+        expected = np.nonzero(self.data['f'][13:977] > 15)[0] + 13
+        self.assertEqual(result, expected.tolist())
+
+    def test06_where_break(self):
+        # Other HDF5 calls must be allowed in the middle of a query
+        for row in self.table.where('i % 100 == 0'):
+            value = self.table[row.nrow]['i']
+            self.assertEqual(row['i'], value)
+            if row.nrow > 500:
+                break
+        self.assertTrue(allequal(self.table.read(), self.data))
+
+    def test07_read_where(self):
+        result = self.table.read_where('(f == 1) | (i > 990)')
+        mask = (self.data['f'] == 1) | (self.data['i'] > 990)
+        self.assertTrue(allequal(result, self.data[mask]))
+
+    def test08_read_where_range(self):
+        result = self.table.read_where('f < 3', start=7, stop=960, step=4)
+        data = self.data[7:960:4]
+        self.assertTrue(allequal(result, data[data['f'] < 3]))
+
+    def test09_read_where_field(self):
+        result = self.table.read_where('f < 3', field='i')
+        self.assertTrue(allequal(result, self.data['i'][self.data['f'] < 3]))
+        result = self.table.read_where('f < 3', field='n')
+        self.assertTrue(allequal(result, self.data['n'][self.data['f'] < 3]))
+        self.assertRaises(KeyError, self.table.read_where, 'f < 3',
+                          field='x')
+
+    def test10_read_where_empty(self):
+        result = self.table.read_where('f > 100')
+        self.assertEqual(len(result), 0)
+        self.assertEqual(result.dtype, self.data.dtype)
+        result = self.table.read_where('f > 100', field='n/b')
+        self.assertEqual(len(result), 0)
+        self.assertEqual(result.dtype, self.data['n']['b'].dtype)
+
+    def test11_read_where_condvars(self):
+        limit = 3
+        result = self.table.read_where('f < limit')
+        self.assertTrue(allequal(result, self.data[self.data['f'] < 3]))
+
+    def test12_reuse_threads(self):
+        def nreaders():
+            return len([thread for thread in threading.enumerate()
+                        if thread.name == 'PyTablesReader'])
+
+        self.table.read_where('f < 3')
+        self.assertEqual(len(list(self.table.where('f < 3'))), 177)
+        nthreads = nreaders()
+        self.assertGreater(nthreads, 0)
+        for i in range(5):
+            self.table.read_where('f < 3')
+            self.assertEqual(len(list(self.table.where('f < 3'))), 177)
+        self.assertEqual(nreaders(), nthreads)
+
+
+class SerialReadEngineTestCase(ReadEngineTestCase):
+    nthreads = 1
+
+
+class AggregateTestCase(common.TempFileMixin, TestCase):
+    nrows = 1000
+    csi = False
+
+    def setUp(self):
+        super(AggregateTestCase, self).setUp()
+        dtype = np.dtype([('g', 'i4'), ('f', 'f8'), ('b', '?'),
+                          ('s', 'S3'), ('v', 'i2', (2,)),
+                          ('n', [('a', 'i2')])])
+        self.data = np.zeros(self.nrows, dtype=dtype)
+        self.data['g'] = (np.arange(self.nrows) * 7) % 13
+        self.data['f'] = np.arange(self.nrows) % 17
+        self.data['b'] = np.arange(self.nrows) % 3 == 0
+        self.data['s'] = (np.arange(self.nrows) % 4).astype('S3')
+        self.data['v'][:, 0] = np.arange(self.nrows) % 11
+        self.data['v'][:, 1] = -np.arange(self.nrows)
+        self.data['n']['a'] = np.arange(self.nrows) % 5
+        self.table = self.h5file.create_table('/', 'table', self.data,
+                                              chunkshape=10)
+        # Force many I/O buffers
+        self.table.nrowsinbuf = 30
+        if self.csi:
+            self.table.cols.g.create_csindex()
+            self.table.cols.s.create_csindex()
+
+    def expected(self, data, by, colname, func):
+        keys = np.unique(data[by])
+        return keys, [func(data[colname][data[by] == key]) for key in keys]
+
+    def check(self, result, data, by, colname, func, field=None):
+        keys, values = self.expected(data, by, colname, func)
+        self.assertEqual(result[by].tolist(), keys.tolist())
+        self.assertTrue(np.allclose(result[field or colname],
+                                    np.array(values)))
+
+    def test00_aggregations(self):
+        result = self.table.aggregate(
+            'g', {'f': ['sum', 'min', 'max', 'mean', 'count'],
+                  'b': 'sum', 'v': 'max'})
+        self.assertEqual(len(result), 13)
+        for op, func in [('sum', np.sum), ('min', np.min), ('max', np.max),
+                         ('mean', np.mean), ('count', len)]:
+            self.check(result, self.data, 'g', 'f', func, 'f_' + op)
+        self.check(result, self.data, 'g', 'b', np.sum)
+        self.check(result, self.data, 'g', 'v',
+                   lambda values: values.max(axis=0))
+        self.assertEqual(result.dtype['f_count'], np.dtype('i8'))
+        self.assertEqual(result.dtype['f_mean'], np.dtype('f8'))
+        self.assertEqual(result.dtype['b'].kind, 'i')
+        self.assertEqual(result.dtype['v'].shape, (2,))
+
+    def test01_string_keys(self):
+        result = self.table.aggregate('s', {'s': 'count', 'g': 'min'})
+        self.assertEqual(result.dtype.names, ('s', 'g', 's_count'))
+        self.check(result, self.data, 's', 'g', np.min)
+        self.check(result, self.data, 's', 's', len, 's_count')
+
+    def test02_condition(self):
+        limit = 8
+        result = self.table.aggregate('g', {'f': 'sum'}, 'f < limit')
+        self.check(result, self.data[self.data['f'] < 8], 'g', 'f', np.sum)
+        result = self.table.aggregate('g', {'f': 'sum'}, 'f > 100')
+        self.assertEqual(len(result), 0)
+        self.assertEqual(result.dtype.names, ('g', 'f'))
+
+    def test03_range(self):
+        for start, stop, step in [(0, None, 3), (5, 990, 7), (10, 20, 1)]:
+            result = self.table.aggregate('g', {'f': 'max'}, 'f != 2',
+                                          start=start, stop=stop, step=step)
+            data = self.data[start:stop:step]
+            self.check(result, data[data['f'] != 2], 'g', 'f', np.max)
+        result = self.table.aggregate('g', {'g': 'count'}, start=5, stop=5)
+        self.assertEqual(len(result), 0)
+
+    def test04_nested(self):
+        result = self.table.aggregate('n/a', {'f': 'sum'})
+        keys = np.unique(self.data['n']['a'])
+        self.assertEqual(result['n/a'].tolist(), keys.tolist())
+        self.assertEqual(
+            result['f'].tolist(),
+            [self.data['f'][self.data['n']['a'] == key].sum()
+             for key in keys])
+
+    def test05_bad_args(self):
+        self.assertRaises(KeyError, self.table.aggregate, 'x', {'f': 'sum'})
+        self.assertRaises(KeyError, self.table.aggregate, 'g', {'x': 'sum'})
+        self.assertRaises(ValueError, self.table.aggregate, 'g',
+                          {'f': 'median'})
+        self.assertRaises(ValueError, self.table.aggregate, 'v',
+                          {'f': 'sum'})
+        self.assertRaises(TypeError, self.table.aggregate, 'g',
+                          {'s': 'sum'})
+
+    def test06_nan_keys(self):
+        data = np.zeros(100, dtype=[('k', 'f8'), ('x', 'i4')])
+        data['k'] = np.arange(100) % 3
+        data['k'][::7] = np.nan
+        data['x'] = np.arange(100)
+        table = self.h5file.create_table('/', 'nans', data, chunkshape=10)
+        table.nrowsinbuf = 30
+        result = table.aggregate('k', {'x': ['count', 'max']})
+        self.assertEqual(result['k'][:3].tolist(), [0., 1., 2.])
+        self.assertTrue(np.isnan(result['k'][3]))
+        nans = np.isnan(data['k'])
+        self.assertEqual(result['x_count'].tolist(),
+                         [(data['k'] == key).sum() for key in range(3)] +
+                         [nans.sum()])
+        self.assertEqual(result['x_max'][3], data['x'][nans].max())
+
+
+class CSIAggregateTestCase(AggregateTestCase):
+    csi = True
+
+    def test07_sorted_scan(self):
+        self.assertIs(self.table._get_csi_index('g'),
+                      self.table.cols.g.index)
+        self.assertIsNone(self.table._get_csi_index('f'))
+        # Appended rows are indexed when flushing
+        self.table.append(self.data[:10])
+        self.table.flush()
+        result = self.table.aggregate('g', {'f': 'count'})
+        self.assertEqual(result['f'].sum(), self.nrows + 10)
+
+
+class TopKTestCase(common.TempFileMixin, TestCase):
+    nrows = 1000
+    csi = False
+
+    def setUp(self):
+        super(TopKTestCase, self).setUp()
+        dtype = np.dtype([('i', 'i4'), ('f', 'f8'), ('g', 'i2'),
+                          ('v', 'i2', (2,))])
+        rs = np.random.RandomState(3)
+        self.data = np.zeros(self.nrows, dtype=dtype)
+        # Distinct values, so that the order of the result is unique
+        self.data['i'] = rs.permutation(self.nrows) * 3 - 100
+        self.data['f'] = rs.permutation(self.nrows) / 7.
+        self.data['f'][::97] = np.nan
+        self.data['g'] = np.arange(self.nrows) % 5
+        self.table = self.h5file.create_table('/', 'table', self.data,
+                                              chunkshape=10)
+        # Force many I/O buffers
+        self.table.nrowsinbuf = 30
+        if self.csi:
+            self.table.cols.i.create_csindex()
+            self.table.cols.f.create_csindex()
+
+    def expected(self, data, colname, k, largest):
+        order = np.argsort(data[colname], kind='mergesort')
+        if largest:
+            order = order[::-1]
+        return data[order[:k]]
+
+    def check(self, result, expected):
+        # Compare the bytes so that NaN values are equal too
+        self.assertEqual(result.dtype, expected.dtype)
+        self.assertEqual(result.tobytes(), expected.tobytes())
+
+    def test00_topk(self):
+        for colname in ['i', 'f']:
+            for k in [0, 1, 10, 100, self.nrows + 1]:
+                for largest in [True, False]:
+                    result = self.table.topk(colname, k, largest)
+                    expected = self.expected(self.data, colname, k, largest)
+                    self.assertEqual(len(result), min(k, self.nrows))
+                    self.assertTrue(np.array_equal(
+                        result[colname], expected[colname], equal_nan=True))
+                    if colname == 'i':
+                        self.check(result, expected)
+
+    def test01_nans(self):
+        result = self.table.topk('f', 3, field='f')
+        self.assertTrue(np.isnan(result).all())
+        result = self.table.topk('f', 3, largest=False, field='f')
+        self.assertFalse(np.isnan(result).any())
+
+    def test02_condition(self):
+        group = 3
+        result = self.table.topk('i', 7, condition='g == group')
+        data = self.data[self.data['g'] == 3]
+        self.check(result, self.expected(data, 'i', 7, True))
+        result = self.table.topk(self.table.cols.i, 7, False,
+                                 condition='(g == group) & (i > 1000)')
+        data = data[data['i'] > 1000]
+        self.check(result, self.expected(data, 'i', 7, False))
+        result = self.table.topk('i', 7, condition='i > 10000')
+        self.assertEqual(len(result), 0)
+
+    def test03_range(self):
+        for start, stop, step in [(0, None, 3), (5, 990, 7), (10, 20, 1)]:
+            result = self.table.topk('i', 10, condition='g != 2',
+                                     start=start, stop=stop, step=step)
+            data = self.data[start:stop:step]
+            data = data[data['g'] != 2]
+            self.check(result, self.expected(data, 'i', 10, True))
+        result = self.table.topk('i', 10, start=5, stop=5)
+        self.assertEqual(len(result), 0)
+
+    def test04_field(self):
+        result = self.table.topk('i', 5, field='g')
+        self.check(result, self.expected(self.data, 'i', 5, True)['g'])
+
+    def test05_bad_args(self):
+        self.assertRaises(KeyError, self.table.topk, 'x', 5)
+        self.assertRaises(ValueError, self.table.topk, 'v', 5)
+        self.assertRaises(ValueError, self.table.topk, 'i', -1)
+
+
+class CSITopKTestCase(TopKTestCase):
+    csi = True
+
+    def test06_sorted_scan(self):
+        self.assertIs(self.table._get_csi_index('i'),
+                      self.table.cols.i.index)
+        # Rows in delta runs make queries scan rows, not modify the index
+        self._reopen(mode='a', max_index_delta_runs=3)
+        table = self.h5file.root.table
+        data = self.data[:10].copy()
+        data['i'] += 10000
+        for rows in [data[:5], data[5:]]:
+            table.append(rows)
+            table.flush()
+        index = table.cols.i.index
+        ndelta = index.ndelta
+        self.assertGreater(ndelta, 0)
+        with self.assertWarns(tables.PerformanceWarning):
+            self.assertIsNone(table._get_csi_index('i'))
+        with self.assertWarns(tables.PerformanceWarning):
+            result = table.topk('i', 10, field='i')
+        self.assertEqual(result.tolist(), sorted(data['i'])[::-1])
+        self.assertEqual(index.ndelta, ndelta)
+        # Once compacted by reindexing, the index is used again
+        table.reindex()
+        self.assertIs(table._get_csi_index('i'), table.cols.i.index)
+
+    def test07_unindexed_rows(self):
+        self._reopen(mode='a', deferred_auto_index=True)
+        table = self.h5file.root.table
+        data = self.data[:10].copy()
+        data['i'] += 10000
+        table.append(data)
+        table.flush()
+        unsaved = table._unsaved_indexedrows
+        self.assertGreater(unsaved, 0)
+        with self.assertWarns(tables.PerformanceWarning):
+            self.assertIsNone(table._get_csi_index('i'))
+        with self.assertWarns(tables.PerformanceWarning):
+            result = table.topk('i', 10, field='i')
+        self.assertEqual(result.tolist(), sorted(data['i'])[::-1])
+        self.assertEqual(table._unsaved_indexedrows, unsaved)
+
+
 def suite():
     theSuite = unittest.TestSuite()
     niter = 1
@@ -6588,6 +7026,13 @@ def suite():
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
         theSuite.addTest(unittest.makeSuite(ColumnIterationTestCase))
         theSuite.addTest(unittest.makeSuite(TestCreateTableArgs))
+        theSuite.addTest(unittest.makeSuite(BulkAppendTestCase))
+        theSuite.addTest(unittest.makeSuite(ReadEngineTestCase))
+        theSuite.addTest(unittest.makeSuite(SerialReadEngineTestCase))
+        theSuite.addTest(unittest.makeSuite(AggregateTestCase))
+        theSuite.addTest(unittest.makeSuite(CSIAggregateTestCase))
+        theSuite.addTest(unittest.makeSuite(TopKTestCase))
+        theSuite.addTest(unittest.makeSuite(CSITopKTestCase))
 
     if common.heavy:
         theSuite.addTest(unittest.makeSuite(CompressBzip2TablesTestCase))
@@ -827,6 +827,201 @@ class WideTreeTestCase(common.TempFileMixin, TestCase):
             print()  # This flush the stdout buffer
 
 
+class LazyChildrenTestCase(common.TempFileMixin, TestCase):
+    """Checks for iterating over children of groups not loaded yet."""
+
+    def setUp(self):
+        super(LazyChildrenTestCase, self).setUp()
+
+        root = self.h5file.root
+        group = self.h5file.create_group(root, 'group')
+        for i in range(10):
+            self.h5file.create_group(group, 'g%d' % i)
+            self.h5file.create_array(group, 'a%d' % i, [i])
+        self.h5file.create_table(group, 'table', Record)
+        self.h5file.create_soft_link(group, 'link', '/group/g0')
+        self.h5file.create_group(group, '_p_hidden')
+        self._reopen()
+
+    def names(self, classname=None):
+        group = self.h5file.root.group
+        return [node._v_name for node in group._f_iter_nodes(classname)]
+
+    def test00_classnames(self):
+        """Lazy iteration yields the same nodes as the loaded group."""
+
+        classnames = [None, 'Group', 'Leaf', 'Link', 'Array', 'Table',
+                      'SoftLink']
+        lazy = {}
+        for classname in classnames:
+            lazy[classname] = self.names(classname)
+            self.assertNotIn('_v_children', self.h5file.root.group.__dict__)
+        self.h5file.root.group._v_children
+        for classname in classnames:
+            self.assertEqual(lazy[classname], self.names(classname))
+        self.assertEqual(len(lazy[None]), 22)
+        self.assertNotIn('_p_hidden', lazy[None])
+        self.assertEqual(lazy[None], sorted(lazy[None]))
+
+    def test01_pages(self):
+        """Children are all got when read in small pages."""
+
+        group = self.h5file.root.group
+        group._c_names_page = 2
+        names = list(group._g_iter_names())
+        self.assertEqual(names, sorted(list(group._v_children) +
+                                       list(group._v_hidden)))
+
+    def test02_changes(self):
+        """Children added or removed while iterating are taken into
+        account."""
+
+        self._reopen(mode='a')
+        group = self.h5file.root.group
+        group._c_names_page = 2
+        names = []
+        for name in group._g_iter_names():
+            names.append(name)
+            if name == 'a1':
+                self.h5file.remove_node(group, 'a2')
+                self.h5file.remove_node(group, 'a0')
+                self.h5file.create_array(group, 'a5b', [0])
+        self.assertNotIn('_v_children', group.__dict__)
+        self.assertEqual(names, sorted(list(group._v_children) +
+                                       list(group._v_hidden) + ['a0']))
+
+    def test03_add_child(self):
+        """Adding children does not load the group."""
+
+        self._reopen(mode='a')
+        group = self.h5file.root.group
+        self.h5file.create_array(group, 'new', [0])
+        self.assertNotIn('_v_children', group.__dict__)
+        self.assertIn('new', group)
+        self.assertIn('new', self.names())
+        self.assertIn('new', group._v_children)
+
+    def test03b_attribute_clash(self):
+        """Attributes named after added children warn without loading."""
+
+        self._reopen(mode='a')
+        group = self.h5file.root.group
+        self.h5file.create_array(group, 'new', [0])
+        self.h5file.create_array(group, 'old', [0])
+        self.h5file.remove_node(group, 'old')
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            group.new = 1
+            group.old = 1
+            group.other = 1
+        self.assertEqual(len(w), 1)
+        self.assertTrue(issubclass(w[0].category,
+                                   tables.NaturalNameWarning))
+        self.assertIn('new', str(w[0].message))
+        self.assertNotIn('_v_children', group.__dict__)
+
+    def test04_width_warning(self):
+        """Adding children to wide groups warns even if not loaded."""
+
+        self._reopen(mode='a', MAX_GROUP_WIDTH=20)
+        group = self.h5file.root.group
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            self.h5file.create_array(group, 'new', [0])
+        self.assertEqual(len(w), 1)
+        self.assertTrue(issubclass(w[0].category,
+                                   tables.PerformanceWarning))
+        self.assertNotIn('_v_children', group.__dict__)
+
+
+class ScanTreeTestCase(common.TempFileMixin, TestCase):
+    """Checks for scanning the metadata of nodes without loading them."""
+
+    def setUp(self):
+        super(ScanTreeTestCase, self).setUp()
+
+        h5file = self.h5file
+        group = h5file.create_group('/', 'group')
+        subgroup = h5file.create_group(group, 'subgroup')
+        table = h5file.create_table(group, 'table', Record)
+        table.append([('abc', 1, 2, 3., 4.)] * 10)
+        table.cols.var2.create_index()
+        h5file.create_earray(group, 'earray', tables.Float32Atom(), (0, 3),
+                             filters=tables.Filters(complevel=1))
+        h5file.create_carray(subgroup, 'carray',
+                             tables.EnumAtom(['a', 'b'], 'a', 'uint8'), (4,))
+        h5file.create_array('/', 'array', [[1, 2], [3, 4]])
+        h5file.create_array('/', 'scalar', 1.5)
+        vlarray = h5file.create_vlarray('/', 'vlarray', tables.Int16Atom())
+        vlarray.append([1, 2, 3])
+        h5file.create_vlarray('/', 'vlstring', tables.VLStringAtom())
+        h5file.create_soft_link('/', 'softlink', '/array')
+        h5file.create_external_link('/', 'extlink', 'other.h5:/array')
+        h5file.create_group(group, '_p_hidden')
+        self._reopen()
+
+    def test00_order(self):
+        """Nodes are scanned in the same order as they are walked."""
+
+        for classname in [None, 'Group', 'Leaf', 'Array', 'Table', 'Link',
+                          'ExternalLink']:
+            for where in ['/', '/group']:
+                paths = [info.path for info in
+                         self.h5file.scan_tree(where, classname)]
+                expected = [node._v_pathname for node in
+                            self.h5file.walk_nodes(where, classname)]
+                self.assertEqual(paths, expected)
+
+    def test00b_group_order(self):
+        """Groups scan nodes in the same order as they walk them."""
+
+        for classname in [None, 'Group', 'Leaf', 'Array', 'Table', 'Link',
+                          'ExternalLink']:
+            for where in ['/', '/group']:
+                group = self.h5file.get_node(where)
+                paths = [info.path for info in
+                         group._f_scan_tree(classname)]
+                expected = [node._v_pathname for node in
+                            group._f_walknodes(classname)]
+                self.assertEqual(paths, expected)
+
+    def test01_records(self):
+        """Records describe nodes like loaded nodes do."""
+
+        for info in self.h5file.scan_tree():
+            node = self.h5file.get_node(info.path)
+            self.assertEqual(info.classname, node.__class__.__name__)
+            if isinstance(node, tables.Leaf):
+                self.assertEqual(info.shape, node.shape)
+                if isinstance(node, tables.VLArray):
+                    # Pseudo-atoms are stored with their base atom
+                    atom = getattr(node.atom, 'base', node.atom)
+                    self.assertEqual(info.dtype, atom.dtype)
+                else:
+                    self.assertEqual(info.dtype, node.dtype)
+                self.assertEqual(info.filters, node.filters)
+                self.assertEqual(info.size, node._get_storage_size())
+            else:
+                self.assertIsNone(info.shape)
+                self.assertIsNone(info.dtype)
+                self.assertIsNone(info.filters)
+                self.assertIsNone(info.size)
+
+    def test02_not_loaded(self):
+        """Scanning does not load any node."""
+
+        self.h5file.close()
+        self.h5file = tables.open_file(self.h5fname, 'r', NODE_CACHE_SLOTS=0)
+        self.assertEqual(len(list(self.h5file.scan_tree())), 12)
+        self.assertEqual(list(self.h5file._node_manager.registry),
+                         ['/'])
+
+    def test03_not_group(self):
+        """Scanning from a leaf raises a TypeError."""
+
+        self.assertRaises(TypeError, self.h5file.scan_tree, '/array')
+
+
 class HiddenTreeTestCase(common.TempFileMixin, TestCase):
     """Check for hidden groups, leaves and hierarchies."""
 
@@ -1078,6 +1273,8 @@ def suite():
         theSuite.addTest(unittest.makeSuite(TreeTestCase))
         theSuite.addTest(unittest.makeSuite(DeepTreeTestCase))
         theSuite.addTest(unittest.makeSuite(WideTreeTestCase))
+        theSuite.addTest(unittest.makeSuite(LazyChildrenTestCase))
+        theSuite.addTest(unittest.makeSuite(ScanTreeTestCase))
         theSuite.addTest(unittest.makeSuite(HiddenTreeTestCase))
         theSuite.addTest(unittest.makeSuite(CreateParentsTestCase))
 
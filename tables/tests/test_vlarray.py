@@ -4099,6 +4099,165 @@ class PointSelectionTestCase(common.TempFileMixin, TestCase):
             self.assertRaises(IndexError, vlarr.__getitem__, key)
 
 
+class FlatTestCase(common.TempFileMixin, TestCase):
+    """Tests for reading and appending rows as flat values and offsets."""
+
+    def setUp(self):
+        super(FlatTestCase, self).setUp()
+        self.rows = [numpy.arange(i % 7, dtype='i4') + i for i in range(50)]
+        self.vlarray = self.h5file.create_vlarray('/', 'vlarray',
+                                                  Int32Atom())
+        for row in self.rows:
+            self.vlarray.append(row)
+
+    def _rows(self, values, offsets):
+        return [values[offsets[i]:offsets[i+1]].tolist()
+                for i in range(len(offsets) - 1)]
+
+    def test00_read(self):
+        """Reading ranges of rows as flat values and offsets."""
+
+        for start, stop, step in [(None, None, 1), (3, 40, 1), (2, 49, 5),
+                                  (10, 11, 1), (5, 5, 1)]:
+            values, offsets = self.vlarray.read(start, stop, step,
+                                                as_flat=True)
+            self.assertEqual(values.dtype, numpy.dtype('i4'))
+            self.assertEqual(offsets.dtype, numpy.dtype('int64'))
+            expected = [row.tolist() for row in self.rows[start:stop:step]]
+            self.assertEqual(self._rows(values, offsets), expected)
+
+    def test01_append(self):
+        """Appending several rows at once."""
+
+        rows = [[1, 2], [], [3], [4, 5, 6]]
+        values = numpy.concatenate(rows[:1] + rows[2:])
+        self.vlarray.append_flat(values, [0, 2, 2, 3, 6])
+        self.vlarray.append_flat([], [0])
+        self._reopen()
+        vlarray = self.h5file.root.vlarray
+        self.assertEqual(vlarray.nrows, len(self.rows) + len(rows))
+        self.assertEqual([row.tolist() for row in vlarray[-4:]], rows)
+
+    def test02_append_offsets(self):
+        """Offsets need not start at zero."""
+
+        self.vlarray.append_flat(numpy.arange(10), [3, 5, 9])
+        self.assertEqual([row.tolist() for row in self.vlarray[-2:]],
+                         [[3, 4], [5, 6, 7, 8]])
+
+    def test03_multidim(self):
+        """Flat rows of multidimensional atoms."""
+
+        vlarray = self.h5file.create_vlarray('/', 'md',
+                                             tables.Float64Atom(shape=(2,)))
+        values = numpy.arange(10.).reshape(5, 2)
+        vlarray.append_flat(values, [0, 1, 5])
+        self.assertTrue(allequal(vlarray[1], values[1:]))
+        fvalues, offsets = vlarray.read(as_flat=True)
+        self.assertTrue(allequal(fvalues, values))
+        self.assertEqual(offsets.tolist(), [0, 1, 5])
+
+    def test04_pseudo_atom(self):
+        """Pseudo-atoms are read and appended in their encoded form."""
+
+        vlarray = self.h5file.create_vlarray('/', 'str', VLStringAtom())
+        vlarray.append(b'hello')
+        vlarray.append_flat(numpy.frombuffer(b'bigworld', 'u1'), [0, 3, 8])
+        self.assertEqual(vlarray.read(), [b'hello', b'big', b'world'])
+        values, offsets = vlarray.read(as_flat=True)
+        self.assertEqual(values.tolist(), list(bytearray(b"hellobigworld")))
+        self.assertEqual(offsets.tolist(), [0, 5, 8, 13])
+
+    def test05_python_flavor(self):
+        """The values are returned in the flavor of the array."""
+
+        self.vlarray.flavor = 'python'
+        values, offsets = self.vlarray.read(0, 3, as_flat=True)
+        self.assertEqual(values, [1, 2, 3])
+        self.assertEqual(offsets.tolist(), [0, 0, 1, 3])
+
+    def test06_bad_offsets(self):
+        """Wrong offsets are refused."""
+
+        append_flat = self.vlarray.append_flat
+        self.assertRaises(ValueError, append_flat, [1, 2], [])
+        self.assertRaises(ValueError, append_flat, [1, 2], [0, 3])
+        self.assertRaises(ValueError, append_flat, [1, 2], [0, 2, 1])
+        self.assertRaises(ValueError, append_flat, [[1, 2]], [0, 1])
+        self.assertEqual(self.vlarray.nrows, len(self.rows))
+
+
+class ExtendTestCase(common.TempFileMixin, TestCase):
+    """Tests for adding several rows at once with `VLArray.extend()`."""
+
+    # Use a small buffer so that rows are written in several batches
+    open_kwargs = {'io_buffer_size': 64}
+
+    def _check(self, atom, rows):
+        vlarray = self.h5file.create_vlarray('/', 'extended', atom)
+        vlarray.extend(iter(rows))
+        expected = self.h5file.create_vlarray('/', 'appended', atom)
+        for row in rows:
+            expected.append(row)
+        self.assertEqual(vlarray.nrows, len(rows))
+        self._reopen()
+        self.assertEqual(repr(self.h5file.root.extended.read()),
+                         repr(self.h5file.root.appended.read()))
+
+    def test00_numeric(self):
+        """Extending with rows of numbers."""
+
+        rows = [numpy.arange(i % 13) for i in range(100)]
+        rows += [[], [1, 2], (3,), numpy.arange(3, dtype='>i8')]
+        self._check(Int32Atom(), rows)
+
+    def test01_multidim(self):
+        """Extending with rows of multidimensional atoms."""
+
+        rows = [[1., 2.], [[3, 4], [5, 6]], [], numpy.ones((20, 2))]
+        self._check(tables.Float64Atom(shape=(2,)), rows)
+
+    def test02_time(self):
+        """Extending with rows of time atoms."""
+
+        rows = [[1.5, 2.25], [], numpy.arange(10) / 3.]
+        self._check(tables.Time64Atom(), rows)
+
+    def test03_vlstring(self):
+        """Extending with variable length strings."""
+
+        rows = [b'abc', b'', b'x' * 100, b'de']
+        self._check(VLStringAtom(), rows)
+
+    def test04_vlunicode(self):
+        """Extending with variable length unicode strings."""
+
+        rows = [u'abc', u'', u'\xe1\u20ac' * 50, u'de']
+        self._check(VLUnicodeAtom(), rows)
+
+    def test05_object(self):
+        """Extending with serialized objects."""
+
+        rows = [{'a': 1}, [1, 2], None, u'xyz', list(range(100))]
+        self._check(ObjectAtom(), rows)
+
+    def test06_empty(self):
+        """Extending with no rows at all."""
+
+        vlarray = self.h5file.create_vlarray('/', 'vlarray', Int32Atom())
+        vlarray.extend([])
+        self.assertEqual(vlarray.nrows, 0)
+        vlarray.extend([[]])
+        self.assertEqual(vlarray.read()[0].tolist(), [])
+
+    def test07_not_a_sequence(self):
+        """Rows must be sequences."""
+
+        vlarray = self.h5file.create_vlarray('/', 'vlarray', Int32Atom())
+        self.assertRaises(TypeError, vlarray.extend, [[1], 2])
+        self.assertEqual(vlarray.nrows, 0)
+
+
 class SizeInMemoryPropertyTestCase(common.TempFileMixin, TestCase):
     def create_array(self, atom, complevel):
         filters = tables.Filters(complevel=complevel, complib='blosc')
@@ -4405,6 +4564,8 @@ def suite():
         theSuite.addTest(unittest.makeSuite(TruncateOpenTestCase))
         theSuite.addTest(unittest.makeSuite(TruncateCloseTestCase))
         theSuite.addTest(unittest.makeSuite(PointSelectionTestCase))
+        theSuite.addTest(unittest.makeSuite(FlatTestCase))
+        theSuite.addTest(unittest.makeSuite(ExtendTestCase))
         theSuite.addTest(unittest.makeSuite(SizeInMemoryPropertyTestCase))
         theSuite.addTest(unittest.makeSuite(SizeOnDiskPropertyTestCase))
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
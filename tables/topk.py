@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  PyTables Developers
+#
+# $Id$
+#
+########################################################################
+
+"""Here is defined the TopK class.
+
+Classes:
+
+`TopK`
+    Selection of the rows with the largest or smallest values of a column.
+
+"""
+from __future__ import absolute_import
+
+import numpy
+
+from .conditions import call_on_recarr
+from .utilsextension import get_nested_field
+
+
+class TopK(object):
+    """Selection of the rows with the `k` largest or smallest values of a
+    column.
+
+    Only the values of the column and the coordinates of the selected
+    rows are kept, so memory usage depends on `k` and not on the number
+    of rows.  NaN values are greater than any other value, as in NumPy
+    sorts and indexes, and rows with equal values are selected in no
+    particular order.
+
+    Parameters
+    ----------
+    table : Table
+        The table whose rows are selected.
+    sortby : str
+        The name of the column whose values are compared.
+    k : int
+        The maximum number of rows to select.
+    largest : bool
+        Whether the largest values are selected instead of the smallest
+        ones.
+
+    """
+
+    def __init__(self, table, sortby, k, largest=True):
+        coldtypes = table.coldtypes
+        if sortby not in coldtypes:
+            raise KeyError("table ``%s`` has no column named ``%s``"
+                           % (table._v_pathname, sortby))
+        dtype = coldtypes[sortby]
+        if dtype.shape != ():
+            raise ValueError("sorting column ``%s`` must have scalar "
+                             "values" % sortby)
+        if k < 0:
+            raise ValueError("the number of rows can not be negative: %d"
+                             % k)
+        self.table = table
+        """The table whose rows are selected."""
+        self.sortby = sortby
+        """The name of the column whose values are compared."""
+        self.k = k
+        """The maximum number of rows to select."""
+        self.largest = largest
+        """Whether the largest values are selected."""
+        self._keys = numpy.empty(0, dtype=dtype)
+        """The values of the selected rows (in no particular order)."""
+        self._coords = numpy.empty(0, dtype=numpy.int64)
+        """The coordinates of the selected rows."""
+
+    def add(self, keys, coords):
+        """Take the rows with `keys` values at `coords` into account."""
+
+        k = self.k
+        if len(keys) == 0 or k == 0:
+            return
+        keys = numpy.concatenate((self._keys, keys))
+        coords = numpy.concatenate((self._coords, coords))
+        if len(keys) > k:
+            if self.largest:
+                best = numpy.argpartition(keys, len(keys) - k)[-k:]
+            else:
+                best = numpy.argpartition(keys, k - 1)[:k]
+            keys, coords = keys[best], coords[best]
+        self._keys, self._coords = keys, coords
+
+    def coordinates(self):
+        """Get the coordinates of the selected rows, in order."""
+
+        if self._keys is None:
+            # Already sorted by the index
+            return self._coords
+        order = numpy.argsort(self._keys, kind='mergesort')
+        if self.largest:
+            order = order[::-1]
+        return self._coords[order]
+
+    def scan(self, engine, condition=None):
+        """Select among the rows read by a :class:`ReadEngine`.
+
+        If given, `condition` is a ``(function, args, kwargs)`` tuple like
+        ``Table._where_condition`` and only rows fulfilling it are taken.
+
+        """
+
+        start, step = engine.start, engine.step
+        for bstart, nrecords, buf, valid in engine.iterbuffers(condition):
+            first = (start - bstart) % step
+            keys = get_nested_field(buf, self.sortby)[first:nrecords:step]
+            coords = numpy.arange(bstart + first, bstart + nrecords, step,
+                                  dtype=numpy.int64)
+            if valid is not None:
+                selected = valid[first::step]
+                keys, coords = keys[selected], coords[selected]
+            # Keys are copied, since the buffer is reused
+            self.add(keys.copy(), coords)
+
+    def scan_sorted(self, index, start, stop, step, condition=None):
+        """Select among the rows in the given range following the order of
+        `index`, which must be a complete sorted index of the `sortby`
+        column.
+
+        The index is read from its end (or from its beginning, for the
+        smallest values) in growing slices, until `k` rows in the range
+        and fulfilling the `condition` are found.  The `condition`
+        argument has the same meaning as in :meth:`TopK.scan`.
+
+        """
+
+        table, k = self.table, self.k
+        nelements = index.nelements
+        whole = (start == 0 and stop >= table.nrows and step == 1)
+        found = []
+        nfound, pos, size = 0, 0, max(k, 1)
+        while nfound < k and pos < nelements:
+            npos = min(pos + size, nelements)
+            if self.largest:
+                coords = index.read_indices(nelements - npos,
+                                            nelements - pos)[::-1]
+            else:
+                coords = index.read_indices(pos, npos)
+            coords = coords.astype(numpy.int64)
+            if not whole:
+                inrange = (coords >= start) & (coords < stop)
+                if step > 1:
+                    inrange &= (coords - start) % step == 0
+                coords = coords[inrange]
+            if condition is not None and len(coords) > 0:
+                # Rows are read faster in storage order
+                order = numpy.argsort(coords)
+                rows = table._read_coordinates(coords[order])
+                condfunc, condargs, condkwargs = condition
+                valid = numpy.empty(len(coords), dtype=bool)
+                valid[order] = call_on_recarr(condfunc, condargs, rows,
+                                              **condkwargs)
+                coords = coords[valid]
+            coords = coords[:k - nfound]
+            found.append(coords)
+            nfound += len(coords)
+            # Selective conditions or ranges need more of the index
+            pos, size = npos, min(2 * size, max(table.nrowsinbuf, k))
+        if found:
+            self._coords = numpy.concatenate(found)
+            self._keys = None
+
+    def result(self, field=None):
+        """Read the selected rows, in order.
+
+        If `field` is given, only the named column is read.
+
+        """
+
+        return self.table._read_coordinates(self.coordinates(), field)
@@ -19,6 +19,7 @@ import sys
 import warnings
 import subprocess
 import re
+import threading
 from time import time
 
 import numpy
@@ -435,6 +436,37 @@ class NailedDict(object):
         cache[key] = value
 
 
+class Task(threading.Thread):
+    """A thread computing the result of a single function call."""
+
+    def __init__(self, func, *args):
+        super(Task, self).__init__()
+        self.daemon = True
+        self.func = func
+        self.args = args
+        self.value = None
+        self.exc_info = None
+
+    def run(self):
+        try:
+            self.value = self.func(*self.args)
+        except BaseException:
+            self.exc_info = sys.exc_info()
+
+    def result(self):
+        """Wait for the call to finish and return its value.
+
+        Exceptions raised in the thread are raised again here.
+
+        """
+
+        self.join()
+        if self.exc_info is not None:
+            exc_info, self.exc_info = self.exc_info, None
+            six.reraise(*exc_info)
+        return self.value
+
+
 def detect_number_of_cores():
     """Detects the number of cores on a system.
 
@@ -461,8 +461,7 @@ class VLArray(hdf5extension.VLArray, Leaf, six.Iterator):
         """Return the number of objects in a NumPy array."""
 
         # Check for zero dimensionality array
-        zerodims = numpy.sum(numpy.array(nparr.shape) == 0)
-        if zerodims > 0:
+        if 0 in nparr.shape:
             # No objects to be added
             return 0
         shape = nparr.shape
@@ -547,6 +546,114 @@ class VLArray(hdf5extension.VLArray, Leaf, six.Iterator):
         self._append(nparr, nobjects)
         self.nrows += 1
 
+    def extend(self, rows):
+        """Add several rows to the end of the dataset.
+
+        Every object in the `rows` iterable is added as a new row, just as
+        if it was passed to :meth:`VLArray.append`.  However, rows are
+        buffered and written in batches (of about `IO_BUFFER_SIZE` bytes)
+        with a single HDF5 write each, which is much faster when adding
+        many rows.  This works for pseudo-atoms too.
+
+        Rows are saved batch after batch, so, should some row be invalid,
+        the rows in previous batches would have already been added.
+
+        .. versionadded:: 3.5
+
+        """
+
+        self._g_check_open()
+        self._v_file._check_writable()
+
+        atom = self.atom
+        pseudo = not hasattr(atom, 'size')  # it is a pseudo-atom
+        statom = atom.base if pseudo else atom
+        buffersize = self._v_file.params['IO_BUFFER_SIZE']
+        arrays, nobjects, nbytes = [], [], 0
+        for sequence in rows:
+            if pseudo:
+                sequence = atom.toarray(sequence)
+            else:
+                try:  # fastest check in most cases
+                    len(sequence)
+                except TypeError:
+                    raise TypeError("row is not a sequence")
+            if len(sequence) > 0:
+                nparr = convert_to_np_atom(sequence, statom)
+                nobjs = self._getnobjects(nparr)
+            else:
+                nparr, nobjs = None, 0
+            arrays.append(nparr)
+            nobjects.append(nobjs)
+            nbytes += nobjs * statom.size
+            if nbytes >= buffersize:
+                self._extend_batch(arrays, nobjects)
+                arrays, nobjects, nbytes = [], [], 0
+        if arrays:
+            self._extend_batch(arrays, nobjects)
+
+    def _extend_batch(self, arrays, nobjects):
+        """Write a batch of converted rows with a single append."""
+
+        atom = self.atom
+        if not hasattr(atom, 'size'):  # it is a pseudo-atom
+            atom = atom.base
+        offsets = numpy.zeros(len(nobjects) + 1, dtype='int64')
+        numpy.cumsum(nobjects, out=offsets[1:])
+        # The values are copied into a new native buffer, which is
+        # safe to in-place conversion.
+        values = numpy.empty((offsets[-1],) + atom.shape,
+                             dtype=atom.dtype.base)
+        for nparr, start, stop in zip(arrays, offsets[:-1], offsets[1:]):
+            if stop > start:
+                values[start:stop] = nparr.reshape(values[start:stop].shape)
+        self._append_flat(values, offsets)
+        self.nrows += len(nobjects)
+
+    def append_flat(self, values, offsets):
+        """Add several rows given as flat values and offsets to the dataset.
+
+        This is the counterpart of ``read(as_flat=True)``: the objects in
+        row ``i`` are ``values[offsets[i]:offsets[i+1]]``, so `offsets`
+        is a non-decreasing sequence of integers with one more element
+        than the number of rows to be added.  All the rows are written
+        at once, which is much faster than calling
+        :meth:`VLArray.append` for every row.
+
+        In the case of pseudo-atoms (serialized objects and variable
+        length strings), `values` must hold the already encoded
+        contents in the base atom of the pseudo-atom (e.g. the UTF-8
+        bytes of the strings).
+
+        .. versionadded:: 3.5
+
+        """
+
+        self._g_check_open()
+        self._v_file._check_writable()
+
+        atom = self.atom
+        if not hasattr(atom, 'size'):  # it is a pseudo-atom
+            atom = atom.base
+        offsets = numpy.array(offsets, dtype='int64', ndmin=1)
+        if offsets.ndim != 1 or len(offsets) == 0:
+            raise ValueError("offsets must be a non-empty sequence")
+        # The values need to be copied to make the operation safe
+        # to in-place conversion.
+        values = convert_to_np_atom2(values, atom)
+        if values.shape[1:] != atom.shape:
+            raise ValueError("The values are composed of elements with "
+                             "shape '%s', which is not compatible with the "
+                             "atom shape ('%s')." % (values.shape[1:],
+                                                     atom.shape))
+        if (offsets[0] < 0 or offsets[-1] > len(values) or
+                (numpy.diff(offsets) < 0).any()):
+            raise ValueError("offsets must be non-decreasing and within "
+                             "the bounds of values")
+
+        self._append_flat(values, offsets)
+        self.nrows += len(offsets) - 1
+
     def iterrows(self, start=None, stop=None, step=None):
         """Iterate over the rows of the array.
 
@@ -796,7 +903,7 @@ class VLArray(hdf5extension.VLArray, Leaf, six.Iterator):
         self._assign_values(coords, value)
 
     # Accessor for the _read_array method in superclass
-    def read(self, start=None, stop=None, step=1):
+    def read(self, start=None, stop=None, step=1, as_flat=False):
         """Get data in the array as a list of objects of the current flavor.
 
         Please note that, as the lengths of the different rows are variable,
@@ -811,10 +918,25 @@ class VLArray(hdf5extension.VLArray, Leaf, six.Iterator):
         then stop will be set to start + 1. If you do not specify neither
         start nor stop, then *all the rows* in the array are selected.
 
+        If as_flat is true, a ``(values, offsets)`` tuple is returned
+        instead, where values is a single array (of the current flavor)
+        with the objects in all the selected rows one after another, and
+        offsets is a NumPy array of 64-bit integers with one more element
+        than selected rows, so that row ``i`` is
+        ``values[offsets[i]:offsets[i+1]]``.  This avoids creating an
+        object per row, which is much faster for many short rows.  In the
+        case of pseudo-atoms, values holds the encoded contents in the
+        base atom (e.g. the UTF-8 bytes of strings), with no decoding.
+
+        .. versionchanged:: 3.5
+           The as_flat argument was added.
+
         """
 
         self._g_check_open()
         start, stop, step = self._process_range_read(start, stop, step)
+        if as_flat:
+            return self._read_flat(start, stop, step)
         if start == stop:
             listarr = []
         else:
@@ -829,6 +951,19 @@ class VLArray(hdf5extension.VLArray, Leaf, six.Iterator):
             outlistarr = [internal_to_flavor(arr, flavor) for arr in listarr]
         return outlistarr
 
+    def _read_flat(self, start, stop, step):
+        """Read a range of rows as flat values and offsets."""
+
+        if start == stop:
+            values = numpy.empty((0,) + tuple(self._atomicshape),
+                                 dtype=self._atomicdtype.base)
+            offsets = numpy.zeros(1, dtype='int64')
+        else:
+            values, offsets = self._read_array_flat(start, stop, step)
+        if hasattr(self.atom, 'size'):  # not a pseudo-atom
+            values = internal_to_flavor(values, self.flavor)
+        return values, offsets
+
     def _read_coordinates(self, coords):
         """Read rows specified in `coords`."""
         rows = []